@@ -1,19 +1,31 @@
+import bisect
+import importlib
 import os
-import re
 import zipfile
-import shutil
-import tempfile
 import threading
+import time
+import traceback
+import multiprocessing
 import queue
-import xml.etree.ElementTree as ET
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import customtkinter as ctk
-import pandas as pd
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
-import webbrowser
+
+from xmlparsing.aggregate import TAX_MAP, Partial
+from xmlparsing.archive import ARCHIVE_ERRORS, CORRUPT_ERRORS, list_xml_members
+from xmlparsing.cache import ResultCache
+from xmlparsing.columnar import write_arrow, write_csv_data, write_parquet
+from xmlparsing.cube import HOURS, WEEKDAYS
+from xmlparsing.dedup import CheckIndex
+from xmlparsing.filters import FilterIndex, RowFilter
+from xmlparsing.metrics import RunMetrics
+from xmlparsing.parallel import DEFAULT_WORKERS, parse_archive
+from xmlparsing.products import PRODUCT_COLUMNS, iter_product_rows
+from xmlparsing.report import iter_report_rows, write_xlsx
+from xmlparsing.search import SEARCH_LIMIT, NameIndex
+from xmlparsing.spill import Spill
+from xmlparsing.store import OP_RETURN, OP_SALE
+from xmlparsing.watch import POLL_INTERVAL, FolderWatcher
 
 # ─── DPI масштабування (Windows) ─────────────────────────────────────────────
 try:
@@ -30,12 +42,6 @@ ctk.set_window_scaling(1.0)
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
-# ─── Карта податкових груп ────────────────────────────────────────────────────
-TAX_MAP = {
-    "1": "А", "2": "Б", "3": "В", "4": "Г",
-    "5": "Д", "6": "Е", "7": "Ж", "8": "З",
-}
-
 # ─── Кольорова палітра ────────────────────────────────────────────────────────
 C = {
     "bg_dark":        "#0F1117",
@@ -57,6 +63,64 @@ C = {
     "tv_date":        "#0D1530",
 }
 
+# ─── Поступовий рендер ───────────────────────────────────────────────────────
+PREVIEW_INTERVAL = 0.5    # с між знімками днів під час парсингу
+RENDER_CHUNK     = 200    # вузлів днів за один тік after()
+ROW_CHUNK        = 2000   # позицій розгорнутого дня за один тік after()
+SEARCH_DELAY_MS  = 150    # пауза після введення перед пошуком
+
+# ─── Вкладка «Товари» ────────────────────────────────────────────────────────
+PRODUCT_METRICS = {
+    "Виручка":          "revenue",
+    "Кількість":        "count",
+    "Повернення":       "returns",
+    "Частка повернень": "return_rate",
+}
+PRODUCT_TOP_N = 20
+
+# ─── Вкладка «Години» ────────────────────────────────────────────────────────
+HOUR_VALUES = {
+    "Виручка (нетто)": "net",
+    "Продаж":          "sales",
+    "Повернення":      "returns",
+    "Чеки":            "checks",
+}
+HOUR_GROUPS = {"Усі групи": 0, **{f"Група {tn}": int(code) for code, tn in TAX_MAP.items()}}
+HOUR_BAR    = 24      # ширина смуги найбільшої години, символів
+
+# ─── Панель фільтра ──────────────────────────────────────────────────────────
+FILTER_OPS = {
+    "Усі операції": (),
+    "Продаж":       (OP_SALE,),
+    "Повернення":   (OP_RETURN,),
+}
+FILTER_MODES  = {"І": False, "АБО": True}    # як поєднати операцію і групи
+FILTER_GROUPS = {**{int(code): tn for code, tn in TAX_MAP.items()}, 0: "—"}   # 0 — без групи
+
+# ─── Фоновий прогрів ─────────────────────────────────────────────────────────
+# Модулі експорту не імпортуються під час старту: вікно з'являється одразу,
+# а вони довантажуються у фоновому потоці, поки користувач обирає архів
+WARMUP_DELAY_MS = 300
+WARMUP_MODULES  = ("openpyxl", "openpyxl.styles", "pyarrow", "pyarrow.compute",
+                   "pyarrow.parquet")
+
+
+def _warmup():
+    for name in WARMUP_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass    # pyarrow необов'язковий
+
+
+# ─── Режим пам'яті: поріг, після якого колонки скидаються на диск ────────────
+SPILL_MODES = {
+    "RAM":          0,
+    "Диск > 1 млн": 1 << 20,
+    "Диск > 4 млн": 4 << 20,
+    "Диск > 16 млн": 16 << 20,
+}
+
 
 class SalesParserApp(ctk.CTk):
     def __init__(self):
@@ -66,15 +130,44 @@ class SalesParserApp(ctk.CTk):
         self.minsize(1000, 680)
         self.configure(fg_color=C["bg_dark"])
 
-        self.sales_data            = []
+        self._spill_rows           = 0              # 0 — усе в пам'яті (SPILL_MODES)
+        self._spill                = None           # Spill поточного набору даних
+        self._dataset              = Partial()      # усі завантажені архіви, копійки
+        self._index                = CheckIndex()   # (РРО, час, номер) уже завантажених чеків
+        self.sales_data            = self._dataset.store
         self.sales_totals_by_date  = {}
-        self.temp_dir              = None
-        self._tax_rate_map         = {}
+        self._tax_rate_map         = self._dataset.rates    # RateTimeline — епохи ставок ПДВ
         self._processing           = False
+        self._exporting            = False  # потік експорту читає _dataset — його не змінюють
+        self._workers              = DEFAULT_WORKERS
+        try:
+            self._cache            = ResultCache()
+        except OSError:
+            self._cache            = None   # немає доступу до теки кешу — без кешу
+        self._order                = []    # індекси позицій за часом
+        self._spans                = []    # [(дата, початок, кінець)] у _order
+        self._search_index         = None  # NameIndex для поточного _order
+        self._search_job           = None  # after() відкладеного пошуку
+        self._full                 = ([], [], None)  # (order, spans, index) без фільтра
+        self._full_totals          = {}    # sales_totals_by_date без фільтра
+        self._bitmaps              = None  # FilterIndex над повним order
+        self._filter               = None  # активний RowFilter або None
+        self._filter_gen           = 0     # номер застосування — запізнілі результати відкидаються
+        self._view_stats           = None  # RunningStats вибірки фільтра (None — усі дані)
+        self._day_nodes            = {}    # {iid вузла дня: (дата, початок, кінець)}
+        self._day_fill             = {}    # {iid вузла дня: токен незавершеного заповнення}
+        self._render_gen           = 0     # номер рендеру — застарілі порції after() зупиняються
+        self._preview_nodes        = {}    # {дата: iid} вузли днів під час парсингу
+        self._preview_dates        = []    # відсортовані дати цих вузлів
+        self._preview_pending      = {}    # {дата: (продаж, повернення)} ще не показані
+        self._preview_job          = None  # after() для _pump_preview
+        self._watch_stop           = None  # threading.Event активного стеження
+        self._watch_backlog        = []    # архіви з теки, що чекають на злиття
         self._queue                = queue.Queue()
 
         self._build_ui()
         self._poll_queue()
+        self.after(WARMUP_DELAY_MS, lambda: threading.Thread(target=_warmup, daemon=True).start())
 
     # ══════════════════════════════════════════════════════════════════════════
     #  UI
@@ -103,6 +196,12 @@ class SalesParserApp(ctk.CTk):
             text_color="#FFF", command=self.select_zip)
         self.btn_open.pack(side="left", padx=(16, 8), pady=10)
 
+        self.btn_add = ctk.CTkButton(tb, text="➕  Додати ZIP",
+            font=ctk.CTkFont(size=13, weight="bold"), width=150, height=36,
+            corner_radius=8, fg_color=C["accent_purple"], hover_color="#8B5CF6",
+            text_color="#0F172A", command=self.add_zip)
+        self.btn_add.pack(side="left", padx=8, pady=10)
+
         self.btn_export = ctk.CTkButton(tb, text="💾  Експорт Excel",
             font=ctk.CTkFont(size=13, weight="bold"), width=170, height=36,
             corner_radius=8, fg_color=C["accent_green"], hover_color="#14B8A6",
@@ -115,6 +214,30 @@ class SalesParserApp(ctk.CTk):
             command=self.clear_data)
         self.btn_clear.pack(side="left", padx=8, pady=10)
 
+        self.btn_watch = ctk.CTkButton(tb, text="👁  Стежити за текою",
+            font=ctk.CTkFont(size=13), width=170, height=36, corner_radius=8,
+            fg_color="#2A2D3E", hover_color="#374151", text_color=C["text_secondary"],
+            command=self.toggle_watch)
+        self.btn_watch.pack(side="left", padx=8, pady=10)
+
+        self.workers_menu = ctk.CTkOptionMenu(tb,
+            values=[str(n) for n in range(1, DEFAULT_WORKERS + 1)],
+            font=ctk.CTkFont(size=12), width=70, height=36, corner_radius=8,
+            fg_color="#2A2D3E", button_color="#374151", text_color=C["text_secondary"],
+            command=lambda v: setattr(self, "_workers", int(v)))
+        self.workers_menu.set(str(self._workers))
+        self.workers_menu.pack(side="left", padx=(16, 4), pady=10)
+        ctk.CTkLabel(tb, text="процесів", font=ctk.CTkFont(size=12),
+            text_color=C["text_secondary"]).pack(side="left", padx=(0, 8))
+
+        # Діє з наступного «Відкрити ZIP» — поточні дані не переносяться
+        self.spill_menu = ctk.CTkOptionMenu(tb, values=list(SPILL_MODES),
+            font=ctk.CTkFont(size=12), width=130, height=36, corner_radius=8,
+            fg_color="#2A2D3E", button_color="#374151", text_color=C["text_secondary"],
+            command=lambda v: setattr(self, "_spill_rows", SPILL_MODES[v]))
+        self.spill_menu.set("RAM")
+        self.spill_menu.pack(side="left", padx=(8, 8), pady=10)
+
         self.rows_count_lbl = ctk.CTkLabel(tb, text="",
             font=ctk.CTkFont(family="Consolas", size=11), text_color=C["text_secondary"])
         self.rows_count_lbl.pack(side="right", padx=16)
@@ -131,7 +254,18 @@ class SalesParserApp(ctk.CTk):
 
         left = ctk.CTkFrame(main, fg_color="transparent")
         left.pack(side="left", fill="both", expand=True)
-        self._build_treeview(left)
+        self._build_filter_bar(left)
+        self.tabs = ctk.CTkTabview(left, fg_color=C["bg_dark"], corner_radius=0,
+            segmented_button_selected_color=C["accent_blue"],
+            segmented_button_unselected_color=C["bg_card2"])
+        self.tabs.pack(fill="both", expand=True)
+        items_tab = self.tabs.add("📋 Позиції")
+        prod_tab  = self.tabs.add("🏆 Товари")
+        hours_tab = self.tabs.add("🕐 Години")
+        self._build_search(items_tab)
+        self._build_treeview(items_tab)
+        self._build_products(prod_tab)
+        self._build_hours(hours_tab)
 
         right = ctk.CTkFrame(main, fg_color=C["bg_card"], corner_radius=0, width=240)
         right.pack(side="right", fill="y")
@@ -160,7 +294,10 @@ class SalesParserApp(ctk.CTk):
 
         self.tree = ttk.Treeview(parent,
             columns=("date","time","check","name","amount","type"),
-            show="headings", style="X.Treeview", selectmode="browse")
+            show="tree headings", style="X.Treeview", selectmode="browse")
+        self.tree.column("#0", width=28, minwidth=28, stretch=False)
+        self.tree.bind("<<TreeviewOpen>>",  self._on_day_open)
+        self.tree.bind("<<TreeviewClose>>", self._on_day_close)
 
         for col, text, w, anchor, stretch in [
             ("date",   "Дата",         95,  "center", False),
@@ -187,6 +324,285 @@ class SalesParserApp(ctk.CTk):
         self.tree.configure(yscrollcommand=sb_y.set, xscrollcommand=sb_x.set)
         self.tree.pack(fill="both", expand=True)
 
+    # ─── ПОШУК ────────────────────────────────────────────────────────────────
+    def _build_search(self, parent):
+        bar = ctk.CTkFrame(parent, fg_color=C["bg_card2"], corner_radius=0, height=40)
+        bar.pack(fill="x")
+        bar.pack_propagate(False)
+        self.search_entry = ctk.CTkEntry(bar, placeholder_text="🔍  Пошук товару за назвою…",
+            font=ctk.CTkFont(family="Consolas", size=12), height=30, corner_radius=8,
+            fg_color=C["bg_dark"], border_color=C["border"], text_color=C["text_primary"])
+        self.search_entry.pack(side="left", fill="x", expand=True, padx=(8, 4), pady=5)
+        self.search_entry.bind("<KeyRelease>", self._on_search_key)
+        self.search_entry.bind("<Escape>", lambda e: self._clear_search())
+        ctk.CTkButton(bar, text="✕", width=30, height=30, corner_radius=8,
+            fg_color="#2A2D3E", hover_color="#374151", text_color=C["text_secondary"],
+            command=self._clear_search).pack(side="left", padx=(0, 8), pady=5)
+
+    # ─── ФІЛЬТР ───────────────────────────────────────────────────────────────
+    def _build_filter_bar(self, parent):
+        bar = ctk.CTkFrame(parent, fg_color=C["bg_card2"], corner_radius=0, height=40)
+        bar.pack(fill="x")
+        bar.pack_propagate(False)
+        ent = dict(font=ctk.CTkFont(family="Consolas", size=12), height=30, corner_radius=8,
+                   fg_color=C["bg_dark"], border_color=C["border"], text_color=C["text_primary"])
+        opt = dict(font=ctk.CTkFont(size=12), height=30, corner_radius=8, fg_color="#2A2D3E",
+                   button_color="#374151", text_color=C["text_secondary"],
+                   command=lambda v: self._apply_filter())
+        self.flt_from = ctk.CTkEntry(bar, width=120, placeholder_text="з РРРР-ММ-ДД", **ent)
+        self.flt_from.pack(side="left", padx=(8, 4), pady=5)
+        self.flt_to = ctk.CTkEntry(bar, width=120, placeholder_text="по РРРР-ММ-ДД", **ent)
+        self.flt_to.pack(side="left", padx=4, pady=5)
+        for e in (self.flt_from, self.flt_to):
+            e.bind("<Return>", lambda ev: self._apply_filter())
+        self.flt_op = ctk.CTkOptionMenu(bar, values=list(FILTER_OPS), width=130, **opt)
+        self.flt_op.pack(side="left", padx=4, pady=5)
+        self.flt_mode = ctk.CTkOptionMenu(bar, values=list(FILTER_MODES), width=70, **opt)
+        self.flt_mode.pack(side="left", padx=4, pady=5)
+
+        self.flt_groups = {}
+        for code, tn in FILTER_GROUPS.items():
+            var = tk.BooleanVar(value=False)
+            ctk.CTkCheckBox(bar, text=tn, variable=var, width=20, checkbox_width=18,
+                checkbox_height=18, font=ctk.CTkFont(family="Consolas", size=12),
+                text_color=C["text_secondary"], command=self._apply_filter,
+            ).pack(side="left", padx=2, pady=5)
+            self.flt_groups[code] = var
+
+        ctk.CTkButton(bar, text="✕", width=30, height=30, corner_radius=8,
+            fg_color="#2A2D3E", hover_color="#374151", text_color=C["text_secondary"],
+            command=self._clear_filter).pack(side="left", padx=(8, 4), pady=5)
+        self.filter_info = ctk.CTkLabel(bar, text="", font=ctk.CTkFont(family="Consolas", size=11),
+                                        text_color=C["text_secondary"])
+        self.filter_info.pack(side="right", padx=8)
+
+    def _read_filter(self):
+        """RowFilter з панелі або None, якщо дата некоректна."""
+        period = self._read_period(self.flt_from, self.flt_to, self.filter_info)
+        if period is None:
+            return None
+        return RowFilter(*period, FILTER_OPS[self.flt_op.get()],
+                         tuple(code for code, var in self.flt_groups.items() if var.get()),
+                         FILTER_MODES[self.flt_mode.get()])
+
+    def _apply_filter(self):
+        """Маски й підсумки вибірки рахуються у фоновому потоці, результат — через чергу."""
+        if self._processing or not self.sales_data:
+            return      # після парсингу _render_table застосує фільтр сам
+        flt = self._read_filter()
+        if flt is None:
+            return
+        if not flt.active:
+            self._reset_filter()
+            return
+        self._filter      = flt
+        self._filter_gen += 1
+        self.filter_info.configure(text="⏳ Фільтрація…")
+        order, spans, _ = self._full
+        threading.Thread(target=self._filter_worker, daemon=True, args=(
+            flt, self._filter_gen, self.sales_data, self._dataset.checks, order, spans,
+            self._bitmaps, self._tax_rate_map.copy())).start()
+
+    def _filter_worker(self, flt, gen, store, checks, order, spans, bitmaps, rates):
+        t = time.perf_counter()
+        if bitmaps is None:
+            bitmaps = FilterIndex(store, checks, order, spans)
+        view = bitmaps.view(flt, rates)
+        self._queue.put({"kind": "filter_done", "gen": gen, "bitmaps": bitmaps, "view": view,
+                         "ms": (time.perf_counter() - t) * 1000})
+
+    def _on_filter_done(self, gen, bitmaps, view, ms):
+        if gen != self._filter_gen:
+            return      # фільтр змінили або дані перезавантажили
+        self._bitmaps = bitmaps
+        self.sales_totals_by_date = view.totals
+        self._show_view(view.rows, view.spans, None, view.stats)
+        self._update_stats()
+        self.filter_info.configure(
+            text=f"🔎 {len(view.rows):,} з {len(self._full[0]):,} поз.  ({ms:.0f} мс)")
+
+    def _reset_filter(self):
+        """Повертає повний набір даних без фільтра."""
+        self._filter      = None
+        self._filter_gen += 1
+        self.filter_info.configure(text="")
+        if not self.sales_data:
+            return
+        self.sales_totals_by_date = self._full_totals
+        self._show_view(*self._full, None)
+        self._update_stats()
+
+    def _clear_filter(self):
+        for e in (self.flt_from, self.flt_to):
+            e.delete(0, "end")
+        self.flt_op.set(next(iter(FILTER_OPS)))
+        self.flt_mode.set(next(iter(FILTER_MODES)))
+        for var in self.flt_groups.values():
+            var.set(False)
+        if self._filter is not None:
+            self._reset_filter()
+
+    # ─── ТОВАРИ ───────────────────────────────────────────────────────────────
+    def _build_products(self, parent):
+        bar = ctk.CTkFrame(parent, fg_color=C["bg_card2"], corner_radius=0, height=40)
+        bar.pack(fill="x")
+        bar.pack_propagate(False)
+        opt = dict(font=ctk.CTkFont(size=12), height=30, corner_radius=8, fg_color="#2A2D3E",
+                   button_color="#374151", text_color=C["text_secondary"],
+                   command=lambda v: self._refresh_products())
+        self.prod_metric = ctk.CTkOptionMenu(bar, values=list(PRODUCT_METRICS), width=150, **opt)
+        self.prod_metric.pack(side="left", padx=(8, 4), pady=5)
+        self.prod_dir = ctk.CTkOptionMenu(bar, values=["Топ", "Антитоп"], width=100, **opt)
+        self.prod_dir.pack(side="left", padx=4, pady=5)
+
+        ent = dict(font=ctk.CTkFont(family="Consolas", size=12), height=30, corner_radius=8,
+                   fg_color=C["bg_dark"], border_color=C["border"], text_color=C["text_primary"])
+        self.prod_n = ctk.CTkEntry(bar, width=60, placeholder_text=str(PRODUCT_TOP_N), **ent)
+        self.prod_n.pack(side="left", padx=4, pady=5)
+        self.prod_from = ctk.CTkEntry(bar, width=120, placeholder_text="з РРРР-ММ-ДД", **ent)
+        self.prod_from.pack(side="left", padx=4, pady=5)
+        self.prod_to = ctk.CTkEntry(bar, width=120, placeholder_text="по РРРР-ММ-ДД", **ent)
+        self.prod_to.pack(side="left", padx=4, pady=5)
+        for e in (self.prod_n, self.prod_from, self.prod_to):
+            e.bind("<Return>", lambda ev: self._refresh_products())
+        ctk.CTkButton(bar, text="Показати", width=90, height=30, corner_radius=8,
+            fg_color="#2A2D3E", hover_color="#374151", text_color=C["text_secondary"],
+            command=self._refresh_products).pack(side="left", padx=4, pady=5)
+        self.prod_info = ctk.CTkLabel(bar, text="", font=ctk.CTkFont(family="Consolas", size=11),
+                                      text_color=C["text_secondary"])
+        self.prod_info.pack(side="right", padx=8)
+
+        cols = ("place", "name", "revenue", "count", "returns", "rate", "share")
+        self.prod_tree = ttk.Treeview(parent, columns=cols, show="headings",
+                                      style="X.Treeview", selectmode="browse")
+        for col, text, w, anchor, stretch in zip(cols, PRODUCT_COLUMNS,
+                (50, 380, 120, 80, 120, 110, 110),
+                ("center", "w", "e", "e", "e", "e", "e"),
+                (False, True, False, False, False, False, False)):
+            self.prod_tree.heading(col, text=text, anchor=anchor)
+            self.prod_tree.column(col, width=w, minwidth=40, anchor=anchor, stretch=stretch)
+        self.prod_tree.tag_configure("odd",  background=C["tv_odd"],  foreground=C["text_primary"])
+        self.prod_tree.tag_configure("even", background=C["tv_even"], foreground=C["text_primary"])
+        sb = ctk.CTkScrollbar(parent, command=self.prod_tree.yview)
+        sb.pack(side="right", fill="y")
+        self.prod_tree.configure(yscrollcommand=sb.set)
+        self.prod_tree.pack(fill="both", expand=True)
+
+    @staticmethod
+    def _read_period(e_from, e_to, info):
+        """(first, last) з полів дат або None, якщо дата некоректна."""
+        first = e_from.get().strip() or None
+        last  = e_to.get().strip() or None
+        for d in (first, last):
+            if d and not (len(d) == 10 and d[4] == d[7] == "-" and d.replace("-", "").isdigit()):
+                info.configure(text=f"⚠️ Дата {d}: потрібно РРРР-ММ-ДД")
+                return None
+        return first, last
+
+    def _refresh_products(self):
+        """Рейтинг товарів за вибраними метрикою, напрямком, N і періодом."""
+        tree = self.prod_tree
+        tree.delete(*tree.get_children())
+        if self._processing or not self.sales_data:
+            self.prod_info.configure(text="")
+            return      # під час парсингу ProductStats дозбирає фоновий потік
+        try:
+            n = int(self.prod_n.get() or PRODUCT_TOP_N)
+        except ValueError:
+            n = PRODUCT_TOP_N
+        period = self._read_period(self.prod_from, self.prod_to, self.prod_info)
+        if period is None:
+            return
+        first, last = period
+
+        t = time.perf_counter()
+        ranked = self._dataset.products.top(max(n, 1), PRODUCT_METRICS[self.prod_metric.get()],
+                                            first, last, bottom=self.prod_dir.get() == "Антитоп")
+        ms = (time.perf_counter() - t) * 1000
+        ins = tree.insert
+        for k, values in enumerate(iter_product_rows(ranked)):
+            place, name, rev, cnt, ret, rate, share = values
+            ins("", "end", tags=("odd" if k % 2 == 0 else "even",), values=(
+                place, name, f"{rev:,.2f}", f"{cnt:,}", f"{ret:,.2f}",
+                "—" if rate is None else f"{rate:.2f}", f"{share:.2f}"))
+        period = f"{first or '…'} — {last or '…'}" if first or last else "весь період"
+        self.prod_info.configure(text=f"{period}  •  {len(ranked)} товарів  ({ms:.0f} мс)")
+
+    # ─── ГОДИНИ ───────────────────────────────────────────────────────────────
+    def _build_hours(self, parent):
+        bar = ctk.CTkFrame(parent, fg_color=C["bg_card2"], corner_radius=0, height=40)
+        bar.pack(fill="x")
+        bar.pack_propagate(False)
+        opt = dict(font=ctk.CTkFont(size=12), height=30, corner_radius=8, fg_color="#2A2D3E",
+                   button_color="#374151", text_color=C["text_secondary"],
+                   command=lambda v: self._refresh_hours())
+        self.hours_value = ctk.CTkOptionMenu(bar, values=list(HOUR_VALUES), width=150, **opt)
+        self.hours_value.pack(side="left", padx=(8, 4), pady=5)
+        self.hours_group = ctk.CTkOptionMenu(bar, values=list(HOUR_GROUPS), width=120, **opt)
+        self.hours_group.pack(side="left", padx=4, pady=5)
+
+        ent = dict(font=ctk.CTkFont(family="Consolas", size=12), height=30, corner_radius=8,
+                   fg_color=C["bg_dark"], border_color=C["border"], text_color=C["text_primary"])
+        self.hours_from = ctk.CTkEntry(bar, width=120, placeholder_text="з РРРР-ММ-ДД", **ent)
+        self.hours_from.pack(side="left", padx=4, pady=5)
+        self.hours_to = ctk.CTkEntry(bar, width=120, placeholder_text="по РРРР-ММ-ДД", **ent)
+        self.hours_to.pack(side="left", padx=4, pady=5)
+        for e in (self.hours_from, self.hours_to):
+            e.bind("<Return>", lambda ev: self._refresh_hours())
+        ctk.CTkButton(bar, text="Показати", width=90, height=30, corner_radius=8,
+            fg_color="#2A2D3E", hover_color="#374151", text_color=C["text_secondary"],
+            command=self._refresh_hours).pack(side="left", padx=4, pady=5)
+        self.hours_info = ctk.CTkLabel(bar, text="", font=ctk.CTkFont(family="Consolas", size=11),
+                                       text_color=C["text_secondary"])
+        self.hours_info.pack(side="right", padx=8)
+
+        cols = ("hour", "total", "bar", "vat") + WEEKDAYS
+        self.hours_tree = ttk.Treeview(parent, columns=cols, show="headings",
+                                       style="X.Treeview", selectmode="browse")
+        for col, text, w, anchor, stretch in zip(cols,
+                ("Година", "За період", "", "ПДВ, грн") + WEEKDAYS,
+                (70, 120, 200, 100) + (90,) * len(WEEKDAYS),
+                ("center", "e", "w", "e") + ("e",) * len(WEEKDAYS),
+                (False, False, True, False) + (False,) * len(WEEKDAYS)):
+            self.hours_tree.heading(col, text=text, anchor=anchor)
+            self.hours_tree.column(col, width=w, minwidth=40, anchor=anchor, stretch=stretch)
+        self.hours_tree.tag_configure("odd",  background=C["tv_odd"],  foreground=C["text_primary"])
+        self.hours_tree.tag_configure("even", background=C["tv_even"], foreground=C["text_primary"])
+        self.hours_tree.pack(fill="both", expand=True)
+
+    def _refresh_hours(self):
+        """Години за період і середній день тижня зі зрізу HourCube."""
+        tree = self.hours_tree
+        tree.delete(*tree.get_children())
+        if self._processing or not self.sales_data:
+            self.hours_info.configure(text="")
+            return      # під час парсингу куб наповнює фоновий потік
+        period = self._read_period(self.hours_from, self.hours_to, self.hours_info)
+        if period is None:
+            return
+        first, last = period
+        value = HOUR_VALUES[self.hours_value.get()]
+        group = HOUR_GROUPS[self.hours_group.get()]
+
+        t = time.perf_counter()
+        cube       = self._dataset.hours
+        hourly     = cube.hourly(first, last, group, value)
+        sums, days = cube.weekday_profile(first, last, group, value)
+        vat        = (cube.hourly_vat(self._tax_rate_map, first, last).get(str(group))
+                      if group else None)
+        ms = (time.perf_counter() - t) * 1000
+
+        fmt  = (lambda v: f"{v:,.0f}") if value == "checks" else (lambda v: f"{v / 100:,.2f}")
+        peak = max(map(abs, hourly)) or 1
+        ins  = tree.insert
+        for h in range(HOURS):
+            avg = [fmt(sums[wd][h] / n) if n else "—" for wd, n in enumerate(days)]
+            ins("", "end", tags=("odd" if h % 2 == 0 else "even",), values=(
+                f"{h:02d}:00", fmt(hourly[h]), "█" * round(HOUR_BAR * abs(hourly[h]) / peak),
+                f"{vat[h]:,.2f}" if vat else "—", *avg))
+        label = f"{first or '…'} — {last or '…'}" if first or last else "весь період"
+        self.hours_info.configure(text=f"{label}  •  днів {sum(days):,}  ({ms:.0f} мс)")
+
     # ─── ПРАВА ПАНЕЛЬ ─────────────────────────────────────────────────────────
     def _build_stats_panel(self, parent):
         ctk.CTkLabel(parent, text="📈  Статистика",
@@ -271,28 +687,39 @@ class SalesParserApp(ctk.CTk):
             self.progress.set(msg["value"])
         elif k == "status":
             self.status_label.configure(text=msg["text"])
+        elif k == "preview":
+            self._show_preview(msg["days"], msg["stats"])
         elif k == "done":
-            self._on_parse_done()
+            self._on_parse_done(msg.get("metrics"), msg.get("totals"), msg.get("order"),
+                                msg.get("spans"))
+        elif k == "filter_done":
+            self._on_filter_done(msg["gen"], msg["bitmaps"], msg["view"], msg["ms"])
+        elif k == "watch_part":
+            self._watch_backlog.append(msg)
+            self._merge_watch_backlog()
+        elif k == "watch_done":
+            self._on_watch_done(msg)
         elif k == "export_enable":
-            self.btn_export.configure(state="normal" if self.sales_data else "disabled")
+            self._exporting = False
+            self.btn_export.configure(
+                state="normal" if self.sales_data and not self._processing else "disabled")
+            # архіви з теки, що надійшли під час експорту, зливаються тепер
+            self._merge_watch_backlog()
         elif k == "export_done":
-            self.btn_export.configure(state="normal")
             if messagebox.askyesno("Готово", "Файл збережено. Відкрити зараз?"):
                 try: os.startfile(msg["path"])
                 except Exception: pass
-            if self.temp_dir and os.path.exists(self.temp_dir):
-                if messagebox.askyesno("Очищення", "Видалити тимчасові файли?"):
-                    try:
-                        shutil.rmtree(self.temp_dir)
-                        self._log_direct("🧹 Тимчасові файли видалено.", "OK")
-                        self.temp_dir = None
-                    except Exception as e:
-                        messagebox.showwarning("Увага", str(e))
+        elif k == "export_error":
+            # лише повідомлення: парсинг чи злиття, якщо йде, не зачіпається
+            messagebox.showerror("Помилка", msg["text"])
         elif k == "error":
+            self._stop_preview()
             self._processing = False
             self.btn_open.configure(state="normal")
+            self.btn_add.configure(state="normal")
             self.btn_export.configure(state="normal" if self.sales_data else "disabled")
             messagebox.showerror("Помилка", msg["text"])
+            self._merge_watch_backlog()
 
     # ══════════════════════════════════════════════════════════════════════════
     #  ЛОГУВАННЯ
@@ -312,197 +739,361 @@ class SalesParserApp(ctk.CTk):
     #  ВИБІР ZIP
     # ══════════════════════════════════════════════════════════════════════════
     def select_zip(self):
-        if self._processing:
+        self._open_zip(add=False)
+
+    def add_zip(self):
+        """Дозавантажує архів до вже відкритих; повторні чеки відкидаються."""
+        self._open_zip(add=True)
+
+    def _open_zip(self, add):
+        if self._processing or self._exporting:
             return
         zip_path = filedialog.askopenfilename(filetypes=[("ZIP архів", "*.zip")])
         if not zip_path:
             return
 
-        self.clear_data(silent=True)
+        if not add:
+            self.clear_data(silent=True)
         self._processing = True
         self.btn_open.configure(state="disabled")
+        self.btn_add.configure(state="disabled")
+        self.btn_export.configure(state="disabled")
 
-        self.temp_dir = tempfile.mkdtemp()
         self._log_direct(f"📦 Архів: {os.path.basename(zip_path)}", "INFO")
 
+        metrics = RunMetrics()
         try:
-            with zipfile.ZipFile(zip_path, "r") as z:
-                z.extractall(self.temp_dir)
+            with metrics.stage("list"), zipfile.ZipFile(zip_path, "r") as z:
+                files = list_xml_members(z)
+                metrics.count(files=len(files), bytes=sum(z.getinfo(n).file_size for n in files))
         except zipfile.BadZipFile:
             messagebox.showerror("Помилка", "ZIP-файл пошкоджено.")
             self._processing = False
             self.btn_open.configure(state="normal")
+            self.btn_add.configure(state="normal")
+            self.btn_export.configure(state="normal" if self.sales_data else "disabled")
             return
 
-        files = sorted(f for f in os.listdir(self.temp_dir) if f.endswith(".xml"))
         if not files:
             self._log_direct("❌ XML-файли не знайдено.", "ERROR")
             self._processing = False
             self.btn_open.configure(state="normal")
+            self.btn_add.configure(state="normal")
+            self.btn_export.configure(state="normal" if self.sales_data else "disabled")
             return
 
         self._log_direct(f"🔍 Знайдено {len(files):,} XML-файлів. Обробка у фоні…", "INFO")
-        threading.Thread(target=self._parse_worker, args=(files,), daemon=True).start()
+        threading.Thread(target=self._parse_worker, args=(zip_path, files, add, metrics),
+                         daemon=True).start()
 
     # ══════════════════════════════════════════════════════════════════════════
     #  ПАРСИНГ (ФОНОВИЙ ПОТІК)
     # ══════════════════════════════════════════════════════════════════════════
-    def _parse_worker(self, files):
+    def _parse_worker(self, zip_path, files, add=False, metrics=None):
         total = len(files)
-        for idx, fn in enumerate(files, 1):
-            self._parse_one(os.path.join(self.temp_dir, fn))
-            if idx % 10 == 0 or idx == total:
+        if metrics is None:
+            metrics = RunMetrics()
+        sent = {}           # {дата: (продаж, повернення)} уже надіслані в попередній перегляд
+        last = [0.0]
+
+        def on_progress(idx, errors):
+            for err in errors:
+                self.log(f"❌ {err}", "ERROR")
+            if idx % 10 == 0 or idx == total or self._workers > 1:
                 self._queue.put({"kind": "progress", "value": idx / total})
                 self._queue.put({"kind": "status", "text": f"Обробка… {idx:,}/{total:,}"})
 
-        # Перераховуємо ставки після завершення всіх файлів
-        tn2code = {v: k for k, v in TAX_MAP.items()}
-        for dd in self.sales_totals_by_date.values():
-            for tn, td in dd["taxes"].items():
-                code = tn2code.get(tn, "")
-                pct  = self._tax_rate_map.get(code, 0.0)
-                td["pr"]  = f"{pct:.2f}%"
-                td["vat"] = td["turnover"] * pct / (100 + pct) if pct > 0 else 0.0
-
-        self._queue.put({"kind": "done"})
+        def on_partial(part):
+            now = time.perf_counter()
+            if now - last[0] >= PREVIEW_INTERVAL:
+                last[0] = now
+                self._post_preview(part, sent)
 
-    def _parse_one(self, filepath):
         try:
-            with open(filepath, encoding="utf-8") as f:
-                content = f.read()
+            # XML читаються прямо з архіву; при workers > 1 — у пулі процесів
+            part = parse_archive(zip_path, files, workers=self._workers,
+                                 on_progress=on_progress, cache=self._cache, metrics=metrics,
+                                 spill=self._spill,
+                                 # при «Додати» в дереві вже інші дні — лише підсумковий рендер
+                                 on_partial=None if add else on_partial)
+        except CORRUPT_ERRORS as err:
+            self._queue.put({"kind": "error", "text": f"ZIP-файл пошкоджено: {err}"})
+            return
+        except OSError as err:
+            # файл архіву, тека кешу чи spill (наприклад, диск заповнено)
+            self._queue.put({"kind": "error", "text": f"Помилка читання/запису: {err}"})
+            return
+        except Exception as err:
+            # пул процесів, pickle чи помилка в коді — у журнал з трасуванням
+            self.log(traceback.format_exc().rstrip(), "ERROR")
+            self._queue.put({"kind": "error",
+                             "text": f"Помилка парсингу ({type(err).__name__}): {err}"})
+            return
+        metrics.add_partial(part)
+
+        if part.cached:
+            self.log(f"♻️ З кешу: {part.cached:,} з {total:,} файлів", "INFO")
+
+        # Таблиця й підсумки читаються лише після "done" — зливати можна тут
+        t = time.perf_counter()
+        if add:
+            n_new = len(part.checks)
+            dups  = self._dataset.merge_new(part, self._index)
+            self.log(f"➕ Нових чеків: {n_new - dups:,}, дублікатів відкинуто: {dups:,}",
+                     "WARN" if dups else "INFO")
+        else:
+            # набір даних щойно очищено — part стає ним без копіювання колонок
+            self._dataset       = part
+            self.sales_data     = part.store
+            self._tax_rate_map  = part.rates
+            self._index.add_partial(part)
+        metrics.add_time("merge", time.perf_counter() - t)
+
+        # Підсумки, сортування і межі днів — теж тут, щоб не блокувати UI
+        ds = self._dataset
+        with metrics.stage("aggregate"):
+            totals = ds.day_totals()
+            ds.stats        # RunningStats і ProductStats дозбираються тут, а не в UI-потоці
+        with metrics.stage("table"):
+            order = ds.store.sorted_order()
+            spans = ds.store.day_spans(order)
+        # NameIndex і FilterIndex — O(рядків) пам'яті; будуються при першому пошуку чи фільтрі
+        self._queue.put({"kind": "done", "metrics": metrics, "totals": totals, "order": order,
+                         "spans": spans})
+
+    def _post_preview(self, part, sent):
+        """Надсилає в UI дні, що змінились від попереднього знімка, і лічильники."""
+        days = {}
+        for date, (s, r, _taxes) in part.days.items():
+            v = (s / 100, r / 100)
+            if sent.get(date) != v:
+                days[date] = sent[date] = v
+        st = part.stats
+        self._queue.put({"kind": "preview", "days": days,
+                         "stats": (st.sales / 100, st.returns / 100, st.checks, st.days,
+                                   st.grand_taxes(part.rates))})
 
-            for block in re.findall(r'<DAT.*?</DAT>', content, re.DOTALL):
+    # ══════════════════════════════════════════════════════════════════════════
+    #  СТЕЖЕННЯ ЗА ТЕКОЮ
+    # ══════════════════════════════════════════════════════════════════════════
+    def toggle_watch(self):
+        if self._watch_stop is not None:
+            self._watch_stop.set()
+            self._watch_stop = None
+            self.btn_watch.configure(text="👁  Стежити за текою", text_color=C["text_secondary"])
+            self._log_direct("⏹ Стеження зупинено.", "INFO")
+            return
+        folder = filedialog.askdirectory()
+        if not folder:
+            return
+        self._watch_stop = threading.Event()
+        self.btn_watch.configure(text="⏹  Зупинити стеження", text_color=C["accent_yellow"])
+        self._log_direct(f"👁 Стеження за текою: {folder}", "INFO")
+        threading.Thread(target=self._watch_worker,
+                         args=(FolderWatcher(folder), self._watch_stop), daemon=True).start()
+
+    def _watch_worker(self, watcher, stop):
+        """Фоновий потік: парсить нові архіви; зливає їх _watch_merge_worker."""
+        while not stop.wait(POLL_INTERVAL):
+            try:
+                ready = watcher.scan()
+            except OSError as err:
+                self.log(f"❌ Тека недоступна: {err}", "ERROR")
+                continue
+            for path in ready:
+                if stop.is_set():
+                    return
+                name = os.path.basename(path)
                 try:
-                    root = ET.fromstring(f"<root>{block}</root>")
-                    for c in root.findall(".//C"):
-                        is_ret = c.attrib.get("T", "0") == "1"
-                        op     = "Повернення" if is_ret else "Продаж"
-
-                        e = c.find(".//E")
-                        if e is None:
-                            continue
-
-                        e_code = e.attrib.get("TX", "")
-                        e_pct  = float(e.attrib.get("TXPR", 0))
-                        if e_code and e_code not in self._tax_rate_map:
-                            self._tax_rate_map[e_code] = e_pct
-
-                        ts  = e.attrib.get("TS", "")
-                        no  = e.attrib.get("NO", "")
-                        tot = abs(int(e.attrib.get("SM", 0))) / 100
-
-                        if ts and len(ts) == 14:
-                            date = f"{ts[:4]}-{ts[4:6]}-{ts[6:8]}"
-                            time = f"{ts[8:10]}:{ts[10:12]}:{ts[12:]}"
-                        else:
-                            date, time = "Невідомо", ""
-
-                        if date not in self.sales_totals_by_date:
-                            self.sales_totals_by_date[date] = {
-                                "Продаж": 0.0, "Повернення": 0.0, "taxes": {}
-                            }
-                        self.sales_totals_by_date[date][op] += tot
-
-                        # Обороти по групах
-                        trn = {}
-                        for p in c.findall(".//P"):
-                            tx = p.attrib.get("TX", "")
-                            trn[tx] = trn.get(tx, 0) + int(p.attrib.get("SM", 0))
-                        for d in c.findall(".//D"):
-                            tx = d.attrib.get("TX", "")
-                            trn[tx] = trn.get(tx, 0) - int(d.attrib.get("SM", 0))
-
-                        for tx_code, cents in trn.items():
-                            if tx_code not in TAX_MAP:
-                                continue
-                            tx_name = TAX_MAP[tx_code]
-                            tv  = abs(cents) / 100
-                            pct = self._tax_rate_map.get(tx_code, 0.0)
-                            vat = tv * pct / (100 + pct) if pct > 0 else 0.0
-                            taxes = self.sales_totals_by_date[date]["taxes"]
-                            if tx_name not in taxes:
-                                taxes[tx_name] = {"turnover": 0.0, "vat": 0.0, "pr": f"{pct:.2f}%"}
-                            s = -1 if is_ret else 1
-                            taxes[tx_name]["turnover"] += s * tv
-                            taxes[tx_name]["vat"]      += s * vat
-
-                        for item in c.findall(".//P"):
-                            nm  = item.attrib.get("NM", "Без назви")
-                            amt = abs(int(item.attrib.get("SM", 0))) / 100
-                            self.sales_data.append((date, time, no, nm, f"{amt:.2f}", op))
-
-                except ET.ParseError as err:
-                    self.log(f"❌ XML error {os.path.basename(filepath)}: {err}", "ERROR")
-        except Exception as err:
-            self.log(f"❌ Читання файлу: {err}", "ERROR")
+                    with zipfile.ZipFile(path, "r") as z:
+                        files = list_xml_members(z)
+                    part = parse_archive(path, files, workers=self._workers, cache=self._cache)
+                except ARCHIVE_ERRORS as err:
+                    # пошкоджений архів лише в журнал — потік стеження не зупиняється
+                    self.log(f"❌ {name}: {err}", "ERROR")
+                    continue
+                self._queue.put({"kind": "watch_part", "name": name, "part": part})
+
+    def _merge_watch_backlog(self):
+        """Запускає злиття накопичених архівів, якщо дані зараз ніхто не змінює.
+
+        Поки потік зливає, _processing стоїть, як і під час парсингу: фільтр,
+        пошук, панелі й експорт не читають набір даних, що росте. Поки йде
+        експорт, злиття чекає на його кінець (export_enable).
+        """
+        if self._processing or self._exporting or not self._watch_backlog:
+            return
+        backlog, self._watch_backlog = self._watch_backlog, []
+        self._processing = True
+        self.btn_export.configure(state="disabled")
+        threading.Thread(target=self._watch_merge_worker, daemon=True, args=(
+            [(msg["name"], msg["part"]) for msg in backlog],
+            self._dataset, self._index)).start()
+
+    def _watch_merge_worker(self, parts, ds, index):
+        """Фоновий потік: зливає архіви з теки і готує все для рендеру, як _parse_worker."""
+        new = 0
+        for name, part in parts:
+            for err in part.errors:
+                self.log(f"❌ {err}", "ERROR")
+            n    = len(part.checks)
+            dups = ds.merge_new(part, index)
+            new += n - dups
+            self.log(f"👁 {name}: нових чеків {n - dups:,}"
+                     + (f", дублікатів {dups:,}" if dups else ""), "INFO")
+        msg = {"kind": "watch_done", "new": new}
+        if new:
+            msg["totals"] = ds.day_totals()     # заразом дозбирає stats, hours і products
+            order = msg["order"] = ds.store.sorted_order()
+            msg["spans"] = ds.store.day_spans(order)
+        self._queue.put(msg)
+
+    def _on_watch_done(self, msg):
+        self._processing = False
+        self.btn_export.configure(state="normal" if self.sales_data else "disabled")
+        if msg["new"]:
+            self.sales_totals_by_date = msg["totals"]
+            self._render_table(msg["order"], msg["spans"])
+            self._update_stats()
+            self._refresh_products()
+            self._refresh_hours()
+            self.rows_count_lbl.configure(text=f"Позицій: {len(self.sales_data):,}")
+        self._merge_watch_backlog()
 
     # ══════════════════════════════════════════════════════════════════════════
     #  ПІСЛЯ ПАРСИНГУ
     # ══════════════════════════════════════════════════════════════════════════
-    def _on_parse_done(self):
+    def _on_parse_done(self, metrics=None, totals=None, order=None, spans=None):
         self._processing = False
         self.btn_open.configure(state="normal")
+        self.btn_add.configure(state="normal")
+        if metrics is None:
+            metrics = RunMetrics()
+        # Епохи ставок відомі лише після всіх файлів — ПДВ рахується при зведенні
+        if totals is None:
+            with metrics.stage("aggregate"):
+                totals = self._dataset.day_totals()
+            order = spans = None
+        self.sales_totals_by_date = totals
 
         if not self.sales_data:
+            self._stop_preview()
+            self.tree.delete(*self.tree.get_children())
             self._log_direct("⚠️ Чеків не знайдено.", "WARN")
+            self._merge_watch_backlog()
             return
 
         self._log_direct(f"✅ Парсинг завершено. Позицій: {len(self.sales_data):,}. Рендеринг…", "OK")
         self.update_idletasks()
 
-        self._render_table()
-        self._update_stats()
+        with metrics.stage("render"):
+            self._render_table(order, spans)
+        with metrics.stage("stats"):
+            self._update_stats()
 
         self.btn_export.configure(state="normal")
         self.progress.set(1.0)
         self.rows_count_lbl.configure(text=f"Позицій: {len(self.sales_data):,}")
+        self._refresh_products()
+        self._refresh_hours()
         self._log_direct(f"✅ Готово. Позицій: {len(self.sales_data):,}", "OK")
+        for line in metrics.summary_lines():
+            self._log_direct(line, "INFO")
+        # архіви з теки, що надійшли під час парсингу, зливаються поверх
+        self._merge_watch_backlog()
 
     # ══════════════════════════════════════════════════════════════════════════
     #  РЕНДЕР TREEVIEW
     # ══════════════════════════════════════════════════════════════════════════
-    def _render_table(self):
-        self.tree.delete(*self.tree.get_children())
-
-        df = pd.DataFrame(self.sales_data,
-            columns=["Дата","Час","Номер чека","Найменування","Сума (грн)","Тип операції"]
-        ).sort_values(by=["Дата","Час"])
-
-        row_idx = 0
-        ins = self.tree.insert  # локальна ссилка — швидше в циклі
-
-        for date, group in df.groupby("Дата"):
-            ins("", "end", values=(f"── {date} ──","","","","",""), tags=("daterow",))
-
-            for _, row in group.iterrows():
-                if row["Тип операції"] == "Повернення":
-                    tag = "return"
-                else:
-                    tag = "odd" if row_idx % 2 == 0 else "even"
-                ins("", "end", values=tuple(row), tags=(tag,))
-                row_idx += 1
-
-            totals     = self.sales_totals_by_date.get(date, {})
-            t_sales    = totals.get("Продаж", 0)
-            t_ret      = totals.get("Повернення", 0)
-            taxes      = totals.get("taxes", {})
-
-            ins("", "end", values=("","","","Загальний обіг (Продаж)",f"{t_sales:.2f}",""), tags=("summary",))
-            for tc, td in sorted(taxes.items()):
-                tv  = td.get("turnover", 0.0)
-                vat = td.get("vat", 0.0)
-                pr  = td.get("pr", "")
-                if tv  != 0: ins("", "end", values=("","","",f"  Обіг Група {tc}  ({pr})",f"{tv:.2f}",""), tags=("summary",))
-                if vat != 0: ins("", "end", values=("","","",f"  Податок Група {tc}  ({pr})",f"{vat:.2f}",""), tags=("summary",))
-            ins("", "end", values=("","","","Повернення",f"{t_ret:.2f}",""), tags=("summary",))
-            ins("", "end", values=("","","","ЧИСТИЙ БАЛАНС",f"{t_sales-t_ret:.2f}",""), tags=("summary",))
-
-        # Зведена таблиця
-        g_sales   = sum(v.get("Продаж",0)    for v in self.sales_totals_by_date.values())
-        g_returns = sum(v.get("Повернення",0) for v in self.sales_totals_by_date.values())
+    def _render_table(self, order=None, spans=None):
+        """Вузли днів і зведена таблиця; вставляються порціями через after().
+
+        order і spans, пораховані у фоновому потоці, можна передати готовими.
+        NameIndex і FilterIndex тут не будуються — лише при першому пошуку
+        чи фільтрі.
+        Вузли попереднього перегляду не перестворюються — лише оновлюються.
+        Якщо в полі пошуку є запит — показуються його результати; якщо
+        заданий фільтр — він перераховується для нових даних.
+        """
+        store = self.sales_data
+        if order is None:
+            order = store.sorted_order()
+            spans = store.day_spans(order)
+        self._full        = (order, spans, None)    # NameIndex — при першому пошуку
+        self._full_totals = self.sales_totals_by_date
+        self._bitmaps     = None    # збудується при першому фільтрі
+        self._show_view(order, spans, None, None)
+        if self._filter is not None:
+            self._apply_filter()
+
+    def _show_view(self, order, spans, index, stats):
+        """Показує вибірку: order і spans — повні або після фільтра.
+
+        index None — NameIndex збудується при першому пошуку; stats —
+        RunningStats вибірки (None — усього набору даних).
+        """
+        self._order        = order
+        self._spans        = spans
+        self._search_index = index
+        self._view_stats   = stats
+        if self.search_entry.get().strip():
+            self._run_search()
+        else:
+            self._show_days()
+
+    def _show_days(self):
+        self._stop_preview()
+        keep, self._preview_nodes, self._preview_dates = self._preview_nodes, {}, []
+        live = set(keep.values())
+        self.tree.delete(*[iid for iid in self.tree.get_children() if iid not in live])
+        self._day_nodes.clear()
+        self._day_fill.clear()
+        self._render_gen += 1
+        self._render_days(self._render_gen, self._spans, 0, keep)
+
+    def _day_values(self, date, t_sales, t_ret, count):
+        return (f"── {date} ──", "", "", f"Продаж {t_sales:.2f}  •  Повернення {t_ret:.2f}",
+                f"{t_sales-t_ret:.2f}", count)
+
+    def _render_days(self, gen, spans, k, keep):
+        if gen != self._render_gen:
+            return      # почався новий рендер або дані очищено
+        tree = self.tree
+        ins  = tree.insert  # локальна ссилка — швидше в циклі
+        stop = min(len(spans), k + RENDER_CHUNK)
+
+        # Лише вузли днів з готовими підсумками; позиції — при розгортанні
+        for pos in range(k, stop):
+            date, start, end = spans[pos]
+            totals = self.sales_totals_by_date.get(date, {})
+            values = self._day_values(date, totals.get("Продаж", 0), totals.get("Повернення", 0),
+                                      f"{end-start:,} поз.")
+            node = keep.pop(date, None)
+            if node is None:
+                node = ins("", pos, values=values, tags=("daterow",))
+            else:
+                tree.item(node, values=values)
+                tree.move(node, "", pos)
+            ins(node, "end", values=("","","","","",""))   # заглушка для ▸
+            self._day_nodes[node] = (date, start, end)
+
+        if stop < len(spans):
+            self.after(1, self._render_days, gen, spans, stop, keep)
+            return
+        if keep:
+            tree.delete(*keep.values())
+        self._render_grand()
+
+    def _render_grand(self):
+        """Зведена таблиця за весь період — у кінці дерева."""
+        ins       = self.tree.insert
+        st        = self._current_stats()
+        g_sales   = st.sales / 100
+        g_returns = st.returns / 100
         g_taxes   = self._calc_grand_taxes()
+        title     = "ЗА ФІЛЬТРОМ" if self._view_stats is not None else "ЗА ВЕСЬ ПЕРІОД"
 
-        ins("", "end", values=("","","","▓▓  ЗВЕДЕНА ТАБЛИЦЯ ЗА ВЕСЬ ПЕРІОД  ▓▓","",""), tags=("daterow",))
+        ins("", "end", values=("","","",f"▓▓  ЗВЕДЕНА ТАБЛИЦЯ {title}  ▓▓","",""), tags=("daterow",))
         ins("", "end", values=("","","","ЗАГАЛЬНИЙ ПРОДАЖ",f"{g_sales:.2f}",""), tags=("grand",))
         for tc, td in sorted(g_taxes.items()):
             tv  = td.get("turnover",0.0)
@@ -513,37 +1104,177 @@ class SalesParserApp(ctk.CTk):
         ins("", "end", values=("","","","ЗАГАЛЬНІ ПОВЕРНЕННЯ",f"{g_returns:.2f}",""), tags=("grand",))
         ins("", "end", values=("","","","ФІНАЛЬНИЙ БАЛАНС",f"{g_sales-g_returns:.2f}",""), tags=("grand",))
 
+    # ─── Пошук ────────────────────────────────────────────────────────────────
+    def _on_search_key(self, event=None):
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(SEARCH_DELAY_MS, self._run_search)
+
+    def _clear_search(self):
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+            self._search_job = None
+        had_query = bool(self.search_entry.get().strip())
+        self.search_entry.delete(0, "end")
+        if had_query and self.sales_data and not self._processing:
+            self._show_days()
+
+    def _run_search(self):
+        """Плоский список позицій, чия назва містить запит, — замість днів."""
+        self._search_job = None
+        if self._processing or not self.sales_data:
+            return      # індекс з'явиться після парсингу — тоді й застосуємо запит
+        query = self.search_entry.get().strip()
+        if not query:
+            self._show_days()
+            return
+        t = time.perf_counter()
+        if self._search_index is None:
+            self._search_index = NameIndex(self.sales_data, self._order)
+            if self._order is self._full[0]:
+                # індекс повного набору переживе скидання фільтра
+                self._full = (*self._full[:2], self._search_index)
+        total, hits = self._search_index.search(query, SEARCH_LIMIT)
+        ms = (time.perf_counter() - t) * 1000
+
+        self._stop_preview()
+        self._preview_nodes, self._preview_dates = {}, []
+        self._day_nodes.clear()
+        self._day_fill.clear()
+        self._render_gen += 1
+        tree = self.tree
+        tree.delete(*tree.get_children())
+        shown = f", показано перші {len(hits):,}" if total > len(hits) else ""
+        tree.insert("", "end", values=("", "", "",
+            f"🔍 «{query}»: {total:,} поз.{shown}  ({ms:.0f} мс)", "", ""), tags=("daterow",))
+
+        store = self.sales_data
+        row   = store.row
+        op    = store.op
+        order = self._order
+        ins   = tree.insert
+        for n, pos in enumerate(hits):
+            i = order[pos]
+            if op[i] == OP_RETURN:
+                tag = "return"
+            else:
+                tag = "odd" if n % 2 == 0 else "even"
+            ins("", "end", values=row(i), tags=(tag,))
+
+    # ─── Попередній перегляд під час парсингу ─────────────────────────────────
+    def _show_preview(self, days, stats):
+        if not self._processing:
+            return      # запізнілий знімок — підсумковий рендер уже почався
+        self._preview_pending.update(days)
+        if self._preview_job is None:
+            self._preview_job = self.after(0, self._pump_preview)
+        self._show_stats(*stats)
+
+    def _pump_preview(self):
+        self._preview_job = None
+        pending = self._preview_pending
+        dates   = self._preview_dates
+        tree    = self.tree
+        for date in sorted(pending)[:RENDER_CHUNK]:
+            t_sales, t_ret = pending.pop(date)
+            values = self._day_values(date, t_sales, t_ret, "…")
+            node   = self._preview_nodes.get(date)
+            if node is not None:
+                tree.item(node, values=values)
+                continue
+            k = bisect.bisect(dates, date)
+            dates.insert(k, date)
+            self._preview_nodes[date] = tree.insert("", k, values=values, tags=("daterow",))
+        if pending:
+            self._preview_job = self.after(1, self._pump_preview)
+
+    def _stop_preview(self):
+        if self._preview_job is not None:
+            self.after_cancel(self._preview_job)
+            self._preview_job = None
+        self._preview_pending.clear()
+
+    def _on_day_open(self, event=None):
+        node = self.tree.focus()
+        span = self._day_nodes.get(node)
+        if span is None:
+            return
+        self.tree.delete(*self.tree.get_children(node))
+        token = self._day_fill[node] = object()
+        self._fill_day(node, token, span, span[1])
+
+    def _fill_day(self, node, token, span, pos):
+        """Позиції дня порціями по ROW_CHUNK, потім підсумки дня."""
+        if self._day_fill.get(node) is not token:
+            return      # день згорнуто або таблицю перемальовано
+        date, start, end = span
+        stop  = min(end, pos + ROW_CHUNK)
+        store = self.sales_data
+        row   = store.row
+        op    = store.op
+        ins   = self.tree.insert
+
+        for row_idx, i in enumerate(self._order[pos:stop], pos - start):
+            if op[i] == OP_RETURN:
+                tag = "return"
+            else:
+                tag = "odd" if row_idx % 2 == 0 else "even"
+            ins(node, "end", values=row(i), tags=(tag,))
+        if stop < end:
+            self.after(1, self._fill_day, node, token, span, stop)
+            return
+        del self._day_fill[node]
+
+        totals     = self.sales_totals_by_date.get(date, {})
+        t_sales    = totals.get("Продаж", 0)
+        t_ret      = totals.get("Повернення", 0)
+        taxes      = totals.get("taxes", {})
+
+        ins(node, "end", values=("","","","Загальний обіг (Продаж)",f"{t_sales:.2f}",""), tags=("summary",))
+        for tc, td in sorted(taxes.items()):
+            tv  = td.get("turnover", 0.0)
+            vat = td.get("vat", 0.0)
+            pr  = td.get("pr", "")
+            if tv  != 0: ins(node, "end", values=("","","",f"  Обіг Група {tc}  ({pr})",f"{tv:.2f}",""), tags=("summary",))
+            if vat != 0: ins(node, "end", values=("","","",f"  Податок Група {tc}  ({pr})",f"{vat:.2f}",""), tags=("summary",))
+        ins(node, "end", values=("","","","Повернення",f"{t_ret:.2f}",""), tags=("summary",))
+        ins(node, "end", values=("","","","ЧИСТИЙ БАЛАНС",f"{t_sales-t_ret:.2f}",""), tags=("summary",))
+
+    def _on_day_close(self, event=None):
+        node = self.tree.focus()
+        if node not in self._day_nodes:
+            return
+        # Звільняємо рядки згорнутого дня — Tk не тримає зайвих значень
+        self._day_fill.pop(node, None)
+        self.tree.delete(*self.tree.get_children(node))
+        self.tree.insert(node, "end", values=("","","","","",""))
+
     # ══════════════════════════════════════════════════════════════════════════
     #  HELPER: ЗВЕДЕНІ ПОДАТКИ
     # ══════════════════════════════════════════════════════════════════════════
+    def _current_stats(self):
+        """RunningStats показаної вибірки: фільтра або всього набору даних."""
+        return self._view_stats if self._view_stats is not None else self._dataset.stats
+
     def _calc_grand_taxes(self):
-        tn2c = {v: k for k, v in TAX_MAP.items()}
-        grand = {}
-        for dd in self.sales_totals_by_date.values():
-            for tn, td in dd.get("taxes", {}).items():
-                pct = self._tax_rate_map.get(tn2c.get(tn,""), 0.0)
-                pr  = f"{pct:.2f}%"
-                tv  = td.get("turnover", 0.0)
-                vat = tv * pct / (100 + pct) if pct > 0 else 0.0
-                if tn not in grand:
-                    grand[tn] = {"turnover": 0.0, "vat": 0.0, "pr": pr}
-                grand[tn]["turnover"] += tv
-                grand[tn]["vat"]      += vat
-                grand[tn]["pr"]        = pr
-        return grand
+        return self._current_stats().grand_taxes(self._tax_rate_map)
 
     # ══════════════════════════════════════════════════════════════════════════
     #  СТАТИСТИКА
     # ══════════════════════════════════════════════════════════════════════════
     def _update_stats(self):
-        ts = sum(v.get("Продаж",0)    for v in self.sales_totals_by_date.values())
-        tr = sum(v.get("Повернення",0) for v in self.sales_totals_by_date.values())
-
-        self._stat_labels["total_checks"].configure( text=f"{len(set((r[0],r[2]) for r in self.sales_data)):,}")
+        # Готові лічильники з RunningStats — без проходу по позиціях
+        st = self._current_stats()
+        self._show_stats(st.sales / 100, st.returns / 100, st.checks, st.days,
+                         self._calc_grand_taxes())
+
+    def _show_stats(self, ts, tr, checks, days, grand_taxes):
+        """Панель статистики; викликається й зі знімками під час парсингу."""
+        self._stat_labels["total_checks"].configure( text=f"{checks:,}")
         self._stat_labels["total_sales"].configure(  text=f"{ts:,.2f} ₴")
         self._stat_labels["total_returns"].configure(text=f"{tr:,.2f} ₴")
         self._stat_labels["net_balance"].configure(  text=f"{ts-tr:,.2f} ₴")
-        self._stat_labels["days_count"].configure(   text=f"{len(self.sales_totals_by_date)}")
+        self._stat_labels["days_count"].configure(   text=f"{days}")
 
         # CustomTkinter іноді затримує перемальовку — примусово
         for lbl in self._stat_labels.values():
@@ -552,7 +1283,7 @@ class SalesParserApp(ctk.CTk):
         for w in self.tax_stats_frame.winfo_children():
             w.destroy()
 
-        for tn, td in sorted(self._calc_grand_taxes().items()):
+        for tn, td in sorted(grand_taxes.items()):
             card = ctk.CTkFrame(self.tax_stats_frame, fg_color=C["bg_card2"], corner_radius=8)
             card.pack(fill="x", padx=12, pady=3)
             ctk.CTkLabel(card, text=f"Група {tn}  ({td.get('pr','')})",
@@ -573,14 +1304,41 @@ class SalesParserApp(ctk.CTk):
     #  ОЧИЩЕННЯ
     # ══════════════════════════════════════════════════════════════════════════
     def clear_data(self, silent=False):
-        self.sales_data.clear()
-        self.sales_totals_by_date.clear()
-        self._tax_rate_map.clear()
+        if self._processing or self._exporting:
+            return      # фоновий потік ще пише чи читає цей набір даних і його Spill
+        if self._spill is not None:
+            self._spill.close()
+        self._spill                = Spill(self._spill_rows) if self._spill_rows else None
+        self._dataset              = Partial(self._spill)
+        self._index.clear()
+        self.sales_data            = self._dataset.store
+        self.sales_totals_by_date  = {}
+        self._tax_rate_map         = self._dataset.rates
+        self._order = []
+        self._spans = []
+        self._search_index = None
+        self._full         = ([], [], None)
+        self._full_totals  = {}
+        self._bitmaps      = None
+        self._filter       = None
+        self._filter_gen  += 1
+        self._view_stats   = None
+        self._clear_filter()
+        self._day_nodes.clear()
+        self._day_fill.clear()
+        self._render_gen += 1
+        self._stop_preview()
+        self._preview_nodes.clear()
+        self._preview_dates.clear()
         self.tree.delete(*self.tree.get_children())
         for lbl in self._stat_labels.values():
             lbl.configure(text="—")
         for w in self.tax_stats_frame.winfo_children():
             w.destroy()
+        self.prod_tree.delete(*self.prod_tree.get_children())
+        self.prod_info.configure(text="")
+        self.hours_tree.delete(*self.hours_tree.get_children())
+        self.hours_info.configure(text="")
         self.progress.set(0)
         self.rows_count_lbl.configure(text="")
         self.btn_export.configure(state="disabled")
@@ -592,102 +1350,60 @@ class SalesParserApp(ctk.CTk):
     #  ЕКСПОРТ EXCEL
     # ══════════════════════════════════════════════════════════════════════════
     def export_to_excel(self):
-        if not self.sales_data:
+        if not self.sales_data or self._processing or self._exporting:
             return
         save_path = filedialog.asksaveasfilename(
-            defaultextension=".xlsx", filetypes=[("Excel файли", "*.xlsx")])
+            defaultextension=".xlsx", filetypes=[
+                ("Excel файли", "*.xlsx"),
+                ("Parquet (BI)", "*.parquet"),
+                ("Arrow IPC (BI)", "*.arrow"),
+                ("CSV даних (BI)", "*.csv"),
+            ])
         if not save_path:
             return
+        self._exporting = True
         self.btn_export.configure(state="disabled")
-        self._log_direct("📊 Формування Excel-файлу…", "INFO")
+        self._log_direct("📊 Формування файлу…", "INFO")
         threading.Thread(target=self._export_worker, args=(save_path,), daemon=True).start()
 
     def _export_worker(self, save_path):
+        # Parquet/Arrow/CSV — таблиці даних без рядків-підсумків, поруч
+        # кладуться *.days.*, *.taxes.* і *.hours.* з підсумками днів, груп і годин
+        writer = {".parquet": write_parquet, ".arrow": write_arrow,
+                  ".csv": write_csv_data}.get(os.path.splitext(save_path)[1].lower())
+        # звіт Excel іде в порядку показаної вибірки — фільтр діє і на експорт
+        order    = self._order
+        filtered = self._filter is not None
         try:
-            df = pd.DataFrame(self.sales_data,
-                columns=["Дата","Час","Номер чека","Найменування","Сума (грн)","Тип операції"]
-            ).sort_values(by=["Дата","Час"])
-
-            g_sales = g_ret = 0.0
-            rows = []
-
-            for date, group in df.groupby("Дата"):
-                rows.extend(group.values.tolist())
-                tot    = self.sales_totals_by_date.get(date, {})
-                ts     = tot.get("Продаж", 0)
-                tr     = tot.get("Повернення", 0)
-                taxes  = tot.get("taxes", {})
-                g_sales += ts; g_ret += tr
-
-                rows.append(["","","",f"--- ПІДСУМКИ ДНЯ {date} ---","",""])
-                rows.append(["","","","Загальний обіг (Продаж)",f"{ts:.2f}",""])
-                for tn, td in sorted(taxes.items()):
-                    tv  = td.get("turnover",0.0)
-                    vat = td.get("vat",0.0)
-                    pr  = td.get("pr","")
-                    if tv  != 0: rows.append(["","","",f"Обіг Група {tn} ({pr})",f"{tv:.2f}",""])
-                    if vat != 0: rows.append(["","","",f"Податок Група {tn} ({pr})",f"{vat:.2f}",""])
-                rows.append(["","","","Повернення",f"{tr:.2f}",""])
-                rows.append(["","","","ЧИСТИЙ БАЛАНС",f"{ts-tr:.2f}",""])
-                rows.append(["","","","","",""])
-
-            gt = self._calc_grand_taxes()
-            rows.append(["","","","ЗВЕДЕНА ТАБЛИЦЯ ЗА ВЕСЬ ПЕРІОД","",""])
-            rows.append(["","","","ЗАГАЛЬНИЙ ПРОДАЖ",f"{g_sales:.2f}",""])
-            for tn, td in sorted(gt.items()):
-                tv  = td.get("turnover",0.0)
-                vat = td.get("vat",0.0)
-                pr  = td.get("pr","")
-                if tv  != 0: rows.append(["","","",f"ЗАГАЛЬНИЙ ОБІГ ГРУПА {tn} ({pr})",f"{tv:.2f}",""])
-                if vat != 0: rows.append(["","","",f"ЗАГАЛЬНИЙ ПОДАТОК ГРУПА {tn} ({pr})",f"{vat:.2f}",""])
-            rows.append(["","","","ЗАГАЛЬНІ ПОВЕРНЕННЯ",f"{g_ret:.2f}",""])
-            rows.append(["","","","ФІНАЛЬНИЙ БАЛАНС",f"{g_sales-g_ret:.2f}",""])
-
-            pd.DataFrame(rows, columns=["Дата","Час","Номер чека","Найменування","Сума (грн)","Тип операції"]
-                ).to_excel(save_path, index=False)
-
-            wb = load_workbook(save_path)
-            ws = wb.active
-            fills = {
-                "ret":     PatternFill("solid", fgColor="FFCCCC"),
-                "summary": PatternFill("solid", fgColor="FFFACD"),
-                "grand":   PatternFill("solid", fgColor="C6EFCE"),
-                "hdr":     PatternFill("solid", fgColor="1F3864"),
-            }
-            for cell in ws[1]:
-                cell.fill = fills["hdr"]
-                cell.font = Font(bold=True, color="FFFFFF", name="Consolas")
-                cell.alignment = Alignment(horizontal="center")
-
-            for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
-                lbl = str(row[3].value or "")
-                op  = str(row[5].value or "")
-                if op == "Повернення":
-                    for cell in row: cell.fill = fills["ret"]
-                elif any(k in lbl for k in ("ПІДСУМКИ","Обіг","БАЛАНС","Податок","Повернення")):
-                    for cell in row:
-                        cell.fill = fills["summary"]
-                        cell.font = Font(bold="БАЛАНС" in lbl, name="Consolas", size=10)
-                elif any(k in lbl for k in ("ЗАГАЛЬНИЙ","ЗВЕДЕНА","ФІНАЛЬНИЙ")):
-                    for cell in row:
-                        cell.fill = fills["grand"]
-                        cell.font = Font(bold=True, name="Consolas", size=10)
-
-            for i, w in enumerate([12,10,12,50,14,14], 1):
-                ws.column_dimensions[get_column_letter(i)].width = w
-            wb.save(save_path)
+            t = time.perf_counter()
+            if writer is not None:
+                if filtered:
+                    self.log("⚠️ Фільтр діє лише на звіт Excel — таблиці даних записано повністю",
+                             "WARN")
+                writer(self._dataset, save_path)
+            else:
+                # товари й години описують увесь набір даних — з фільтром не пишуться
+                write_xlsx(iter_report_rows(self.sales_data, self.sales_totals_by_date,
+                                            self._tax_rate_map, order), save_path,
+                           products=None if filtered else self._dataset.products.top(None),
+                           hours=None if filtered else self._dataset.hours)
+            sec = time.perf_counter() - t
 
             self._queue.put({"kind": "log", "text": f"💾 Збережено: {save_path}", "level": "OK"})
+            self._queue.put({"kind": "log", "level": "INFO",
+                             "text": f"⏱ export {sec:.2f}с  •  {len(self.sales_data) / sec:,.0f} поз./с"
+                                     if sec > 0 else f"⏱ export {sec:.2f}с"})
             self._queue.put({"kind": "export_done", "path": save_path})
 
         except PermissionError:
-            self._queue.put({"kind": "error", "text": "Файл відкритий у Excel. Закрийте і спробуйте."})
+            self._queue.put({"kind": "export_error",
+                             "text": "Файл відкритий у Excel. Закрийте і спробуйте."})
         except Exception as e:
-            self._queue.put({"kind": "error", "text": f"Помилка експорту: {e}"})
+            self._queue.put({"kind": "export_error", "text": f"Помилка експорту: {e}"})
         finally:
             self._queue.put({"kind": "export_enable"})
 
-
 if __name__ == "__main__":
+    multiprocessing.freeze_support()   # пул процесів у зібраному PyInstaller .exe
     app = SalesParserApp()
     app.mainloop()
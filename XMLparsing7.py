@@ -1,18 +1,16 @@
 import os
-import re
 import zipfile
-import shutil
-import tempfile
-import xml.etree.ElementTree as ET
+from bisect import bisect_right
 import tkinter as tk
+import tkinter.font as tkfont
 from tkinter import filedialog, messagebox
 import customtkinter as ctk
-import pandas as pd
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
-import webbrowser
-import logging
+
+from xmlparsing.aggregate import Partial, parse_stream
+from xmlparsing.archive import iter_xml_members, list_xml_members
+from xmlparsing.report import grand_cents, grand_taxes
+from xmlparsing.store import OP_RETURN, RecordStore
+from xmlparsing.vat import RateTimeline
 
 # ─── DPI масштабування (Windows) ─────────────────────────────────────────────
 # Вмикає чіткий текст на екранах з масштабом 125%, 150%, 200% (4K)
@@ -34,12 +32,6 @@ ctk.set_window_scaling(1.0)
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
-# ─── Карта податкових груп ────────────────────────────────────────────────────
-TAX_MAP = {
-    "1": "А", "2": "Б", "3": "В", "4": "Г",
-    "5": "Д", "6": "Е", "7": "Ж", "8": "З",
-}
-
 # ─── Кольорова палітра ────────────────────────────────────────────────────────
 COLORS = {
     "bg_dark":       "#0F1117",
@@ -59,6 +51,31 @@ COLORS = {
     "row_summary":   "#1A2020",
 }
 
+# ─── Геометрія віртуальної таблиці ────────────────────────────────────────────
+GRID_ROW_H   = 26
+GRID_WIDTHS  = [90, 80, 80, 370, 100, 90]
+GRID_ANCHORS = ["center", "center", "center", "w", "e", "center"]
+
+
+def _grid_text_x():
+    """x-координата і якір тексту кожної колонки (відступи як у заголовку)."""
+    out, x = [], 0
+    for i, (w, anc) in enumerate(zip(GRID_WIDTHS, GRID_ANCHORS)):
+        x += 8 if i == 0 else 2
+        pos = {"w": x, "e": x + w, "center": x + w // 2}[anc]
+        out.append((pos, anc))
+        x += w + 2
+    return out
+
+
+GRID_TEXT_X  = _grid_text_x()
+GRID_TOTAL_W = sum(GRID_WIDTHS) + 8 + 2 * len(GRID_WIDTHS) + 2 * (len(GRID_WIDTHS) - 1)
+
+
+def _open_url(url):
+    import webbrowser   # потрібен лише при кліку на посилання в журналі
+    webbrowser.open_new(url)
+
 
 class SalesParserApp(ctk.CTk):
     def __init__(self):
@@ -69,10 +86,11 @@ class SalesParserApp(ctk.CTk):
         self.minsize(1000, 680)
         self.configure(fg_color=COLORS["bg_dark"])
 
-        self.sales_data = []
+        self._store = RecordStore()   # позиції чеків; рядки форматуються лише при малюванні
+        self._order = range(0)        # індекси позицій store за часом
+        self._day_groups = []         # [(дата, початок, кінець)] — дні в _order
         self.sales_totals_by_date = {}
-        self.temp_dir = None
-        self._tax_rate_map = {}   # {tax_code_str: percent_float}
+        self._tax_rate_map = RateTimeline()   # епохи ставок ПДВ по групах
 
         self._build_ui()
 
@@ -206,7 +224,7 @@ class SalesParserApp(ctk.CTk):
             )
             lbl.pack(side="left", padx=(8 if text == "Дата" else 2, 2))
 
-        # Фрейм зі скролом
+        # Віртуальна сітка: на canvas малюються лише видимі рядки
         table_frame = ctk.CTkFrame(parent, fg_color="transparent", corner_radius=0)
         table_frame.pack(fill="both", expand=True)
 
@@ -216,28 +234,53 @@ class SalesParserApp(ctk.CTk):
             highlightthickness=0,
             bd=0,
         )
-        scrollbar_y = ctk.CTkScrollbar(table_frame, command=self.canvas.yview)
-        scrollbar_y.pack(side="right", fill="y")
+        self.scrollbar_y = ctk.CTkScrollbar(table_frame, command=self._on_yscroll)
+        self.scrollbar_y.pack(side="right", fill="y")
         scrollbar_x = ctk.CTkScrollbar(table_frame, orientation="horizontal", command=self.canvas.xview)
         scrollbar_x.pack(side="bottom", fill="x")
         self.canvas.pack(side="left", fill="both", expand=True)
-        self.canvas.configure(yscrollcommand=scrollbar_y.set, xscrollcommand=scrollbar_x.set)
+        self.canvas.configure(xscrollcommand=scrollbar_x.set)
+
+        self._grid_font      = tkfont.Font(family="Consolas", size=11)
+        self._grid_font_bold = tkfont.Font(family="Consolas", size=11, weight="bold")
+
+        # Модель таблиці — без жодного віджета і без рядка на кожну позицію:
+        # сітка ділиться на сегменти, і позиції днів лише посилаються на _order
+        self._grid_rows  = []   # кортежі значень підсумків (для заголовків — (текст, колір))
+        self._grid_types = []   # "summary" / "grand" / "header"
+        self._grid_segs  = []   # [("rows", j у _grid_rows) або ("items", a у _order)]
+        self._grid_starts = []  # перший рядок сітки кожного сегмента — для bisect
+        self._grid_n     = 0    # усього рядків у сітці
+        self._grid_lines = {}   # {індекс рядка: колір лінії під ним}
+        self._grid_top   = 0    # індекс першого видимого рядка
+        self._grid_slots = []   # перевикористовувані елементи canvas, по слоту на рядок
 
-        self.rows_frame = ctk.CTkFrame(self.canvas, fg_color="transparent")
-        self.canvas_window = self.canvas.create_window((0, 0), window=self.rows_frame, anchor="nw")
-
-        self.rows_frame.bind("<Configure>", self._on_frame_configure)
         self.canvas.bind("<Configure>", self._on_canvas_configure)
         self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
 
-    def _on_frame_configure(self, event):
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-
     def _on_canvas_configure(self, event):
-        self.canvas.itemconfig(self.canvas_window, width=event.width)
+        self._redraw_grid()
 
     def _on_mousewheel(self, event):
-        self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+        self._scroll_grid_to(self._grid_top - 3 * int(event.delta / 120))
+
+    def _on_yscroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self._scroll_grid_to(int(float(amount) * self._grid_n))
+        elif unit == "pages":
+            self._scroll_grid_to(self._grid_top + int(amount) * self._visible_rows())
+        else:
+            self._scroll_grid_to(self._grid_top + int(amount))
+
+    def _visible_rows(self):
+        return max(1, self.canvas.winfo_height() // GRID_ROW_H)
+
+    def _scroll_grid_to(self, top):
+        max_top = max(0, self._grid_n - self._visible_rows())
+        top = min(max(0, top), max_top)
+        if top != self._grid_top:
+            self._grid_top = top
+            self._redraw_grid()
 
     # ─── ПРАВА ПАНЕЛЬ (СТАТИСТИКА) ────────────────────────────────────────────
     def _build_stats_panel(self, parent):
@@ -372,7 +415,7 @@ class SalesParserApp(ctk.CTk):
             url = "http" + parts[1]
             link_tag = f"link_{id(url)}"
             self.log_text.tag_config(link_tag, foreground=COLORS["accent_blue"], underline=True)
-            self.log_text.tag_bind(link_tag, "<Button-1>", lambda e, u=url: webbrowser.open_new(u))
+            self.log_text.tag_bind(link_tag, "<Button-1>", lambda e, u=url: _open_url(u))
             self.log_text.insert("end", url + "\n", link_tag)
         else:
             self.log_text.insert("end", message + "\n", tag)
@@ -385,63 +428,127 @@ class SalesParserApp(ctk.CTk):
     #  РЯДКИ ТАБЛИЦІ
     # ══════════════════════════════════════════════════════════════════════════
     def _add_row(self, values, row_type="normal"):
-        idx = len(self.rows_frame.winfo_children())
-        if row_type == "return":
-            bg = COLORS["row_return"]
-        elif row_type == "summary":
-            bg = COLORS["row_summary"]
-        elif row_type == "grand":
-            bg = "#162020"
-        else:
-            bg = COLORS["row_odd"] if idx % 2 == 0 else COLORS["row_even"]
+        if not self._grid_segs or self._grid_segs[-1][0] != "rows":
+            self._grid_segs.append(("rows", len(self._grid_rows)))
+            self._grid_starts.append(self._grid_n)
+        self._grid_rows.append(values)
+        self._grid_types.append(row_type)
+        self._grid_n += 1
+
+    def _add_items(self, start, end):
+        """Позиції _order[start:end] — один сегмент, рядки не створюються."""
+        if end > start:
+            self._grid_segs.append(("items", start))
+            self._grid_starts.append(self._grid_n)
+            self._grid_n += end - start
 
-        row_frame = ctk.CTkFrame(self.rows_frame, fg_color=bg, corner_radius=0, height=26)
-        row_frame.pack(fill="x")
-        row_frame.pack_propagate(False)
+    def _add_separator(self, color=None):
+        if self._grid_n:
+            self._grid_lines[self._grid_n - 1] = color or COLORS["border"]
 
-        widths = [90, 80, 80, 370, 100, 90]
-        anchors = ["center", "center", "center", "w", "e", "center"]
+    def _add_section_header(self, text, color=None):
+        self._add_row((f"  {text}", color or COLORS["accent_yellow"]), "header")
+
+    def _grid_row(self, i):
+        """(значення, тип) рядка i; позиція форматується прямо зі store."""
+        k = bisect_right(self._grid_starts, i) - 1
+        kind, j = self._grid_segs[k]
+        j += i - self._grid_starts[k]
+        if kind == "rows":
+            return self._grid_rows[j], self._grid_types[j]
+        idx = self._order[j]
+        return (self._store.row(idx),
+                "return" if self._store.op[idx] == OP_RETURN else "normal")
+
+    def _clear_grid(self):
+        self._grid_rows.clear()
+        self._grid_types.clear()
+        self._grid_segs.clear()
+        self._grid_starts.clear()
+        self._grid_n = 0
+        self._grid_lines.clear()
+        self._grid_top = 0
+        self._redraw_grid()
+
+    def _make_grid_slot(self):
+        """Фон, лінія і шість текстових елементів одного видимого рядка."""
+        cv = self.canvas
+        rect = cv.create_rectangle(0, 0, 0, 0, width=0)
+        line = cv.create_line(0, 0, 0, 0, state="hidden")
+        texts = [cv.create_text(0, 0, text="", font=self._grid_font) for _ in GRID_WIDTHS]
+        return rect, line, texts
+
+    def _redraw_grid(self):
+        """Перемальовує лише видимі рядки, перевикористовуючи елементи canvas."""
+        cv     = self.canvas
+        n_vis  = self._visible_rows() + 1
+        width  = max(cv.winfo_width(), GRID_TOTAL_W)
+        while len(self._grid_slots) < n_vis:
+            self._grid_slots.append(self._make_grid_slot())
+
+        total, lines = self._grid_n, self._grid_lines
         text_colors_map = {
             "return":  [COLORS["text_secondary"]] * 5 + [COLORS["accent_red"]],
             "summary": [COLORS["text_secondary"]] * 3 + [COLORS["accent_yellow"], COLORS["accent_green"], COLORS["text_secondary"]],
-            "grand":   ["transparent"] * 3 + [COLORS["accent_purple"], COLORS["accent_green"], "transparent"],
+            "grand":   [COLORS["text_secondary"]] * 3 + [COLORS["accent_purple"], COLORS["accent_green"], COLORS["text_secondary"]],
             "normal":  [COLORS["text_secondary"], COLORS["text_secondary"], COLORS["text_secondary"],
                         COLORS["text_primary"], COLORS["accent_green"], COLORS["text_secondary"]],
         }
-        tc = text_colors_map.get(row_type, text_colors_map["normal"])
-
-        for i, (val, w, anc) in enumerate(zip(values, widths, anchors)):
-            c = tc[i] if tc[i] != "transparent" else COLORS["text_secondary"]
-            lbl = ctk.CTkLabel(
-                row_frame,
-                text=str(val) if val is not None else "",
-                font=ctk.CTkFont(family="Consolas", size=11, weight="bold" if row_type in ("summary", "grand") else "normal"),
-                text_color=c,
-                width=w,
-                anchor=anc,
-            )
-            lbl.pack(side="left", padx=(8 if i == 0 else 2, 2))
-
-        return row_frame
 
-    def _add_separator(self, color=None):
-        ctk.CTkFrame(
-            self.rows_frame,
-            fg_color=color or COLORS["border"],
-            height=1,
-            corner_radius=0,
-        ).pack(fill="x", pady=1)
-
-    def _add_section_header(self, text, color=None):
-        fr = ctk.CTkFrame(self.rows_frame, fg_color=COLORS["bg_card"], corner_radius=4, height=28)
-        fr.pack(fill="x", padx=4, pady=2)
-        fr.pack_propagate(False)
-        ctk.CTkLabel(
-            fr, text=f"  {text}",
-            font=ctk.CTkFont(family="Consolas", size=11, weight="bold"),
-            text_color=color or COLORS["accent_yellow"],
-            anchor="w",
-        ).pack(fill="both", expand=True, padx=6)
+        for k, (rect, line, texts) in enumerate(self._grid_slots):
+            i = self._grid_top + k
+            if k >= n_vis or i >= total:
+                cv.itemconfigure(rect, state="hidden")
+                cv.itemconfigure(line, state="hidden")
+                for t in texts:
+                    cv.itemconfigure(t, state="hidden")
+                continue
+
+            y0, y1   = k * GRID_ROW_H, (k + 1) * GRID_ROW_H
+            values, row_type = self._grid_row(i)
+
+            if row_type == "return":
+                bg = COLORS["row_return"]
+            elif row_type == "summary":
+                bg = COLORS["row_summary"]
+            elif row_type == "grand":
+                bg = "#162020"
+            elif row_type == "header":
+                bg = COLORS["bg_card"]
+            else:
+                bg = COLORS["row_odd"] if i % 2 == 0 else COLORS["row_even"]
+            cv.coords(rect, 0, y0, width, y1)
+            cv.itemconfigure(rect, fill=bg, state="normal")
+
+            if i in lines:
+                cv.coords(line, 0, y1 - 1, width, y1 - 1)
+                cv.itemconfigure(line, fill=lines[i], state="normal")
+            else:
+                cv.itemconfigure(line, state="hidden")
+
+            ym = (y0 + y1) // 2
+            if row_type == "header":
+                text, color = values
+                cv.coords(texts[0], 10, ym)
+                cv.itemconfigure(texts[0], text=text, fill=color, anchor="w",
+                                 font=self._grid_font_bold, state="normal")
+                for t in texts[1:]:
+                    cv.itemconfigure(t, state="hidden")
+                continue
+
+            tc   = text_colors_map.get(row_type, text_colors_map["normal"])
+            font = self._grid_font_bold if row_type in ("summary", "grand") else self._grid_font
+            for c, (t, val) in enumerate(zip(texts, values)):
+                x, anchor = GRID_TEXT_X[c]
+                cv.coords(t, x, ym)
+                cv.itemconfigure(t, text=str(val) if val is not None else "", fill=tc[c],
+                                 anchor=anchor, font=font, state="normal")
+
+        cv.configure(scrollregion=(0, 0, GRID_TOTAL_W, cv.winfo_height()))
+        if total:
+            self.scrollbar_y.set(self._grid_top / total, min(1.0, (self._grid_top + n_vis - 1) / total))
+        else:
+            self.scrollbar_y.set(0.0, 1.0)
 
     # ══════════════════════════════════════════════════════════════════════════
     #  ВИБІР ZIP
@@ -453,17 +560,15 @@ class SalesParserApp(ctk.CTk):
 
         self.clear_data(silent=True)
 
-        self.temp_dir = tempfile.mkdtemp()
         self.log(f"📦 Архів: {os.path.basename(zip_path)}", "INFO")
 
         try:
             with zipfile.ZipFile(zip_path, 'r') as z:
-                z.extractall(self.temp_dir)
+                files = list_xml_members(z)
         except zipfile.BadZipFile:
             messagebox.showerror("Помилка", "ZIP-файл пошкоджено.")
             return
 
-        files = [f for f in os.listdir(self.temp_dir) if f.endswith(".xml")]
         total = len(files)
         if total == 0:
             self.log("❌ XML-файли не знайдено.", "ERROR")
@@ -472,161 +577,46 @@ class SalesParserApp(ctk.CTk):
         self.log(f"🔍 Знайдено {total} XML-файлів. Обробка…", "INFO")
         self.progress.set(0)
 
-        for idx, filename in enumerate(sorted(files), 1):
-            self.parse_file(os.path.join(self.temp_dir, filename))
-            self.progress.set(idx / total)
-            self.progress.update()
-
-        # ── Після парсингу всіх файлів: оновлюємо pr у всіх записах ──────────
-        # TAX_MAP обернений: {"А":"1", "Б":"2", ...} для зворотного пошуку
-        tax_name_to_code = {v: k for k, v in TAX_MAP.items()}
-        for date_data in self.sales_totals_by_date.values():
-            for tax_name, td in date_data["taxes"].items():
-                code = tax_name_to_code.get(tax_name, "")
-                pct  = self._tax_rate_map.get(code, 0.0)
-                td["pr"] = f"{pct:.2f}%"
-                # Перераховуємо VAT з правильною ставкою
-                tv = td["turnover"]
-                td["vat"] = tv * pct / (100 + pct) if pct > 0 else 0.0
+        # XML читаються прямо з архіву, без розпакування в тимчасову теку.
+        # Суми накопичуються в цілих копійках; ПДВ рахується один раз при зведенні
+        part = Partial()
+        try:
+            for idx, (filename, stream) in enumerate(iter_xml_members(zip_path, files), 1):
+                n_err = len(part.errors)
+                parse_stream(stream, os.path.basename(filename), part)
+                for err in part.errors[n_err:]:
+                    self.log(f"❌ {err}", "ERROR")
+                self.progress.set(idx / total)
+                self.progress.update()
+        except Exception as err:
+            messagebox.showerror("Помилка", f"ZIP-файл пошкоджено:\n{err}")
+            return
+
+        self._store      = part.store
+        self._order      = part.store.sorted_order()
+        self._day_groups = part.store.day_spans(self._order)
+        self.sales_totals_by_date = part.day_totals()
+        self._tax_rate_map        = part.rates
 
         self._render_table()
         self._update_stats()
 
-        if self.sales_data:
+        if len(self._store):
             self.btn_export.configure(state="normal")
-            self.log(f"✅ Готово. Чеків: {len(self.sales_data)}", "OK")
+            self.log(f"✅ Готово. Чеків: {len(self._store)}", "OK")
         else:
             self.log("⚠️ Чеків не знайдено.", "WARN")
 
-    # ══════════════════════════════════════════════════════════════════════════
-    #  ПАРСИНГ XML
-    # ══════════════════════════════════════════════════════════════════════════
-    def parse_file(self, filepath):
-        try:
-            with open(filepath, encoding="utf-8") as f:
-                content = f.read()
-
-            dat_blocks = re.findall(r'<DAT.*?</DAT>', content, re.DOTALL)
-
-            for block in dat_blocks:
-                try:
-                    root = ET.fromstring(f"<root>{block}</root>")
-
-                    for c_block in root.findall(".//C"):
-                        check_type   = c_block.attrib.get("T", "0")
-                        is_return    = check_type == "1"
-                        operation    = "Повернення" if is_return else "Продаж"
-
-                        e = c_block.find(".//E")
-                        if e is None:
-                            continue
-
-                        # ── Податкова ставка ──────────────────────────────────
-                        e_tax_code    = e.attrib.get("TX", "")           # "2"
-                        e_tax_percent = float(e.attrib.get("TXPR", 0))   # 7.00
-
-                        # Зберігаємо в глобальну карту ставок
-                        if e_tax_code and e_tax_code not in self._tax_rate_map:
-                            self._tax_rate_map[e_tax_code] = e_tax_percent
-
-                        ts       = e.attrib.get("TS", "")
-                        check_no = e.attrib.get("NO", "")
-
-                        check_total_raw = int(e.attrib.get("SM", 0))
-                        check_total     = abs(check_total_raw) / 100
-
-                        if ts and len(ts) == 14:
-                            date     = f"{ts[:4]}-{ts[4:6]}-{ts[6:8]}"
-                            time_str = f"{ts[8:10]}:{ts[10:12]}:{ts[12:]}"
-                        else:
-                            date     = "Невідомо"
-                            time_str = ""
-
-                        if date not in self.sales_totals_by_date:
-                            self.sales_totals_by_date[date] = {
-                                "Продаж": 0.0, "Повернення": 0.0, "taxes": {}
-                            }
-
-                        self.sales_totals_by_date[date][operation] += check_total
-
-                        # ── Розрахунок оборотів по групах ────────────────────
-                        current_turnover = {}
-
-                        for p in c_block.findall(".//P"):
-                            tx = p.attrib.get("TX", "")
-                            sm = int(p.attrib.get("SM", 0))
-                            current_turnover[tx] = current_turnover.get(tx, 0) + sm
-
-                        for d in c_block.findall(".//D"):
-                            tx = d.attrib.get("TX", "")
-                            sm = int(d.attrib.get("SM", 0))
-                            if tx in current_turnover:
-                                current_turnover[tx] -= sm
-                            else:
-                                current_turnover[tx] = current_turnover.get(tx, 0) - sm
-
-                        # ── Запис у підсумки дня ──────────────────────────────
-                        for tax_code, turnover_cents in current_turnover.items():
-                            if tax_code not in TAX_MAP:
-                                continue
-                            tax_name   = TAX_MAP[tax_code]
-                            turnover_v = abs(turnover_cents) / 100
-
-                            # Беремо ставку з глобальної карти (вже заповнена вище)
-                            tax_pct = self._tax_rate_map.get(tax_code, 0.0)
-                            pr_str  = f"{tax_pct:.2f}%"
-
-                            vat = turnover_v * tax_pct / (100 + tax_pct) if tax_pct > 0 else 0.0
-
-                            taxes = self.sales_totals_by_date[date]["taxes"]
-                            if tax_name not in taxes:
-                                taxes[tax_name] = {
-                                    "turnover": 0.0,
-                                    "vat":      0.0,
-                                    "pr":       pr_str,
-                                }
-                            else:
-                                # Оновлюємо ставку якщо раніше була 0
-                                if taxes[tax_name]["pr"] == "0.00%":
-                                    taxes[tax_name]["pr"] = pr_str
-
-                            sign = -1 if is_return else 1
-                            taxes[tax_name]["turnover"] += sign * turnover_v
-                            taxes[tax_name]["vat"]      += sign * vat
-
-                        # ── Зберігаємо позиції для таблиці ───────────────────
-                        for item in c_block.findall(".//P"):
-                            name   = item.attrib.get("NM", "Без назви")
-                            amount = abs(int(item.attrib.get("SM", 0))) / 100
-                            self.sales_data.append(
-                                (date, time_str, check_no, name, f"{amount:.2f}", operation)
-                            )
-
-                except ET.ParseError as err:
-                    self.log(f"❌ XML parse error: {err}", "ERROR")
-
-        except Exception as err:
-            self.log(f"❌ Помилка читання файлу: {err}", "ERROR")
-
     # ══════════════════════════════════════════════════════════════════════════
     #  РЕНДЕР ТАБЛИЦІ
     # ══════════════════════════════════════════════════════════════════════════
     def _render_table(self):
-        for w in self.rows_frame.winfo_children():
-            w.destroy()
+        self._clear_grid()
 
-        df = pd.DataFrame(
-            self.sales_data,
-            columns=["Дата", "Час", "Номер чека", "Найменування", "Сума (грн)", "Тип операції"],
-        ).sort_values(by=["Дата", "Час"])
-
-        for date, group in df.groupby("Дата"):
+        for date, start, end in self._day_groups:
             self._add_section_header(f"📅  {date}", COLORS["accent_blue"])
 
-            for _, row in group.iterrows():
-                rtype = "return" if row["Тип операції"] == "Повернення" else "normal"
-                self._add_row(list(row), row_type=rtype)
-
+            self._add_items(start, end)
             self._add_separator()
 
             totals = self.sales_totals_by_date.get(date, {})
@@ -653,8 +643,7 @@ class SalesParserApp(ctk.CTk):
         # ── ЗВЕДЕНА ТАБЛИЦЯ ───────────────────────────────────────────────────
         self._add_section_header("▓▓  ЗВЕДЕНА ТАБЛИЦЯ ЗА ВЕСЬ ПЕРІОД  ▓▓", COLORS["accent_purple"])
 
-        grand_sales   = sum(v.get("Продаж", 0)    for v in self.sales_totals_by_date.values())
-        grand_returns = sum(v.get("Повернення", 0) for v in self.sales_totals_by_date.values())
+        grand_sales, grand_returns = self._calc_grand_sales()
         grand_taxes   = self._calc_grand_taxes()
 
         self._add_row(["", "", "", "ЗАГАЛЬНИЙ ПРОДАЖ", f"{grand_sales:.2f}", ""], "grand")
@@ -671,37 +660,27 @@ class SalesParserApp(ctk.CTk):
         self._add_row(["", "", "", "ЗАГАЛЬНІ ПОВЕРНЕННЯ", f"{grand_returns:.2f}", ""], "grand")
         self._add_row(["", "", "", "ФІНАЛЬНИЙ БАЛАНС", f"{(grand_sales - grand_returns):.2f}", ""], "grand")
 
+        self._redraw_grid()
+
     # ══════════════════════════════════════════════════════════════════════════
-    #  HELPER: ЗВЕДЕНІ ПОДАТКИ (завжди з актуальними ставками з _tax_rate_map)
+    #  HELPER: ЗВЕДЕНІ ПОДАТКИ (сума ПДВ днів, порахованого за епохами ставок)
     # ══════════════════════════════════════════════════════════════════════════
+    def _calc_grand_sales(self):
+        """(продаж, повернення) за весь період — сума цілих копійок днів."""
+        sales, returns = grand_cents(self.sales_totals_by_date)
+        return sales / 100, returns / 100
+
     def _calc_grand_taxes(self):
-        """Підсумовує обороти і ПДВ по всіх днях.
-        Ставку ЗАВЖДИ бере з self._tax_rate_map (не з збереженого pr),
-        щоб уникнути "0.00%" якщо pr було записано до заповнення карти ставок."""
-        tax_name_to_code = {v: k for k, v in TAX_MAP.items()}
-        grand = {}
-        for day_data in self.sales_totals_by_date.values():
-            for tax_char, td in day_data.get("taxes", {}).items():
-                code = tax_name_to_code.get(tax_char, "")
-                pct  = self._tax_rate_map.get(code, 0.0)
-                pr   = f"{pct:.2f}%"
-                tv   = td.get("turnover", 0.0)
-                vat  = tv * pct / (100 + pct) if pct > 0 else 0.0
-                if tax_char not in grand:
-                    grand[tax_char] = {"turnover": 0.0, "vat": 0.0, "pr": pr}
-                grand[tax_char]["turnover"] += tv
-                grand[tax_char]["vat"]      += vat
-                grand[tax_char]["pr"]        = pr   # завжди актуальна ставка
-        return grand
+        """Підсумовує обороти і ПДВ по всіх днях; pr — усі ставки групи за період."""
+        return grand_taxes(self.sales_totals_by_date, self._tax_rate_map)
 
     # ══════════════════════════════════════════════════════════════════════════
     #  СТАТИСТИКА (ПРАВА ПАНЕЛЬ)
     # ══════════════════════════════════════════════════════════════════════════
     def _update_stats(self):
-        total_sales   = sum(v.get("Продаж", 0)    for v in self.sales_totals_by_date.values())
-        total_returns = sum(v.get("Повернення", 0) for v in self.sales_totals_by_date.values())
+        total_sales, total_returns = self._calc_grand_sales()
         net           = total_sales - total_returns
-        checks        = len(set((r[0], r[2]) for r in self.sales_data))
+        checks        = self._store.count_checks()
         days          = len(self.sales_totals_by_date)
 
         self._stat_labels["total_checks"].configure( text=f"{checks}")
@@ -748,12 +727,13 @@ class SalesParserApp(ctk.CTk):
     #  ОЧИЩЕННЯ
     # ══════════════════════════════════════════════════════════════════════════
     def clear_data(self, silent=False):
-        self.sales_data.clear()
+        self._store = RecordStore()
+        self._order = range(0)
+        self._day_groups.clear()
         self.sales_totals_by_date.clear()
-        self._tax_rate_map.clear()
+        self._tax_rate_map = RateTimeline()
 
-        for w in self.rows_frame.winfo_children():
-            w.destroy()
+        self._clear_grid()
 
         for key, lbl in self._stat_labels.items():
             lbl.configure(text="—")
@@ -772,7 +752,7 @@ class SalesParserApp(ctk.CTk):
     #  ЕКСПОРТ В EXCEL
     # ══════════════════════════════════════════════════════════════════════════
     def export_to_excel(self):
-        if not self.sales_data:
+        if not len(self._store):
             return
 
         save_path = filedialog.asksaveasfilename(
@@ -782,17 +762,16 @@ class SalesParserApp(ctk.CTk):
         if not save_path:
             return
 
-        df = pd.DataFrame(
-            self.sales_data,
-            columns=["Дата", "Час", "Номер чека", "Найменування", "Сума (грн)", "Тип операції"],
-        ).sort_values(by=["Дата", "Час"])
+        # openpyxl потрібен лише тут — не затримує старт вікна
+        from openpyxl import Workbook
+        from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
+        from openpyxl.utils import get_column_letter
 
-        grand_sales   = 0.0
-        grand_returns = 0.0
+        grand_sales, grand_returns = self._calc_grand_sales()
         output_rows   = []
 
-        for date, group in df.groupby("Дата"):
-            output_rows.extend(group.values.tolist())
+        for date, start, end in self._day_groups:
+            output_rows.extend(list(self._store.row(i)) for i in self._order[start:end])
 
             totals        = self.sales_totals_by_date.get(date, {})
             total_sales   = totals.get("Продаж", 0)
@@ -800,9 +779,6 @@ class SalesParserApp(ctk.CTk):
             balance       = total_sales - total_returns
             taxes         = totals.get("taxes", {})
 
-            grand_sales   += total_sales
-            grand_returns += total_returns
-
             output_rows.append(["", "", "", f"--- ПІДСУМКИ ДНЯ {date} ---", "", ""])
             output_rows.append(["", "", "", "Загальний обіг (Продаж)", f"{total_sales:.2f}", ""])
 
@@ -819,7 +795,7 @@ class SalesParserApp(ctk.CTk):
             output_rows.append(["", "", "", "ЧИСТИЙ БАЛАНС", f"{balance:.2f}", ""])
             output_rows.append(["", "", "", "", "", ""])
 
-        # Зведена таблиця — використовуємо _calc_grand_taxes для актуальних ставок
+        # Зведена таблиця — ПДВ днів уже пораховано за епохами ставок
         grand_taxes = self._calc_grand_taxes()
         output_rows.append(["", "", "", "ЗВЕДЕНА ТАБЛИЦЯ ЗА ВЕСЬ ПЕРІОД", "", ""])
         output_rows.append(["", "", "", "ЗАГАЛЬНИЙ ПРОДАЖ", f"{grand_sales:.2f}", ""])
@@ -836,20 +812,13 @@ class SalesParserApp(ctk.CTk):
         output_rows.append(["", "", "", "ЗАГАЛЬНІ ПОВЕРНЕННЯ",       f"{grand_returns:.2f}", ""])
         output_rows.append(["", "", "", "ФІНАЛЬНИЙ БАЛАНС", f"{(grand_sales - grand_returns):.2f}", ""])
 
-        export_df = pd.DataFrame(
-            output_rows,
-            columns=["Дата", "Час", "Номер чека", "Найменування", "Сума (грн)", "Тип операції"],
-        )
-
-        try:
-            export_df.to_excel(save_path, index=False)
-        except PermissionError:
-            messagebox.showerror("Помилка", "Файл відкритий. Закрийте Excel і спробуйте знову.")
-            return
+        wb = Workbook()
+        ws = wb.active
+        ws.append(["Дата", "Час", "Номер чека", "Найменування", "Сума (грн)", "Тип операції"])
+        for r in output_rows:
+            ws.append(r)
 
         # ── Форматування Excel ────────────────────────────────────────────────
-        wb = load_workbook(save_path)
-        ws = wb.active
 
         # Стилі заливок
         fills = {
@@ -888,7 +857,11 @@ class SalesParserApp(ctk.CTk):
         for i, w in enumerate(col_widths, 1):
             ws.column_dimensions[get_column_letter(i)].width = w
 
-        wb.save(save_path)
+        try:
+            wb.save(save_path)
+        except PermissionError:
+            messagebox.showerror("Помилка", "Файл відкритий. Закрийте Excel і спробуйте знову.")
+            return
         self.log(f"💾 Збережено: {save_path}", "OK")
 
         if messagebox.askyesno("Готово", "Файл збережено. Відкрити зараз?"):
@@ -897,15 +870,6 @@ class SalesParserApp(ctk.CTk):
             except Exception:
                 messagebox.showwarning("Увага", "Не вдалося відкрити файл автоматично.")
 
-        if self.temp_dir and os.path.exists(self.temp_dir):
-            if messagebox.askyesno("Очищення", "Видалити тимчасові файли?"):
-                try:
-                    shutil.rmtree(self.temp_dir)
-                    self.log("🧹 Тимчасові файли видалено.", "OK")
-                    self.temp_dir = None
-                except Exception as err:
-                    messagebox.showwarning("Увага", f"Не вдалося видалити:\n{err}")
-
 
 # ─── ЗАПУСК ───────────────────────────────────────────────────────────────────
 if __name__ == "__main__":
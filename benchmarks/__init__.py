@@ -0,0 +1 @@
+"""Бенчмарки: генератор синтетичних архівів, етапи парсера і холодний старт."""
@@ -0,0 +1,219 @@
+"""Вимірювання етапів обробки на синтетичних архівах.
+
+    python -m benchmarks.run                          # 1k / 100k / 1M чеків
+    python -m benchmarks.run --sizes 1000,20000 --export csv,xlsx -o new.json
+    python -m benchmarks.run --compare old.json -o new.json
+
+Етапи рахуються окремо для кожного файлу архіву й підсумовуються:
+unzip (розпакування в пам'ять), parse (expat → Check), aggregate
+(Partial.add_check і підсумки днів), table (модель таблиці XMLparsing2026:
+сортування позицій і межі днів), export (кожен формат з --export).
+З --legacy додатково міряється колишній розбір regex + ElementTree.
+Результати — JSON; --compare друкує відношення до попереднього запуску.
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+
+from xmlparsing.aggregate import Partial
+from xmlparsing.archive import iter_xml_members, list_xml_members
+from xmlparsing.columnar import DATA_WRITERS
+from xmlparsing.engine import iter_checks
+from xmlparsing.report import WRITERS, iter_report_rows
+
+from .synth import make_archive
+
+DEFAULT_SIZES  = (1000, 100000, 1000000)
+DEFAULT_EXPORT = ("csv", "xlsx")
+CHECKS_PER_FILE = 2000
+
+
+def _legacy_parse(data):
+    """Розбір, яким користувались до expat: regex по <DAT> + ElementTree."""
+    n = 0
+    for block in re.findall(r"<DAT.*?</DAT>", data.decode("utf-8"), re.DOTALL):
+        root = ET.fromstring(f"<root>{block}</root>")
+        for c in root.findall(".//C"):
+            e = c.find(".//E")
+            if e is None:
+                continue
+            trn = {}
+            for p in c.findall(".//P"):
+                tx = p.attrib.get("TX", "")
+                trn[tx] = trn.get(tx, 0) + int(p.attrib.get("SM", 0))
+            for d in c.findall(".//D"):
+                tx = d.attrib.get("TX", "")
+                trn[tx] = trn.get(tx, 0) - int(d.attrib.get("SM", 0))
+            [(p.attrib.get("NM", "Без назви"), abs(int(p.attrib.get("SM", 0))), p.attrib.get("TX", ""))
+             for p in c.findall(".//P")]
+            (e.attrib.get("TS", ""), e.attrib.get("NO", ""), abs(int(e.attrib.get("SM", 0))),
+             e.attrib.get("TX", ""), float(e.attrib.get("TXPR", 0)))
+            n += 1
+    return n
+
+
+def _export(fmt, part, path):
+    if fmt in DATA_WRITERS:
+        DATA_WRITERS[fmt](part, path)
+    else:
+        WRITERS[fmt](iter_report_rows(part.store, part.day_totals(), part.rates), path)
+
+
+def bench_size(checks, workdir, export=DEFAULT_EXPORT, legacy=False, seed=1):
+    files = max(1, checks // CHECKS_PER_FILE)
+    zpath = os.path.join(workdir, f"synth_{checks}.zip")
+    t = time.perf_counter()
+    n_checks, xml_bytes = make_archive(zpath, checks, files, seed=seed)
+    gen_s = time.perf_counter() - t
+
+    with zipfile.ZipFile(zpath) as z:
+        names = list_xml_members(z)
+
+    stages = dict.fromkeys(("unzip", "parse", "aggregate", "table"), 0.0)
+    if legacy:
+        stages["parse_legacy"] = 0.0
+    part   = Partial()
+    add    = part.add_check
+    stream = iter(iter_xml_members(zpath, names, workers=1))
+    while True:
+        t0 = time.perf_counter()
+        try:
+            _name, member = next(stream)
+        except StopIteration:
+            break
+        data = member.read()
+        t1 = time.perf_counter()
+        batch = list(iter_checks(io.BytesIO(data)))
+        t2 = time.perf_counter()
+        for c in batch:
+            add(c)
+        t3 = time.perf_counter()
+        stages["unzip"]     += t1 - t0
+        stages["parse"]     += t2 - t1
+        stages["aggregate"] += t3 - t2
+        if legacy:
+            t = time.perf_counter()
+            _legacy_parse(data)
+            stages["parse_legacy"] += time.perf_counter() - t
+
+    t = time.perf_counter()
+    part.day_totals()
+    _ = part.stats.checks
+    stages["aggregate"] += time.perf_counter() - t
+
+    t = time.perf_counter()
+    order = part.store.sorted_order()
+    part.store.day_spans(order)
+    stages["table"] = time.perf_counter() - t
+
+    for fmt in export:
+        path = os.path.join(workdir, f"out_{checks}.{fmt.replace('-', '_')}")
+        t = time.perf_counter()
+        try:
+            _export(fmt, part, path)
+        except ImportError as err:
+            print(f"⚠️ {fmt}: {err}", file=sys.stderr)
+            continue
+        stages[f"export_{fmt}"] = time.perf_counter() - t
+
+    items = len(part.store)
+    return {
+        "checks":    n_checks,
+        "files":     len(names),
+        "items":     items,
+        "xml_bytes": xml_bytes,
+        "generate_s": round(gen_s, 4),
+        "stages":    {k: round(v, 4) for k, v in stages.items()},
+        "rates": {
+            "parse_mb_per_s":     round(xml_bytes / 1e6 / stages["parse"], 2) if stages["parse"] else None,
+            "parse_checks_per_s": round(n_checks / stages["parse"]) if stages["parse"] else None,
+            "items_per_s":        round(items / (stages["parse"] + stages["aggregate"]))
+                                  if items else None,
+        },
+    }
+
+
+def _git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=os.path.dirname(__file__), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(base, new):
+    """Друкує відношення час_нового / час_базового для спільних розмірів і етапів."""
+    old = {r["checks"]: r["stages"] for r in base.get("runs", [])}
+    for run in new["runs"]:
+        prev = old.get(run["checks"])
+        if not prev:
+            continue
+        print(f"── {run['checks']:,} чеків (база {base['meta'].get('git') or '?'}) ──")
+        for stage, sec in run["stages"].items():
+            if prev.get(stage):
+                ratio = sec / prev[stage]
+                mark  = "🐢" if ratio > 1.1 else ("🚀" if ratio < 0.9 else "  ")
+                print(f"  {mark} {stage:<16} {prev[stage]:>9.3f}s → {sec:>9.3f}s  ×{ratio:.2f}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="benchmarks.run", description="Бенчмарк етапів парсера")
+    ap.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                    help="кількості чеків через кому")
+    ap.add_argument("--export", default=",".join(DEFAULT_EXPORT),
+                    help=f"формати експорту через кому ({', '.join(sorted(WRITERS) + sorted(DATA_WRITERS))}); "
+                         "порожньо — без експорту")
+    ap.add_argument("--legacy", action="store_true", help="міряти й старий розбір regex + ElementTree")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("-o", "--output", default="bench_results.json")
+    ap.add_argument("--compare", help="JSON попереднього запуску для порівняння")
+    ap.add_argument("--workdir", help="тека для архівів і експорту (за замовчуванням — тимчасова)")
+    args = ap.parse_args(argv)
+
+    sizes  = [int(s) for s in args.sizes.split(",") if s]
+    export = [f for f in args.export.split(",") if f]
+    for f in export:
+        if f not in WRITERS and f not in DATA_WRITERS:
+            ap.error(f"невідомий формат: {f}")
+
+    result = {
+        "meta": {
+            "date":     datetime.datetime.now().isoformat(timespec="seconds"),
+            "git":      _git_rev(),
+            "python":   platform.python_version(),
+            "platform": platform.platform(),
+            "cpus":     os.cpu_count(),
+        },
+        "runs": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        for n in sizes:
+            print(f"⏱ {n:,} чеків…", file=sys.stderr)
+            run = bench_size(n, workdir, export, args.legacy, args.seed)
+            result["runs"].append(run)
+            print("   " + "  ".join(f"{k} {v:.3f}s" for k, v in run["stages"].items()),
+                  file=sys.stderr)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"💾 {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
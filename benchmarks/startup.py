@@ -0,0 +1,138 @@
+"""Час холодного старту: інтерпретатор, ядро, CLI і вікно GUI.
+
+    python -m benchmarks.startup                        # 5 запусків кожної цілі
+    python -m benchmarks.startup -n 10 -o new.json --compare startup_results.json
+
+Кожна ціль — окремий процес Python, тож модулі не переносяться між
+вимірами (кеш ОС і .pyc — як у звичайному запуску). Цілі gui_window і
+gui7_window створюють вікно XMLparsing2026 / XMLparsing7, чекають першої
+перемальовки і закриваються; без дисплея чи customtkinter вони
+пропускаються. Для кожної цілі
+записується, які з важких модулів (HEAVY) встигли імпортуватись —
+під час старту їх не має бути.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from .run import _git_rev
+
+ROOT  = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("pandas", "openpyxl", "pyarrow")
+
+TARGETS = {
+    "python":     "pass",
+    "core":       "import xmlparsing.aggregate, xmlparsing.parallel, xmlparsing.report, "
+                  "xmlparsing.columnar",
+    "cli":        "import xmlparsing.cli",
+    "gui_window": "import XMLparsing2026 as m\n"
+                  "app = m.SalesParserApp()\n"
+                  "app.update()\n"
+                  "app.destroy()",
+    "gui7_window": "import XMLparsing7 as m\n"
+                   "app = m.SalesParserApp()\n"
+                   "app.update()\n"
+                   "app.destroy()",
+    # довідково: скільки коштує імпорт, якого більше немає на старті
+    "openpyxl":   "import openpyxl",
+    "pandas":     "import pandas",
+}
+
+
+def _probe(code):
+    """Код цілі + рядок зі списком уже імпортованих важких модулів."""
+    return (f"{code}\nimport sys\n"
+            f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))")
+
+
+def bench_target(code, repeat):
+    """{"median_s", "min_s", "runs", "heavy_loaded"} або {"error"}."""
+    times = []
+    heavy = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        try:
+            res = subprocess.run([sys.executable, "-c", _probe(code)], cwd=ROOT,
+                                 capture_output=True, text=True, timeout=120)
+        except subprocess.TimeoutExpired:
+            return {"error": "timeout"}
+        sec = time.perf_counter() - t
+        if res.returncode != 0:
+            lines = res.stderr.strip().splitlines()
+            return {"error": lines[-1] if lines else f"код {res.returncode}"}
+        times.append(sec)
+        out   = res.stdout.strip().splitlines()
+        heavy = [m for m in out[-1].split(",") if m] if out else []
+    return {
+        "median_s":     round(statistics.median(times), 4),
+        "min_s":        round(min(times), 4),
+        "runs":         len(times),
+        "heavy_loaded": heavy,
+    }
+
+
+def compare(base, new):
+    """Друкує відношення медіан нового запуску до базового."""
+    old = base.get("targets", {})
+    print(f"── старт (база {base['meta'].get('git') or '?'}) ──")
+    for name, r in new["targets"].items():
+        prev = old.get(name, {})
+        if r.get("median_s") and prev.get("median_s"):
+            ratio = r["median_s"] / prev["median_s"]
+            mark  = "🐢" if ratio > 1.1 else ("🚀" if ratio < 0.9 else "  ")
+            print(f"  {mark} {name:<12} {prev['median_s']:>7.3f}s → {r['median_s']:>7.3f}s"
+                  f"  ×{ratio:.2f}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="benchmarks.startup", description="Бенчмарк холодного старту")
+    ap.add_argument("-n", "--repeat", type=int, default=5, help="запусків на ціль")
+    ap.add_argument("--targets", default=",".join(TARGETS),
+                    help=f"цілі через кому ({', '.join(TARGETS)})")
+    ap.add_argument("-o", "--output", default="startup_results.json")
+    ap.add_argument("--compare", help="JSON попереднього запуску для порівняння")
+    args = ap.parse_args(argv)
+
+    names = [t for t in args.targets.split(",") if t]
+    for t in names:
+        if t not in TARGETS:
+            ap.error(f"невідома ціль: {t}")
+
+    result = {
+        "meta": {
+            "date":     datetime.datetime.now().isoformat(timespec="seconds"),
+            "git":      _git_rev(),
+            "python":   platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "targets": {},
+    }
+    for name in names:
+        r = bench_target(TARGETS[name], args.repeat)
+        result["targets"][name] = r
+        if "error" in r:
+            print(f"⚠️ {name:<12} пропущено: {r['error']}", file=sys.stderr)
+            continue
+        heavy = (f"  ⚠️ імпортовано: {', '.join(r['heavy_loaded'])}"
+                 if r["heavy_loaded"] and name not in HEAVY else "")
+        print(f"⏱ {name:<12} медіана {r['median_s']:.3f}s  мін {r['min_s']:.3f}s{heavy}",
+              file=sys.stderr)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"💾 {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Генератор синтетичних ZIP-архівів у форматі експорту Марія-304Т3.
+
+Кожен XML-файл — послідовність блоків <DAT> (по чеку в блоці, як у
+реальних вивантаженнях) з позиціями <P>, знижками <D>, оплатою <M> і
+підсумком <E>. Генерація детермінована за seed і пише файли в архів
+потоково, тож мільйон чеків не тримається в пам'яті.
+
+    python -m benchmarks.synth out.zip --checks 100000 --files 50
+"""
+import argparse
+import random
+import zipfile
+from xml.sax.saxutils import quoteattr
+
+GOODS = [
+    "Хліб білий", "Батон нарізний", "Молоко 2,5%", "Кефір 1%", "Сир твердий",
+    "Масло вершкове", "Яйця С1", "Цукор", "Борошно в/г", "Олія соняшникова",
+    "Кава мелена", "Чай чорний", "Шоколад молочний", "Печиво \"Марія\"",
+    "Вода мінеральна", "Сік яблучний", "Ковбаса варена", "Сосиски", "Гречка",
+    "Рис", "Макарони", "Банани", "Яблука", "Картопля", "Цибуля", "Пакет",
+    "Мило & шампунь", "Зубна паста", "Серветки", "Батарейки АА",
+]
+
+# (код групи, ставка TXPR) — А 20%, Б 7%, В без ПДВ
+TAX_GROUPS = [("1", "20.00"), ("2", "7.00"), ("3", "0.00")]
+
+
+def iter_file_xml(rng, n_checks, first_no, day, fn, return_ratio=0.05,
+                  discount_ratio=0.15, max_items=6):
+    """Генерує шматки XML одного файлу (bytes) для n_checks чеків."""
+    yield b'<?xml version="1.0" encoding="UTF-8"?>\n<RQ V="1">\n'
+    zn = f"ПБ{fn[-6:]}"
+    secs = sorted(rng.randrange(8 * 3600, 22 * 3600) for _ in range(n_checks))
+    for k, sec in enumerate(secs):
+        no  = first_no + k
+        ts  = f"{day}{sec // 3600:02d}{sec // 60 % 60:02d}{sec % 60:02d}"
+        ret = rng.random() < return_ratio
+        out = [f'<DAT DI="{no}" DT="0" FN="{fn}" TN="ПН 1234567890" V="1" ZN="{zn}">',
+               f'<C T="{1 if ret else 0}">']
+        total = 0
+        tx    = "1"
+        for i in range(1, rng.randint(1, max_items) + 1):
+            qty = rng.randint(1, 3)
+            prc = rng.randint(500, 30000)
+            sm  = qty * prc
+            tx  = rng.choice(TAX_GROUPS)[0]
+            nm  = quoteattr(rng.choice(GOODS))
+            out.append(f'<P N="{i}" C="{rng.randint(1, 9999)}" CD="{rng.randint(10**12, 10**13)}" '
+                       f'NM={nm} SM="{sm}" Q="{qty * 1000}" PRC="{prc}" TX="{tx}"/>')
+            total += sm
+            if rng.random() < discount_ratio:
+                ds = sm * rng.randint(1, 10) // 100
+                out.append(f'<D N="{i}" TR="0" TY="0" PR="{ds}" SM="{ds}" TX="{tx}"/>')
+                total -= ds
+        txpr = dict(TAX_GROUPS)[tx]
+        out.append(f'<M N="1" T="{rng.choice("02")}" SM="{total}"/>')
+        out.append(f'<E N="{no}" NO="{no}" SM="{total}" TX="{tx}" TXPR="{txpr}" TS="{ts}"/>')
+        out.append(f'</C><TS>{ts}</TS></DAT>\n')
+        yield "".join(out).encode("utf-8")
+    yield b"</RQ>\n"
+
+
+def make_archive(path, checks=1000, files=10, return_ratio=0.05,
+                 discount_ratio=0.15, max_items=6, days=7, seed=1):
+    """Пише архів і повертає (кількість чеків, розмір XML у байтах)."""
+    rng   = random.Random(seed)
+    per   = max(1, checks // files)
+    done  = 0
+    size  = 0
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as z:
+        for f in range(files):
+            n = per if f < files - 1 else checks - done
+            if n <= 0:
+                break
+            day = f"202501{1 + f * days // files:02d}"
+            fn  = f"40000{1 + f % 3:05d}"
+            with z.open(f"export/{day}_{f:04d}.xml", "w") as out:
+                for chunk in iter_file_xml(rng, n, done + 1, day, fn, return_ratio,
+                                           discount_ratio, max_items):
+                    out.write(chunk)
+                    size += len(chunk)
+            done += n
+    return done, size
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Синтетичний архів Марія-304Т3")
+    ap.add_argument("output")
+    ap.add_argument("--checks", type=int, default=1000)
+    ap.add_argument("--files", type=int, default=10)
+    ap.add_argument("--returns", type=float, default=0.05, help="частка чеків повернення")
+    ap.add_argument("--discounts", type=float, default=0.15, help="частка позицій зі знижкою")
+    ap.add_argument("--max-items", type=int, default=6)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+    n, size = make_archive(args.output, args.checks, args.files, args.returns,
+                           args.discounts, args.max_items, seed=args.seed)
+    print(f"{args.output}: чеків {n:,}, XML {size / 1e6:.1f} МБ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Спільні фікстури: синтетичні архіви (benchmarks.synth) і знімок звіту."""
+import os
+import zipfile
+
+import pytest
+
+from benchmarks.synth import make_archive
+from xmlparsing.archive import list_xml_members
+from xmlparsing.columnar import iter_summary_rows
+from xmlparsing.report import iter_report_rows
+
+
+def members(path):
+    with zipfile.ZipFile(path) as z:
+        return list_xml_members(z)
+
+
+def snapshot(part):
+    """Усе, що бачить користувач: рядки звіту, таблиці днів і груп, статистика."""
+    st = part.stats
+    return (list(iter_report_rows(part.store, part.day_totals(), part.rates)),
+            iter_summary_rows(part),
+            (st.sales, st.returns, st.checks, st.days, sorted(st.taxes.items())))
+
+
+def with_repeated_file(src, dst):
+    """Копія архіву, де перший XML лежить двічі — чеки всередині архіву повторюються."""
+    with zipfile.ZipFile(src) as z, zipfile.ZipFile(dst, "w", zipfile.ZIP_DEFLATED) as out:
+        names = list_xml_members(z)
+        for name in names:
+            out.writestr(name, z.read(name))
+        out.writestr("zz_copy.xml", z.read(names[0]))
+    return dst
+
+
+@pytest.fixture
+def archive(tmp_path):
+    """Архів на 600 чеків у 6 файлах від трьох РРО."""
+    path = os.fspath(tmp_path / "syn.zip")
+    make_archive(path, checks=600, files=6, days=3, seed=7)
+    return path
@@ -0,0 +1,92 @@
+"""Підсумки Partial: не залежать від поділу чеків на вікна, номери чеків — як є."""
+import io
+
+import pytest
+
+import xmlparsing.aggregate as aggregate
+from xmlparsing.dedup import CheckIndex
+from xmlparsing.parallel import parse_archive
+
+from conftest import members, snapshot, with_repeated_file
+
+
+def _hours(part):
+    return list(part.hours.rows())
+
+
+def test_aggregation_spans_several_blocks(archive, monkeypatch):
+    names = members(archive)
+    whole = parse_archive(archive, names)
+    expected = snapshot(whole), _hours(whole)
+
+    monkeypatch.setattr(aggregate, "AGG_BLOCK", 7)
+    part = parse_archive(archive, names)
+    assert len(part.checks) > 7 * 10
+    assert (snapshot(part), _hours(part)) == expected
+
+
+def test_incremental_aggregation_across_blocks(archive, monkeypatch):
+    names = members(archive)
+    expected = snapshot(parse_archive(archive, names))
+
+    monkeypatch.setattr(aggregate, "AGG_BLOCK", 5)
+    part = parse_archive(archive, names[:2])
+    part.day_totals()           # вікна першої порції вже пораховано
+    part.merge(parse_archive(archive, names[2:]))
+    assert snapshot(part) == expected
+
+
+NOS = ("00123", "123", "", "ABC", "12345678901")
+
+
+def _odd_numbers():
+    xml = b"".join(
+        b'<DAT FN="1"><C T="0"><P NM="X" SM="100" TX="1"/>'
+        b'<E TS="20240101120000" NO="%s" SM="100" TX="1" TXPR="20"/></C></DAT>' % no.encode()
+        for no in NOS)
+    return aggregate.parse_stream(io.BytesIO(xml), "odd.xml")
+
+
+def test_check_numbers_are_kept_as_text():
+    part = _odd_numbers()
+    assert part.stats.checks == len(NOS)
+    assert [part.store.row(i)[2] for i in range(len(part.store))] == list(NOS)
+
+
+def test_dedup_tells_text_numbers_apart():
+    index = CheckIndex()
+    part = aggregate.Partial()
+    assert part.merge_new(_odd_numbers(), index) == 0
+    # повторний архів: відкидаються всі, крім чека без номера
+    assert part.merge_new(_odd_numbers(), index) == len(NOS) - 1
+    assert part.stats.checks == len(NOS)
+
+
+def test_products_are_net_and_follow_windows(archive, monkeypatch):
+    names = members(archive)
+    whole = parse_archive(archive, names)
+    ranked = whole.products.top(None)
+    st, store = whole.stats, whole.store
+    assert sum(r.revenue for r in ranked) == sum(
+        a - d for a, d, op in zip(store.amount, store.disc, store.op) if not op)
+    assert sum(r.share for r in ranked) == pytest.approx(
+        sum(r.revenue for r in ranked) * 100 / st.sales)
+
+    monkeypatch.setattr(aggregate, "AGG_BLOCK", 5)
+    part = parse_archive(archive, names[:2])
+    part.products.top()         # товари першої порції вже пораховано
+    part.merge(parse_archive(archive, names[2:]))
+    assert part.products.top(None) == ranked
+
+
+def test_dedup_keeps_repeats_inside_one_archive(archive, tmp_path):
+    path  = with_repeated_file(archive, tmp_path / "twice.zip")
+    whole = parse_archive(path, members(path))
+    index = CheckIndex()
+    part  = aggregate.Partial()
+    # відкриття, «Додати» і parse --dedup: повтори в межах архіву — не дублікати
+    assert part.merge_new(parse_archive(path, members(path)), index) == 0
+    assert snapshot(part) == snapshot(whole)
+    # а той самий архів удруге відкидається цілком
+    assert part.merge_new(parse_archive(path, members(path)), index) == len(whole.checks)
+    assert snapshot(part) == snapshot(whole)
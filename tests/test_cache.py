@@ -0,0 +1,48 @@
+"""Дисковий кеш: повторний розбір береться з кешу, зміни його інвалідовують."""
+import io
+import zipfile
+
+import xmlparsing.cache as cache_mod
+from xmlparsing.cache import ResultCache
+from xmlparsing.parallel import parse_archive
+
+from conftest import members, snapshot
+
+
+def test_cache_hit_gives_same_result(archive, tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    names = members(archive)
+    first  = parse_archive(archive, names, cache=cache)
+    second = parse_archive(archive, names, cache=cache)
+    pooled = parse_archive(archive, names, workers=2, cache=cache)
+    assert first.cached == 0
+    assert second.cached == len(names)
+    assert pooled.cached == len(names)
+    assert snapshot(second) == snapshot(first)
+    assert snapshot(pooled) == snapshot(first)
+
+
+def test_key_depends_on_content_and_parser_version(archive, monkeypatch):
+    with zipfile.ZipFile(archive) as z:
+        data = z.read(members(archive)[0])
+    key = ResultCache.key(io.BytesIO(data))
+    assert ResultCache.key(io.BytesIO(data)) == key
+    assert ResultCache.key(io.BytesIO(data + b"\n")) != key
+    monkeypatch.setattr(cache_mod, "PARSER_VERSION", cache_mod.PARSER_VERSION + 1)
+    assert ResultCache.key(io.BytesIO(data)) != key
+
+
+def test_new_parser_version_misses_cache(archive, tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path / "cache"))
+    names = members(archive)
+    parse_archive(archive, names, cache=cache)
+    monkeypatch.setattr(cache_mod, "PARSER_VERSION", cache_mod.PARSER_VERSION + 1)
+    assert parse_archive(archive, names, cache=cache).cached == 0
+
+
+def test_corrupt_entry_is_dropped(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    with open(cache._file("bad"), "wb") as f:
+        f.write(b"not a pickle")
+    assert cache.get("bad") is None
+    assert cache.get("bad") is None
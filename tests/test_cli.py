@@ -0,0 +1,94 @@
+"""Звіти з командного рядка: xlsx — з тими самими аркушами, що й з GUI, і таблиці даних."""
+import csv
+import os
+import subprocess
+import sys
+import zipfile
+
+import pytest
+
+import xmlparsing.cli as cli
+from benchmarks.synth import make_archive
+from xmlparsing.cli import main
+from xmlparsing.columnar import companion_path
+
+from conftest import with_repeated_file
+
+
+def test_xlsx_has_products_and_hours(archive, tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    out = os.fspath(tmp_path / "report.xlsx")
+    assert main(["parse", archive, "-o", out, "--no-cache", "-q"]) == 0
+    wb = openpyxl.load_workbook(out, read_only=True)
+    assert wb.sheetnames[-2:] == ["Товари", "Години"]
+    assert len(list(wb["Товари"].iter_rows(max_row=2))) == 2
+
+
+def test_csv_data_items_reconcile_with_days(archive, tmp_path):
+    """amount_cents − disc_cents позицій сходиться з net_cents днів."""
+    out = os.fspath(tmp_path / "items.csv")
+    assert main(["parse", archive, "-o", out, "-f", "csv-data", "--no-cache", "-q"]) == 0
+    with open(out, encoding="utf-8") as f:
+        items = list(csv.DictReader(f))
+    with open(companion_path(out, "days"), encoding="utf-8") as f:
+        net = sum(int(r["net_cents"]) for r in csv.DictReader(f))
+    assert any(int(r["disc_cents"]) for r in items)
+    sign = {"Продаж": 1, "Повернення": -1}
+    assert sum(sign[r["operation"]] * (int(r["amount_cents"]) - int(r["disc_cents"]))
+               for r in items) == net
+
+
+def _corrupt(src, dst):
+    """Копія архіву з зіпсованими стиснутими даними першого члена."""
+    with zipfile.ZipFile(src) as z:
+        info = z.infolist()[0]
+    data = bytearray(open(src, "rb").read())
+    start = info.header_offset + 30 + len(info.filename.encode())
+    for i in range(start + 10, start + info.compress_size - 10):
+        data[i] ^= 0x55
+    with open(dst, "wb") as f:
+        f.write(data)
+
+
+def test_watch_survives_corrupt_archive(tmp_path, monkeypatch, capsys):
+    folder = tmp_path / "in"
+    folder.mkdir()
+    make_archive(os.fspath(tmp_path / "src.zip"), checks=50, files=2, seed=1)
+    _corrupt(tmp_path / "src.zip", folder / "a_bad.zip")
+    make_archive(os.fspath(folder / "b_good.zip"), checks=50, files=2, seed=2)
+
+    sleeps = []
+
+    def sleep(sec):
+        # перше опитування лише запам'ятовує розміри, друге віддає архіви
+        sleeps.append(sec)
+        if len(sleeps) > 1:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(cli.time, "sleep", sleep)
+    out = os.fspath(tmp_path / "report.csv")
+    assert main(["watch", os.fspath(folder), "-o", out, "--no-cache", "-q"]) == 0
+    assert "a_bad.zip" in capsys.readouterr().err
+    assert os.path.getsize(out) > 0
+
+
+def test_stdout_closed_early_exits_quietly(tmp_path):
+    path = os.fspath(tmp_path / "big.zip")
+    make_archive(path, checks=3000, files=2, seed=5)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "xmlparsing", "parse", path, "-o", "-", "--no-cache", "-q"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    proc.stdout.readline()      # як `| head -1`
+    proc.stdout.close()
+    err = proc.stderr.read()
+    assert proc.wait() == 141
+    assert b"Traceback" not in err
+
+
+def test_dedup_matches_plain_parse_for_one_archive(archive, tmp_path):
+    path = os.fspath(with_repeated_file(archive, tmp_path / "twice.zip"))
+    plain, dedup = tmp_path / "plain.csv", tmp_path / "dedup.csv"
+    assert main(["parse", path, "-o", os.fspath(plain), "--no-cache", "-q"]) == 0
+    assert main(["parse", path, "-o", os.fspath(dedup), "--dedup", "--no-cache", "-q"]) == 0
+    assert plain.read_bytes() == dedup.read_bytes()
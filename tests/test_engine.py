@@ -0,0 +1,102 @@
+"""iter_checks проти колишнього розбору regex + ElementTree."""
+import io
+import re
+import xml.etree.ElementTree as ET
+import zipfile
+
+import pytest
+
+from benchmarks.synth import make_archive
+from xmlparsing.engine import iter_checks
+
+BROKEN = b'<DAT FN="1"><C T="0"><P SM="100" TX="1"><E NO="9" SM="100"/></C></DAT>\n'
+# повний чек, а за ним зламаний — у тому самому блоці
+HALF_BROKEN = (b'<DAT FN="1"><C T="0"><P SM="100" TX="1"/><E NO="8" SM="100"/></C>'
+               b'<C T="0"><P SM="200" TX="1"><E NO="9" SM="200"/></C></DAT>\n')
+
+
+def legacy_checks(data):
+    """Чеки так, як їх розбирав _parse_one до потокового парсера."""
+    out, errors = [], 0
+    for block in re.findall(r"<DAT.*?</DAT>", data.decode("utf-8"), re.DOTALL):
+        try:
+            root = ET.fromstring(f"<root>{block}</root>")
+        except ET.ParseError:
+            errors += 1
+            continue
+        dat = root.find("DAT")
+        reg = dat.get("FN") or dat.get("ZN", "")
+        for c in root.iter("C"):
+            e = c.find(".//E")
+            if e is None:
+                continue
+            trn, items = {}, []
+            for p in c.iter("P"):
+                trn[p.get("TX", "")] = trn.get(p.get("TX", ""), 0) + int(p.get("SM", 0))
+            for d in c.iter("D"):
+                trn[d.get("TX", "")] = trn.get(d.get("TX", ""), 0) - int(d.get("SM", 0))
+            # знижка <D> належить позиції <P> перед нею, якщо група та сама
+            for x in c.iter():
+                tx = x.get("TX", "")
+                if x.tag == "P":
+                    items.append([x.get("NM", "Без назви"), abs(int(x.get("SM", 0))), tx, 0])
+                elif x.tag == "D" and items and items[-1][2] == tx:
+                    items[-1][3] += int(x.get("SM", 0))
+            out.append((c.get("T", "0") == "1", e.get("TS", ""), e.get("NO", ""),
+                        abs(int(e.get("SM", 0))), e.get("TX", ""), float(e.get("TXPR", 0)),
+                        trn, items, reg))
+    return out, errors
+
+
+@pytest.fixture(scope="module")
+def xml(tmp_path_factory):
+    path = tmp_path_factory.mktemp("engine") / "one.zip"
+    make_archive(str(path), checks=300, files=1, seed=3)
+    with zipfile.ZipFile(path) as z:
+        return z.read(z.namelist()[0])
+
+
+def _parse(data, chunk_size):
+    errors = []
+    checks = [tuple(c) for c in iter_checks(io.BytesIO(data), errors.append, chunk_size)]
+    return checks, errors
+
+
+@pytest.mark.parametrize("chunk_size", [7, 64, 1000, 1 << 16])
+def test_matches_legacy_parse(xml, chunk_size):
+    # малі шматки різають <DAT>, </DAT> і атрибути навпіл
+    checks, errors = _parse(xml, chunk_size)
+    expected, _ = legacy_checks(xml)
+    assert len(expected) == 300
+    assert checks == expected
+    assert errors == []
+
+
+@pytest.mark.parametrize("chunk_size", [5, 50, 1 << 16])
+def test_malformed_block_is_skipped(xml, chunk_size):
+    head, sep, tail = xml.partition(b"</DAT>\n")
+    data = head + sep + BROKEN + tail
+    checks, errors = _parse(data, chunk_size)
+    expected, legacy_errors = legacy_checks(data)
+    assert legacy_errors == 1
+    assert len(errors) == 1
+    assert checks == expected
+    assert len(checks) == 300
+
+
+@pytest.mark.parametrize("chunk_size", [5, 50, 1 << 16])
+def test_block_dropped_with_checks_before_error(xml, chunk_size):
+    head, sep, tail = xml.partition(b"</DAT>\n")
+    data = head + sep + HALF_BROKEN + tail
+    checks, errors = _parse(data, chunk_size)
+    expected, legacy_errors = legacy_checks(data)
+    assert legacy_errors == 1
+    assert len(errors) == 1
+    assert checks == expected
+    assert len(checks) == 300
+
+
+def test_unterminated_block_reports_error(xml):
+    checks, errors = _parse(xml + b'<DAT FN="1"><C T="0">', 64)
+    assert len(checks) == 300
+    assert len(errors) == 1
@@ -0,0 +1,76 @@
+"""Підсумки FilterIndex.view збігаються з Partial.day_totals."""
+import pytest
+
+from xmlparsing import aggregate
+from xmlparsing.aggregate import RETURN, SALE
+from xmlparsing.filters import FilterIndex, RowFilter
+from xmlparsing.parallel import parse_archive
+from xmlparsing.spill import Spill, SpillColumn
+from xmlparsing.store import OP_RETURN
+
+from conftest import members
+
+
+@pytest.fixture
+def part(archive):
+    return parse_archive(archive, members(archive), workers=1)
+
+
+def _index(part):
+    order = part.store.sorted_order()
+    return FilterIndex(part.store, part.checks, order)
+
+
+def _stats(st):
+    return st.sales, st.returns, st.checks, st.days, sorted(st.taxes.items())
+
+
+@pytest.mark.parametrize("block", [7, aggregate.AGG_BLOCK])
+def test_all_pass_filter_matches_day_totals(part, monkeypatch, block):
+    monkeypatch.setattr(aggregate, "AGG_BLOCK", block)
+    view = _index(part).view(RowFilter(), part.rates)
+    assert view.totals == part.day_totals()
+    assert _stats(view.stats) == _stats(part.stats)
+    assert len(view.rows) == len(part.store)
+
+
+def test_date_filter_takes_day_from_checks(part):
+    totals = part.day_totals()
+    date   = sorted(totals)[1]
+    view   = _index(part).view(RowFilter(date, date), part.rates)
+    assert view.totals == {date: totals[date]}
+    assert [s[0] for s in view.spans] == [date]
+
+
+def test_operation_filter_keeps_only_returns(part):
+    totals = part.day_totals()
+    view   = _index(part).view(RowFilter(ops=(OP_RETURN,)), part.rates)
+    assert view.totals
+    for date, td in view.totals.items():
+        assert td[SALE] == 0
+        assert td[RETURN] == totals[date][RETURN]
+    assert view.stats.returns == part.stats.returns
+    assert view.stats.sales == 0
+
+
+def test_group_filter_subtracts_discounts(part):
+    # у синтетичних чеках кожна <D> іде за своєю <P>, тож усі групи разом
+    # дають E@SM чеків і ті самі обіги, що й підсумки з чеків
+    assert any(part.store.disc)
+    view = _index(part).view(RowFilter(groups=tuple(range(9))), part.rates)
+    assert view.totals == part.day_totals()
+    assert view.stats.sales == part.stats.sales
+    assert view.stats.returns == part.stats.returns
+
+
+def test_spill_keeps_copies_on_disk(archive, part, tmp_path):
+    spill = Spill(rows=64, base_dir=tmp_path)
+    try:
+        big   = parse_archive(archive, members(archive), workers=1, spill=spill)
+        index = _index(big)
+        assert isinstance(index._amount, SpillColumn)
+        assert isinstance(index._check, SpillColumn)
+        view = index.view(RowFilter(ops=(OP_RETURN,)), big.rates)
+        assert view.totals == _index(part).view(RowFilter(ops=(OP_RETURN,)), part.rates).totals
+    finally:
+        spill.close()
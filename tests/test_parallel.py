@@ -0,0 +1,12 @@
+"""Пул процесів дає той самий результат, що й послідовний розбір."""
+from xmlparsing.parallel import parse_archive
+
+from conftest import members, snapshot
+
+
+def test_parallel_matches_sequential(archive):
+    names = members(archive)
+    seq   = parse_archive(archive, names, workers=1)
+    par   = parse_archive(archive, names, workers=3)
+    assert len(seq.checks) == 600
+    assert snapshot(par) == snapshot(seq)
@@ -0,0 +1,24 @@
+"""Зведена таблиця звіту — точна до копійки і не залежить від порядку днів."""
+import os
+
+from benchmarks.synth import make_archive
+from xmlparsing.parallel import parse_archive
+from xmlparsing.report import ROW_GRAND, iter_report_rows
+
+from conftest import members
+
+
+def _grand(part, totals):
+    return [v for kind, v in iter_report_rows(part.store, totals, part.rates) if kind == ROW_GRAND]
+
+
+def test_grand_rows_do_not_depend_on_day_order(tmp_path):
+    path = os.fspath(tmp_path / "month.zip")
+    make_archive(path, checks=3000, files=6, days=30, seed=11)
+    part   = parse_archive(path, members(path))
+    totals = part.day_totals()
+    grand  = _grand(part, totals)
+    assert grand == _grand(part, dict(reversed(list(totals.items()))))
+    st = part.stats
+    assert grand[1][4] == st.sales / 100
+    assert grand[-1][4] == (st.sales - st.returns) / 100
@@ -0,0 +1,44 @@
+"""NameIndex: пошук у пам'яті й у режимі spill дає ті самі позиції."""
+import pytest
+
+from xmlparsing.parallel import parse_archive
+from xmlparsing.search import NameIndex
+from xmlparsing.spill import Spill
+
+from conftest import members
+
+
+@pytest.fixture
+def part(archive):
+    return parse_archive(archive, members(archive), workers=1)
+
+
+def _index(part):
+    return NameIndex(part.store, part.store.sorted_order())
+
+
+def _queries(part):
+    names = sorted(set(part.store.names))
+    return [names[0], names[-1][:2], names[len(names) // 2][1:5].upper(), "немає такого"]
+
+
+def test_spill_search_matches_memory(archive, part, tmp_path):
+    spill = Spill(rows=64, base_dir=tmp_path)
+    try:
+        big   = parse_archive(archive, members(archive), workers=1, spill=spill)
+        index = _index(big)
+        assert index._rows is None
+        mem   = _index(part)
+        for q in _queries(part):
+            assert index.search(q, limit=5) == mem.search(q, limit=5)
+    finally:
+        spill.close()
+
+
+def test_search_counts_all_hits_beyond_limit(part):
+    index = _index(part)
+    name  = part.store.names[part.store.name[0]]
+    codes = set(index.match_names(name))
+    total, hits = index.search(name, limit=1)
+    assert total == sum(code in codes for code in part.store.name)
+    assert len(hits) == 1
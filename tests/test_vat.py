@@ -0,0 +1,77 @@
+"""Епохи ставок ПДВ не залежать від порядку, в якому надходять чеки."""
+import os
+import zipfile
+
+import pytest
+
+from xmlparsing.cache import ResultCache
+from xmlparsing.parallel import parse_archive
+from xmlparsing.vat import RateTimeline
+
+from conftest import members, snapshot
+
+
+def _check(reg, no, ts, pct, cents=10700):
+    return (f'<DAT DI="{no}" FN="{reg}" V="1"><C T="0">'
+            f'<P N="1" C="1" NM="Товар" SM="{cents}" TX="1"/>'
+            f'<E N="{no}" NO="{no}" SM="{cents}" TX="1" TXPR="{pct}" TS="{ts}"/>'
+            f'</C></DAT>\n')
+
+
+def _archive(path, files):
+    with zipfile.ZipFile(path, "w") as z:
+        for name, checks in files:
+            body = "".join(_check(*c) for c in checks)
+            z.writestr(name, f'<?xml version="1.0" encoding="UTF-8"?>\n<RQ V="1">\n{body}</RQ>\n')
+    return path
+
+
+@pytest.fixture
+def registers(tmp_path):
+    """РРО X змінює ставку 20% → 7% 30.01, а РРО Y уже 15.01 продає за 7%."""
+    return _archive(os.fspath(tmp_path / "regs.zip"), [
+        ("a.xml", [("X", 1, 20250101100000, "20.00"), ("X", 2, 20250130100000, "7.00")]),
+        ("b.xml", [("Y", 1, 20250115100000, "7.00"), ("Y", 2, 20250116100000, "7.00")]),
+    ])
+
+
+def _vat(part):
+    return {date: round(td["taxes"]["А"]["vat"], 2) for date, td in part.day_totals().items()}
+
+
+def test_interleaved_registers(registers, tmp_path):
+    names = members(registers)
+    seq   = parse_archive(registers, names)
+    assert seq.rates.epochs(1) == [(0, 20.0), (20250115100000, 7.0)]
+    assert _vat(seq) == {"2025-01-01": 17.83, "2025-01-15": 7.0,
+                         "2025-01-16": 7.0, "2025-01-30": 7.0}
+
+    cache = ResultCache(os.fspath(tmp_path / "cache"))
+    runs  = [parse_archive(registers, names, workers=2),
+             parse_archive(registers, names, cache=cache),
+             parse_archive(registers, names, cache=cache),
+             parse_archive(registers, names[::-1])]
+    assert runs[2].cached == len(names)
+    for part in runs:
+        assert part.rates.epochs(1) == seq.rates.epochs(1)
+    for part in runs[:3]:
+        assert snapshot(part) == snapshot(seq)
+
+
+def test_rate_returns_after_other_register(tmp_path):
+    path = _archive(os.fspath(tmp_path / "back.zip"), [
+        ("a.xml", [("X", 1, 20250101100000, "20.00"), ("X", 2, 20250110100000, "20.00")]),
+        ("b.xml", [("Y", 1, 20250105100000, "7.00")]),
+    ])
+    names = members(path)
+    seq   = parse_archive(path, names)
+    assert seq.rates.epochs(1) == [(0, 20.0), (20250105100000, 7.0), (20250110100000, 20.0)]
+    assert snapshot(parse_archive(path, names, workers=2)) == snapshot(seq)
+
+
+def test_same_day_points_are_compacted():
+    tl = RateTimeline()
+    for ts in (20250101090000, 20250101100000, 20250101080000, 20250102090000):
+        tl.note(1, ts, 20.0)
+    tl.note(1, 20250101120000, 7.0)
+    assert tl.epochs(1) == [(0, 20.0), (20250101120000, 7.0), (20250102090000, 20.0)]
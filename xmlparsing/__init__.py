@@ -0,0 +1 @@
+"""Ядро парсера XML-експорту Марія-304Т3 (без залежності від Tk)."""
@@ -0,0 +1,336 @@
+"""Агрегація чеків у самодостатні часткові результати.
+
+Partial зберігає суми в цілих копійках, тому злиття двох Partial точне
+й асоціативне: результат не залежить від того, як файли поділено між
+процесами, аби частини зливались у порядку файлів.
+
+Під час парсингу сирі копійки лише дописуються в колонки CheckTable;
+підсумки днів і груп збираються одним проходом по масивах при першому
+зверненні до days (чи stats) і далі лише дозбираються з нових чеків.
+У тому ж проході наповнюються погодинний куб (cube.HourCube) і підсумки
+товарів (products.ProductStats) з позицій кожного чека.
+
+Обіги груп ключуються парою (група, епоха ставки) — vat.key, — тож ПДВ
+кожної епохи рахується за своєю ставкою TXPR. Якщо нові файли змінили
+межі епох, підсумки один раз перераховуються з колонок чеків.
+"""
+from bisect import bisect_right
+
+from .cube import GROUPS, HOURS, HourCube
+from .engine import iter_checks
+from .products import ProductStats
+from .store import NO_TS, OP_RETURN, OP_SALE, CheckTable, RecordStore, fmt_date, parse_ts
+from .vat import EPOCH_SHIFT, RateTimeline, label, split, vat
+
+# ─── Карта податкових груп ────────────────────────────────────────────────────
+TAX_MAP = {
+    "1": "А", "2": "Б", "3": "В", "4": "Г",
+    "5": "Д", "6": "Е", "7": "Ж", "8": "З",
+}
+
+SALE   = "Продаж"
+RETURN = "Повернення"
+
+AGG_BLOCK = 1 << 18     # чеків на одне вікно агрегації — зрізи колонок не ростуть з архівом
+
+
+class RunningStats:
+    """Підсумки за весь період для панелі статистики — читаються за O(1)."""
+
+    __slots__ = ("sales", "returns", "taxes", "_checks", "_days")
+
+    def __init__(self):
+        self.sales   = 0      # копійки
+        self.returns = 0
+        self.taxes   = {}     # {vat.key(група, епоха): оборот}, копійки
+        self._checks = set()  # день * (10⁹+1) + код номера + 1 — чеки з позиціями
+        self._days   = set()
+
+    @property
+    def checks(self):
+        return len(self._checks)
+
+    @property
+    def days(self):
+        return len(self._days)
+
+    def grand_taxes(self, rates):
+        """{літера групи: {"turnover", "vat", "pr"}} у гривнях за RateTimeline rates."""
+        return tax_totals(self.taxes, rates)
+
+
+class Partial:
+    """Результат парсингу одного файлу або пакета файлів."""
+
+    __slots__ = ("store", "checks", "rates", "errors", "cached", "_acc", "_stats", "_agg_n",
+                 "_agg_bounds", "_totals", "_totals_key", "_products", "_cube")
+
+    def __init__(self, spill=None):
+        self.store  = RecordStore(spill)   # позиції чеків
+        self.checks = CheckTable(spill)    # чеки з сирими сумами — джерело підсумків
+        self.rates  = RateTimeline()    # епохи ставок TXPR по групах
+        self.errors = []    # тексти помилок для журналу
+        self.cached = 0     # скільки файлів узято з дискового кешу
+        self._acc   = {}    # {день YYYYMMDD: [продаж, повернення, {код: оборот}, дата]}
+        self._stats = RunningStats()
+        self._agg_n = 0     # скільки чеків уже враховано в _acc
+        self._agg_bounds = {}       # межі епох (RateTimeline.bounds), з якими зібрано _acc
+        self._totals     = None     # кеш day_totals
+        self._totals_key = None     # (_agg_n, rates.version), для яких він порахований
+        self._products = ProductStats(self.store, self._acc)
+        self._cube     = HourCube()
+
+    def add_check(self, chk):
+        ts     = parse_ts(chk.ts)
+        if chk.tx_code in TAX_MAP:
+            self.rates.note(int(chk.tx_code), ts, chk.tx_pct)
+
+        ret    = chk.is_return
+        signed = [(int(code), -abs(cents) if ret else abs(cents))
+                  for code, cents in chk.turnover.items() if code in TAX_MAP]
+
+        op    = OP_RETURN if ret else OP_SALE
+        first = len(self.store)
+        self.store.add_check(ts, chk.no, op, chk.items)
+        self.checks.add(chk.register, ts, chk.no, op, chk.total, first, len(chk.items), signed)
+
+    def _aggregate(self):
+        """Дозбирує _acc і _stats з чеків, доданих після попереднього виклику."""
+        c      = self.checks
+        start  = self._agg_n
+        end    = len(c)
+        bounds = self.rates.bounds()
+        if bounds != self._agg_bounds:
+            # межі епох зсунулись — обіги перерозподіляються з усіх чеків
+            self._agg_bounds = bounds
+            self._acc   = {}
+            self._stats = RunningStats()
+            self._cube  = HourCube()
+            self._products = ProductStats(self.store, self._acc)
+            start       = 0
+        if start == end:
+            return
+        acc   = self._acc
+        st    = self._stats
+        keys  = st._checks
+        gtax  = st.taxes
+        cube  = self._cube
+        pdays = self._products._by_day
+        ptot  = self._products._total
+        s     = self.store
+        j0    = c.tx_off[start]
+        last  = None
+        run   = [0, 0]      # продаж, повернення цієї порції
+        for a in range(start, end, AGG_BLOCK):
+            b     = min(a + AGG_BLOCK, end)
+            j1    = c.tx_off[b - 1] + c.tx_n[b - 1]
+            codes = c.tx_code[j0:j1]
+            cents = c.tx_cents[j0:j1]
+            j     = 0
+            j0    = j1
+            # позиції чеків вікна йдуть у store поспіль, у порядку чеків
+            i0    = c.first[a]
+            i1    = c.first[b - 1] + c.count[b - 1]
+            names = s.name[i0:i1]
+            amts  = s.amount[i0:i1]
+            discs = s.disc[i0:i1]
+            for t, no, op, total, f, cnt, n in zip(c.ts[a:b], c.no[a:b], c.op[a:b], c.total[a:b],
+                                                   c.first[a:b], c.count[a:b], c.tx_n[a:b]):
+                d = t // 1000000
+                if d != last:
+                    day = acc.get(d)
+                    if day is None:
+                        day = acc[d] = [0, 0, {}, fmt_date(t)]
+                    taxes = day[2]
+                    hc, hn = (None, None) if t == NO_TS else cube.day(d)
+                    pday  = pdays.get(d)
+                    if pday is None:
+                        pday = pdays[d] = {}
+                    last  = d
+                day[op] += total
+                run[op] += total
+                if cnt:
+                    keys.add(d * 1000000001 + no + 1)
+                    # товари: [продаж, позицій, повернення, позицій повернень]
+                    k = op + op
+                    for x in range(f - i0, f - i0 + cnt):
+                        code = names[x]
+                        v    = amts[x] - discs[x]
+                        e = pday.get(code)
+                        if e is None:
+                            e = pday[code] = [0, 0, 0, 0]
+                        g = ptot.get(code)
+                        if g is None:
+                            g = ptot[code] = [0, 0, 0, 0]
+                        e[k]     += v
+                        e[k + 1] += 1
+                        g[k]     += v
+                        g[k + 1] += 1
+                h = t // 10000 % 100
+                if hc is not None and h < HOURS:
+                    # клітинка (h, група, op): група 0 — сума чека, далі — коди ПДВ
+                    k = h * GROUPS * 2 + op
+                    hc[k] += total
+                    hn[k] += 1
+                    for x in range(j, j + n):
+                        code = codes[x]
+                        v    = cents[x]
+                        e    = code
+                        if bounds and code in bounds:
+                            e |= bisect_right(bounds[code], t) << EPOCH_SHIFT
+                        taxes[e] = taxes.get(e, 0) + v
+                        gtax[e]  = gtax.get(e, 0) + v
+                        g = k + code + code
+                        hc[g] += -v if op else v
+                        hn[g] += 1
+                else:
+                    for x in range(j, j + n):
+                        code = codes[x]
+                        e    = code
+                        if bounds and code in bounds:
+                            e |= bisect_right(bounds[code], t) << EPOCH_SHIFT
+                        taxes[e] = taxes.get(e, 0) + cents[x]
+                        gtax[e]  = gtax.get(e, 0) + cents[x]
+                j += n
+        st.sales   += run[0]
+        st.returns += run[1]
+        st._days.update(acc)
+        self._agg_n = end
+
+    @property
+    def stats(self):
+        """RunningStats за всі чеки цього Partial."""
+        self._aggregate()
+        return self._stats
+
+    @property
+    def products(self):
+        """ProductStats по позиціях усіх чеків цього Partial."""
+        self._aggregate()
+        return self._products
+
+    @property
+    def hours(self):
+        """HourCube день × година × група × операція за всі чеки."""
+        self._aggregate()
+        return self._cube
+
+    @property
+    def days(self):
+        """{дата: [продаж, повернення, {vat.key(група, епоха): оборот}]}, копійки."""
+        self._aggregate()
+        return {date: [s, r, dict(taxes)] for s, r, taxes, date in self._acc.values()}
+
+    def merge(self, other):
+        """Доливає other (наступний за порядком файлів) у self."""
+        self.checks.extend(other.checks, len(self.store))
+        self.store.extend(other.store)
+        self.rates.merge(other.rates)
+        self.errors.extend(other.errors)
+        self.cached += other.cached
+        return self
+
+    def merge_new(self, other, index):
+        """Доливає з other лише чеки, яких ще немає в index (CheckIndex).
+
+        Дублікати шукаються лише серед архівів, злитих раніше: повтори
+        всередині other лишаються, як і при відкритті одного архіву, тож
+        той самий архів дає ті самі підсумки в CLI і GUI. Після злиття
+        чеки other заносяться в index; час — пропорційний розміру other.
+        Повертає кількість відкинутих дублікатів.
+        """
+        oc     = other.checks
+        store  = self.store
+        seen   = index.seen
+        spans  = []
+        first  = len(store)
+        dups   = 0
+        for k in range(len(oc)):
+            ts = oc.ts[k]
+            if seen(oc.regs[oc.reg[k]], ts, oc.nos[oc.no[k]]):
+                dups += 1
+                continue
+            a = oc.first[k]
+            b = a + oc.count[k]
+            self.checks.copy_row(oc, k, first)
+            first += b - a
+            if spans and spans[-1][1] == a:
+                spans[-1][1] = b
+            elif b > a:
+                spans.append([a, b])
+        store.extend_spans(other.store, spans)
+        index.add_partial(other)
+
+        self.rates.merge(other.rates)
+        self.errors.extend(other.errors)
+        self.cached += other.cached
+        return dups
+
+    def day_totals(self):
+        """Підсумки у форматі sales_totals_by_date (гривні, ПДВ за епохами ставок).
+
+        Результат кешується до появи нових чеків чи ставок — таблиця,
+        статистика й експорт читають один і той самий словник.
+        """
+        self._aggregate()
+        k = (self._agg_n, self.rates.version)
+        if self._totals_key != k:
+            self._totals     = totals_by_date(self.days, self.rates)
+            self._totals_key = k
+        return self._totals
+
+
+def tax_totals(taxes, rates):
+    """{vat.key: оборот у копійках} → {літера групи: {"turnover", "vat", "pr"}}.
+
+    ПДВ кожної епохи — за її ставкою з RateTimeline rates; епохи групи
+    сумуються, а pr перелічує їхні ставки ('20.00% → 7.00%').
+    """
+    out = {}
+    for k in sorted(taxes, key=split):
+        code, epoch = split(k)
+        pct = rates.pct(code, epoch)
+        tv  = taxes[k] / 100
+        td  = out.get(TAX_MAP[str(code)])
+        if td is None:
+            td = out[TAX_MAP[str(code)]] = {"turnover": 0.0, "vat": 0.0, "pr": []}
+        td["turnover"] += tv
+        td["vat"]      += vat(taxes[k], pct)
+        td["pr"].append(pct)
+    for td in out.values():
+        td["pr"] = label(td["pr"])
+    return out
+
+
+def totals_by_date(days, rates):
+    """{дата: [продаж, повернення, {vat.key: оборот}]} у копійках → формат
+    sales_totals_by_date: гривні й ПДВ груп за епохами ставок rates."""
+    return {date: {SALE: s / 100, RETURN: r / 100, "taxes": tax_totals(taxes, rates)}
+            for date, (s, r, taxes) in days.items()}
+
+def parse_stream(stream, name, part=None):
+    """Розбирає один XML-потік у part (або в новий Partial) і повертає його."""
+    if part is None:
+        part = Partial()
+    add = part.add_check
+    try:
+        for chk in iter_checks(stream, on_error=lambda err: part.errors.append(
+                f"XML error {name}: {err}")):
+            add(chk)
+    except Exception as err:
+        part.errors.append(f"Читання файлу {name}: {err}")
+    return part
+
+
+def parse_cached(stream, name, cache):
+    """parse_stream з дисковим кешем за вмістом файлу (cache може бути None)."""
+    if cache is None:
+        return parse_stream(stream, name)
+    key  = cache.key(stream)
+    part = cache.get(key)
+    if part is not None:
+        part.cached = 1
+        return part
+    part = parse_stream(stream, name)
+    cache.put(key, part)
+    return part
@@ -0,0 +1,85 @@
+"""Читання XML-файлів прямо з ZIP-архіву, без розпакування на диск.
+
+Невеликі члени архіву розпаковуються наперед у пулі потоків — zlib
+відпускає GIL, тож декомпресія йде паралельно з парсингом. Великі члени
+віддаються як потік ZipExtFile і читаються парсером шматками.
+"""
+import io
+import os
+import threading
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+DECOMPRESS_WORKERS = 4
+STREAM_THRESHOLD   = 32 << 20     # більші члени не тримаємо в пам'яті цілком
+
+# Винятки пошкодженого архіву: обрізаний або зіпсований член дає
+# zlib.error чи EOFError, а не BadZipFile
+CORRUPT_ERRORS = (EOFError, zipfile.BadZipFile, zlib.error)
+# ...і ще недоступного файлу
+ARCHIVE_ERRORS = (OSError, *CORRUPT_ERRORS)
+
+
+def list_xml_members(zf):
+    """Відсортовані імена .xml-членів відкритого ZipFile."""
+    return sorted(i.filename for i in zf.infolist()
+                  if not i.is_dir() and i.filename.endswith(".xml"))
+
+
+def iter_xml_members(zip_path, names=None, workers=DECOMPRESS_WORKERS):
+    """Генерує (ім'я, бінарний потік) для .xml-членів архіву в порядку імен.
+
+    Потік дійсний лише до наступної ітерації. Пошкоджений член архіву
+    піднімає виняток zipfile/zlib з генератора. Архів як файловий об'єкт
+    (не шлях) читається в одному потоці.
+    """
+    if not isinstance(zip_path, (str, os.PathLike)):
+        workers = 1
+    with zipfile.ZipFile(zip_path) as zf:
+        if names is None:
+            names = list_xml_members(zf)
+        sizes = {i.filename: i.file_size for i in zf.infolist()}
+
+        if workers <= 1:
+            for name in names:
+                with zf.open(name) as f:
+                    yield name, f
+            return
+
+        # ZipFile не варто ділити між потоками — кожен має свій дескриптор
+        local   = threading.local()
+        handles = []
+
+        def read(name):
+            z = getattr(local, "zf", None)
+            if z is None:
+                z = local.zf = zipfile.ZipFile(zip_path)
+                handles.append(z)
+            return z.read(name)
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                it      = iter(names)
+
+                def submit():
+                    for name in it:
+                        big = sizes.get(name, 0) > STREAM_THRESHOLD
+                        pending.append((name, None if big else pool.submit(read, name)))
+                        return
+
+                for _ in range(workers * 2):
+                    submit()
+                while pending:
+                    name, fut = pending.popleft()
+                    submit()
+                    if fut is None:
+                        with zf.open(name) as f:
+                            yield name, f
+                    else:
+                        yield name, io.BytesIO(fut.result())
+        finally:
+            for z in handles:
+                z.close()
@@ -0,0 +1,97 @@
+"""Дисковий кеш результатів парсингу окремих XML-файлів.
+
+Ключ — blake2b від байтів файлу разом із версією парсера, значення —
+Partial цього файлу у pickle (колонки RecordStore серіалізуються як
+сирі масиви). Незмінені файли з вчорашнього архіву не парсяться вдруге.
+Розмір кешу обмежений: trim() видаляє найдавніше використані записи.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+
+from .engine import PARSER_VERSION
+
+DEFAULT_MAX_BYTES = 256 << 20
+_HASH_CHUNK       = 1 << 20
+
+
+def default_cache_dir():
+    base = (os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME")
+            or os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(base, "XMLparsing", "cache")
+
+
+class ResultCache:
+    """Кеш у теці path; безпечний для кількох процесів одночасно.
+
+    get/put нічого не видаляють — ліміт розміру застосовує trim(),
+    який викликає батьківський процес після парсингу.
+    """
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.path      = path or default_cache_dir()
+        self.max_bytes = max_bytes
+        os.makedirs(self.path, exist_ok=True)
+
+    @staticmethod
+    def key(stream):
+        """Хеш вмісту потоку; потік перемотується на початок."""
+        h = hashlib.blake2b(f"v{PARSER_VERSION}:".encode(), digest_size=20)
+        for chunk in iter(lambda: stream.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+        stream.seek(0)
+        return h.hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.path, key + ".bin")
+
+    def get(self, key):
+        fn = self._file(key)
+        try:
+            with open(fn, "rb") as f:
+                part = pickle.load(f)
+            os.utime(fn)        # позначка для LRU
+            return part
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # пошкоджений або застарілий запис — просто парсимо заново
+            try: os.remove(fn)
+            except OSError: pass
+            return None
+
+    def put(self, key, part):
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(part, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._file(key))
+        except OSError:
+            try: os.remove(tmp)
+            except OSError: pass
+
+    def trim(self):
+        """Видаляє найдавніше використані записи, доки кеш більший за ліміт."""
+        entries = []
+        total   = 0
+        for e in os.scandir(self.path):
+            if e.is_file() and e.name.endswith(".bin"):
+                st = e.stat()
+                entries.append((st.st_mtime, st.st_size, e.path))
+                total += st.st_size
+        entries.sort()
+        for _mtime, size, fn in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(fn)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        for e in os.scandir(self.path):
+            if e.name.endswith((".bin", ".tmp")):
+                try: os.remove(e.path)
+                except OSError: pass
@@ -0,0 +1,243 @@
+"""Консольний режим без Tk: архів(и) → звіт.
+
+    python -m xmlparsing parse day1.zip day2.zip -o report.xlsx
+    python -m xmlparsing parse week.zip day7.zip --dedup -o report.csv
+    python -m xmlparsing watch /mnt/exports -o today.xlsx
+    python -m xmlparsing parse day.zip -o items.parquet
+    python -m xmlparsing parse year.zip --spill-rows 4000000 -o year.parquet
+    cat day.zip | python -m xmlparsing parse - -o - -f csv
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import zipfile
+
+from .aggregate import Partial
+from .archive import ARCHIVE_ERRORS, list_xml_members
+from .cache import ResultCache
+from .columnar import DATA_WRITERS
+from .dedup import CheckIndex
+from .metrics import RunMetrics
+from .parallel import parse_archive
+from .report import WRITERS, iter_report_rows, write_xlsx
+from .spill import Spill
+from .watch import POLL_INTERVAL, FolderWatcher
+
+
+def _err(msg):
+    print(msg, file=sys.stderr)
+
+
+_EXT_FORMATS = {"feather": "arrow", "ipc": "arrow"}
+
+
+def _format_for(args):
+    if args.format:
+        return args.format
+    ext = os.path.splitext(args.output)[1].lower().lstrip(".")
+    ext = _EXT_FORMATS.get(ext, ext)
+    return ext if ext in WRITERS or ext in DATA_WRITERS else "csv"
+
+
+def _write(fmt, part, path):
+    """Звіт (xlsx/csv) або таблиці даних (parquet/arrow/csv-data)."""
+    if fmt in DATA_WRITERS:
+        DATA_WRITERS[fmt](part, path)
+        return
+    rows = iter_report_rows(part.store, part.day_totals(), part.rates)
+    if fmt == "xlsx":
+        # аркуші «Товари» і «Години» — як в експорті з GUI
+        write_xlsx(rows, path, products=part.products.top(None), hours=part.hours)
+    else:
+        WRITERS[fmt](rows, path)
+
+
+def _list_members(zip_src, metrics):
+    with zipfile.ZipFile(zip_src) as z:
+        names = list_xml_members(z)
+        metrics.count(files=len(names), bytes=sum(z.getinfo(n).file_size for n in names))
+    return names
+
+
+def _spill(args):
+    """Spill для режиму з обмеженою пам'яттю або None."""
+    return Spill(args.spill_rows, args.spill_dir) if args.spill_rows > 0 else None
+
+
+def _emit_metrics(args, metrics):
+    """Підсумок у stderr і, за бажанням, JSON / Prometheus-файл."""
+    if args.verbose:
+        for line in metrics.summary_lines():
+            _err(line)
+    try:
+        if args.metrics_json:
+            metrics.write_json(args.metrics_json)
+        if args.metrics_prom:
+            metrics.write_prometheus(args.metrics_prom)
+    except OSError as err:
+        _err(f"❌ Метрики не записано: {err}")
+
+
+def cmd_parse(args):
+    fmt     = _format_for(args)
+    spill   = _spill(args)
+    total   = Partial(spill)
+    cache   = None if args.no_cache else ResultCache(args.cache_dir)
+    index   = CheckIndex() if args.dedup else None
+    metrics = RunMetrics()
+
+    for src in args.archives:
+        label = "stdin" if src == "-" else os.path.basename(src)
+        # zipfile потребує seek — stdin читаємо в пам'ять цілком
+        zip_src = io.BytesIO(sys.stdin.buffer.read()) if src == "-" else src
+        try:
+            names = _list_members(zip_src, metrics)
+            part  = parse_archive(zip_src, names, workers=args.jobs if src != "-" else 1,
+                                  cache=cache, metrics=metrics, spill=spill)
+        except ARCHIVE_ERRORS as err:
+            _err(f"❌ {label}: {err}")
+            return 1
+        metrics.add_partial(part)
+        for msg in part.errors:
+            _err(f"❌ {msg}")
+        if not args.quiet:
+            _err(f"📦 {label}: файлів {len(names):,} (з кешу {part.cached:,}), "
+                 f"позицій {len(part.store):,}")
+        with metrics.stage("merge"):
+            if index is None:
+                if len(total.checks) or total.errors:
+                    total.merge(part)
+                else:
+                    total = part    # перший архів — без копіювання колонок
+                continue
+            dups = total.merge_new(part, index)
+        if dups and not args.quiet:
+            _err(f"♻️ {label}: дублікатів чеків відкинуто {dups:,}")
+
+    if not total.store:
+        _err("⚠️ Чеків не знайдено.")
+        _emit_metrics(args, metrics)
+        return 1
+
+    try:
+        with metrics.stage("export"):
+            _write(fmt, total, args.output)
+    except PermissionError:
+        _err(f"❌ Немає доступу до {args.output}")
+        return 1
+    except ImportError as err:
+        _err(f"❌ {err}")
+        return 1
+    if not args.quiet and args.output != "-":
+        _err(f"💾 Збережено: {args.output}")
+    _emit_metrics(args, metrics)
+    return 0
+
+
+def cmd_watch(args):
+    """Стежить за текою і переписує звіт після кожного нового архіву."""
+    total   = Partial(_spill(args))
+    index   = CheckIndex()
+    cache   = None if args.no_cache else ResultCache(args.cache_dir)
+    watcher = FolderWatcher(args.folder)
+    metrics = RunMetrics()      # накопичувальні — за весь час стеження
+    if not args.quiet:
+        _err(f"👁 Стеження за {args.folder} (Ctrl+C — вихід)")
+    try:
+        while True:
+            fresh = 0
+            for path in watcher.scan():
+                label = os.path.basename(path)
+                try:
+                    names = _list_members(path, metrics)
+                    part  = parse_archive(path, names, workers=args.jobs, cache=cache,
+                                          metrics=metrics)
+                except ARCHIVE_ERRORS as err:
+                    # пошкоджений архів пропускається — стеження триває
+                    _err(f"❌ {label}: {err}")
+                    continue
+                metrics.add_partial(part)
+                for msg in part.errors:
+                    _err(f"❌ {msg}")
+                n     = len(part.checks)
+                with metrics.stage("merge"):
+                    dups = total.merge_new(part, index)
+                fresh += n - dups
+                if not args.quiet:
+                    _err(f"📦 {label}: нових чеків {n - dups:,}, дублікатів {dups:,}")
+            if fresh:
+                try:
+                    with metrics.stage("export"):
+                        _write(_format_for(args), total, args.output)
+                except ImportError as err:
+                    _err(f"❌ {err}")
+                    return 1
+                except PermissionError:
+                    _err(f"❌ Немає доступу до {args.output} — повтор після наступного архіву")
+                else:
+                    if not args.quiet:
+                        _err(f"💾 Оновлено: {args.output} (чеків {len(index):,})")
+                _emit_metrics(args, metrics)
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        return 0
+
+
+def _add_common(p):
+    p.add_argument("-o", "--output", required=True,
+                   help="файл звіту; '-' — stdout (лише csv)")
+    p.add_argument("-f", "--format", choices=sorted(WRITERS) + sorted(DATA_WRITERS),
+                   help="формат: xlsx/csv — звіт; parquet/arrow/csv-data — таблиці "
+                        "позицій і підсумків для BI (за замовчуванням — з розширення)")
+    p.add_argument("-j", "--jobs", type=int, default=1,
+                   help="кількість процесів парсингу (за замовчуванням 1)")
+    p.add_argument("--cache-dir", help="тека кешу результатів (за замовчуванням — профіль користувача)")
+    p.add_argument("--no-cache", action="store_true", help="не використовувати кеш")
+    p.add_argument("-q", "--quiet", action="store_true", help="лише помилки")
+    p.add_argument("--spill-rows", type=int, default=0, metavar="N",
+                   help="режим з обмеженою пам'яттю: колонки понад N значень скидаються "
+                        "на диск і читаються через mmap (0 — усе в пам'яті)")
+    p.add_argument("--spill-dir", help="тека тимчасових файлів spill (за замовчуванням — системна)")
+    p.add_argument("-v", "--verbose", action="store_true",
+                   help="час етапів, пропускна здатність і пікова пам'ять у stderr")
+    p.add_argument("--metrics-json", metavar="FILE", help="записати метрики запуску в JSON")
+    p.add_argument("--metrics-prom", metavar="FILE",
+                   help="записати метрики у текстовому форматі Prometheus")
+
+
+def build_parser():
+    ap = argparse.ArgumentParser(prog="xmlparsing",
+        description="XML Парсер Марія-304Т3 — пакетна обробка без GUI.")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("parse", help="архів(и) ZIP → звіт")
+    p.add_argument("archives", nargs="+", metavar="ARCHIVE",
+                   help="ZIP-архіви; '-' — архів зі stdin")
+    _add_common(p)
+    p.add_argument("--dedup", action="store_true",
+                   help="відкидати чеки, що вже є в попередніх архівах (РРО, час, номер)")
+    p.set_defaults(func=cmd_parse)
+
+    w = sub.add_parser("watch", help="стежити за текою і оновлювати звіт")
+    w.add_argument("folder", help="тека, куди надходять ZIP-архіви")
+    _add_common(w)
+    w.add_argument("--interval", type=float, default=POLL_INTERVAL,
+                   help=f"секунди між опитуваннями (за замовчуванням {POLL_INTERVAL:g})")
+    w.set_defaults(func=cmd_watch)
+    return ap
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.output == "-" and _format_for(args) != "csv":
+        _err("❌ У stdout можна писати лише csv.")
+        return 2
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        # читач stdout закрився раніше (… -o - | head) — решту виводу нікуди писати;
+        # stdout → devnull, щоб не впасти ще раз при скиданні буфера на виході
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 141
@@ -0,0 +1,193 @@
+"""Машиночитний експорт для BI: Parquet, Arrow IPC і CSV даних.
+
+На відміну від звіту (report.py), тут немає текстових рядків підсумків:
+пишуться чотири таблиці — позиції, підсумки днів, обороти груп по днях
+і погодинний куб (cube.HourCube) непорожніми клітинками.
+Позиції ідуть у порядку файлів пакетами по BATCH_ROWS рядків прямо з
+колонок RecordStore (у режимі spill — з mmap), тож пам'ять обмежена
+розміром пакета. Суми — цілі
+копійки; amount_cents позиції — до знижки, disc_cents — її знижка, тож
+amount_cents − disc_cents сходиться з чистими сумами днів і груп.
+ПДВ — гривні (float), бо має дробові копійки.
+
+pyarrow потрібен лише для Parquet/Arrow і імпортується всередині функцій.
+"""
+import csv
+import datetime
+import os
+
+from .aggregate import TAX_MAP
+from .cube import HOUR_FIELDS
+from .store import NO_TS, OP_NAMES, fmt_date, fmt_time
+from .vat import split, vat
+
+BATCH_ROWS = 1 << 20
+
+ITEM_FIELDS = ["ts", "check_no", "name", "amount_cents", "disc_cents", "operation", "tax_code"]
+DAY_FIELDS  = ["date", "sales_cents", "returns_cents", "net_cents"]
+TAX_FIELDS  = ["date", "tax_group", "rate_pct", "turnover_cents", "vat_uah"]
+
+
+def companion_path(path, table):
+    """report.parquet → report.days.parquet — файл для допоміжної таблиці."""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{table}{ext}"
+
+
+def _date(s):
+    return None if s == "Невідомо" else datetime.date.fromisoformat(s)
+
+
+def _ts_text(ts):
+    return "" if ts == NO_TS else f"{fmt_date(ts)} {fmt_time(ts)}"
+
+
+def iter_summary_rows(part):
+    """(рядки днів, рядки груп) у порядку дат — значення як у DAY_FIELDS/TAX_FIELDS.
+
+    Група, чия ставка змінилась протягом дня, дає рядок на кожну епоху ставки.
+    """
+    days, taxes = [], []
+    for date, (s, r, tx) in sorted(part.days.items()):
+        d = _date(date)
+        days.append((d, s, r, s - r))
+        for k in sorted(tx, key=split):
+            code, epoch = split(k)
+            pct = part.rates.pct(code, epoch)
+            taxes.append((d, TAX_MAP[str(code)], pct, tx[k], vat(tx[k], pct)))
+    return days, taxes
+
+
+def iter_hour_rows(part):
+    """Клітинки part.hours як HOUR_FIELDS: група — літера (None — сума чека)."""
+    for date, h, g, op, cents, checks in part.hours.rows():
+        yield date, h, g and TAX_MAP[str(g)], OP_NAMES[op], cents, checks
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  ARROW / PARQUET
+# ══════════════════════════════════════════════════════════════════════════════
+def _import_arrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError as err:
+        raise ImportError("Для Parquet/Arrow потрібен pyarrow: pip install pyarrow") from err
+    return pa, pc
+
+
+def _item_schema(pa):
+    return pa.schema([
+        ("ts",           pa.timestamp("s")),
+        ("check_no",     pa.dictionary(pa.int32(), pa.string())),
+        ("name",         pa.dictionary(pa.int32(), pa.string())),
+        ("amount_cents", pa.int64()),
+        ("disc_cents",   pa.int64()),
+        ("operation",    pa.dictionary(pa.int8(), pa.string())),
+        ("tax_code",     pa.uint8()),
+    ])
+
+
+def _iter_item_batches(store, pa, pc):
+    """RecordBatch-і позицій; числові колонки — без копіювання з array."""
+    n      = len(store)
+    names  = pa.array(store.names, pa.string())
+    nos    = pa.array(store.nos, pa.string())
+    ops    = pa.array(OP_NAMES, pa.string())
+    schema = _item_schema(pa)
+    bufs   = {col: pa.py_buffer(store.buffer(col))
+              for col in ("ts", "amount", "disc", "check", "op", "name", "tx")}
+
+    def col(typ, key, a, b):
+        return pa.Array.from_buffers(typ, b - a, [None, bufs[key]], offset=a)
+
+    for a in range(0, n, BATCH_ROWS):
+        b  = min(n, a + BATCH_ROWS)
+        ts = pc.strptime(pc.cast(col(pa.int64(), "ts", a, b), pa.string()),
+                         format="%Y%m%d%H%M%S", unit="s", error_is_null=True)
+        yield pa.record_batch([
+            ts,
+            pa.DictionaryArray.from_arrays(col(pa.int32(), "check", a, b), nos),
+            pa.DictionaryArray.from_arrays(col(pa.int32(), "name", a, b), names),
+            col(pa.int64(), "amount", a, b),
+            col(pa.int64(), "disc", a, b),
+            pa.DictionaryArray.from_arrays(col(pa.int8(), "op", a, b), ops),
+            col(pa.uint8(), "tx", a, b),
+        ], schema=schema)
+
+
+def _summary_tables(part, pa):
+    days, taxes = iter_summary_rows(part)
+    day_t = pa.table(list(zip(*days)) or [[]] * len(DAY_FIELDS), schema=pa.schema([
+        ("date", pa.date32()), ("sales_cents", pa.int64()),
+        ("returns_cents", pa.int64()), ("net_cents", pa.int64())]))
+    tax_t = pa.table(list(zip(*taxes)) or [[]] * len(TAX_FIELDS), schema=pa.schema([
+        ("date", pa.date32()), ("tax_group", pa.string()), ("rate_pct", pa.float64()),
+        ("turnover_cents", pa.int64()), ("vat_uah", pa.float64())]))
+    hours = list(iter_hour_rows(part))
+    hour_t = pa.table(list(zip(*hours)) or [[]] * len(HOUR_FIELDS), schema=pa.schema([
+        ("date", pa.date32()), ("hour", pa.int8()), ("tax_group", pa.string()),
+        ("operation", pa.string()), ("cents", pa.int64()), ("checks", pa.int32())]))
+    return day_t, tax_t, hour_t
+
+
+def write_parquet(part, path):
+    """Позиції → path, підсумки → *.days, *.taxes і *.hours.parquet."""
+    pa, pc = _import_arrow()
+    import pyarrow.parquet as pq
+
+    with pq.ParquetWriter(path, _item_schema(pa)) as w:
+        for batch in _iter_item_batches(part.store, pa, pc):
+            w.write_batch(batch)
+    for table, t in zip(("days", "taxes", "hours"), _summary_tables(part, pa)):
+        pq.write_table(t, companion_path(path, table))
+
+
+def write_arrow(part, path):
+    """Arrow IPC (Feather v2): позиції → path, підсумки — у сусідні файли."""
+    pa, pc = _import_arrow()
+
+    with pa.OSFile(path, "wb") as f, pa.ipc.new_file(f, _item_schema(pa)) as w:
+        for batch in _iter_item_batches(part.store, pa, pc):
+            w.write_batch(batch)
+    for table, t in zip(("days", "taxes", "hours"), _summary_tables(part, pa)):
+        with pa.OSFile(companion_path(path, table), "wb") as f, \
+             pa.ipc.new_file(f, t.schema) as w:
+            w.write_table(t)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  CSV
+# ══════════════════════════════════════════════════════════════════════════════
+def write_csv_data(part, path):
+    """Ті самі чотири таблиці у CSV (UTF-8), позиції — пакетами по BATCH_ROWS."""
+    store = part.store
+    names = store.names
+    nos   = store.nos
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(ITEM_FIELDS)
+        for a in range(0, len(store), BATCH_ROWS):
+            b = a + BATCH_ROWS
+            w.writerows(
+                (_ts_text(ts), nos[no], names[nm], amt, disc,
+                 OP_NAMES[op], tx)
+                for ts, no, nm, amt, disc, op, tx in zip(
+                    store.ts[a:b], store.check[a:b], store.name[a:b],
+                    store.amount[a:b], store.disc[a:b], store.op[a:b], store.tx[a:b]))
+
+    days, taxes = iter_summary_rows(part)
+    hours = ((d, h, g or "", op, c, n) for d, h, g, op, c, n in iter_hour_rows(part))
+    for table, fields, rows in (("days", DAY_FIELDS, days), ("taxes", TAX_FIELDS, taxes),
+                                ("hours", HOUR_FIELDS, hours)):
+        with open(companion_path(path, table), "w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(fields)
+            w.writerows(rows)
+
+
+DATA_WRITERS = {
+    "parquet":  write_parquet,
+    "arrow":    write_arrow,
+    "csv-data": write_csv_data,
+}
@@ -0,0 +1,155 @@
+"""Куб день × година × податкова група × операція.
+
+Для кожного дня — два щільні списки по CELLS = HOURS * GROUPS * 2 клітинок:
+копійки й кількість чеків. Група 0 — увесь чек (E@SM), 1..8 — обіг
+податкових груп. Куб наповнюється в тому самому проході, що й підсумки
+днів Partial, тож зрізи (години за період, профіль тижня, ПДВ груп по
+годинах) лише складають кілька десятків клітинок на день і не торкаються
+ні чеків, ні позицій.
+"""
+import datetime
+
+from .store import OP_RETURN, OP_SALE
+from .vat import vat
+
+HOURS  = 24
+GROUPS = 9      # 0 — увесь чек, 1..8 — коди груп ПДВ
+CELLS  = HOURS * GROUPS * 2
+
+ALL = 0
+
+# що показувати в клітинці зрізу
+VALUES = ("net", "sales", "returns", "checks")
+
+WEEKDAYS = ("Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Нд")
+
+HOUR_FIELDS = ["date", "hour", "tax_group", "operation", "cents", "checks"]
+
+HOUR_COLUMNS = ["Дата"] + [f"{h:02d}" for h in range(HOURS)] + ["Разом"]
+
+
+def cell(hour, group, op):
+    """Індекс клітинки в списках дня."""
+    return (hour * GROUPS + group) * 2 + op
+
+
+def _key(date):
+    return int(date.replace("-", ""))
+
+
+def _date(d):
+    return datetime.date(d // 10000, d // 100 % 100, d % 100)
+
+
+class HourCube:
+    __slots__ = ("_days",)
+
+    def __init__(self):
+        self._days = {}     # {день YYYYMMDD: ([копійки], [чеки]) по CELLS клітинок}
+
+    def __len__(self):
+        return len(self._days)
+
+    def day(self, d):
+        """Клітинки дня d (створюються порожніми при першому зверненні)."""
+        arrs = self._days.get(d)
+        if arrs is None:
+            arrs = self._days[d] = ([0] * CELLS, [0] * CELLS)
+        return arrs
+
+    def dates(self, first=None, last=None):
+        """Ключі днів у [first, last] ('YYYY-MM-DD' включно) за зростанням."""
+        lo = _key(first) if first else 0
+        hi = _key(last) if last else 99999999
+        return sorted(d for d in self._days if lo <= d <= hi)
+
+    def _series(self, d, group, value):
+        cents, checks = self._days[d]
+        i = group * 2
+        if value == "checks":
+            return [checks[i + h * GROUPS * 2] + checks[i + h * GROUPS * 2 + 1]
+                    for h in range(HOURS)]
+        out = []
+        for h in range(HOURS):
+            k = i + h * GROUPS * 2
+            if value == "net":
+                out.append(cents[k + OP_SALE] - cents[k + OP_RETURN])
+            else:
+                out.append(cents[k + (OP_SALE if value == "sales" else OP_RETURN)])
+        return out
+
+    # ─── Зрізи ────────────────────────────────────────────────────────────────
+    def hourly(self, first=None, last=None, group=ALL, value="net"):
+        """[24 суми value] за період — копійки або кількість чеків."""
+        out = [0] * HOURS
+        for d in self.dates(first, last):
+            for h, v in enumerate(self._series(d, group, value)):
+                out[h] += v
+        return out
+
+    def heatmap(self, first=None, last=None, group=ALL, value="net"):
+        """[(дата 'YYYY-MM-DD', [24 значення])] — рядок на кожен день."""
+        return [(_date(d).isoformat(), self._series(d, group, value))
+                for d in self.dates(first, last)]
+
+    def weekday_profile(self, first=None, last=None, group=ALL, value="net"):
+        """([7][24] суми, [7] кількість днів) — для середнього по днях тижня."""
+        sums = [[0] * HOURS for _ in WEEKDAYS]
+        days = [0] * len(WEEKDAYS)
+        for d in self.dates(first, last):
+            wd = _date(d).weekday()
+            days[wd] += 1
+            row = sums[wd]
+            for h, v in enumerate(self._series(d, group, value)):
+                row[h] += v
+        return sums, days
+
+    def hourly_vat(self, rates, first=None, last=None):
+        """{код групи: [24 ПДВ у гривнях]} з обігу продажу мінус повернення.
+
+        rates — RateTimeline (Partial.rates); групи без чеків пропускаються.
+        Якщо ставка групи змінювалась, кожна година дня береться за ставкою,
+        що діяла наприкінці цієї години.
+        """
+        out = {}
+        for g in range(1, GROUPS):
+            if not any(self.hourly(first, last, g, "checks")):
+                continue
+            if len(rates.epochs(g)) < 2:
+                pct = rates.pct(g)
+                out[str(g)] = [vat(c, pct) for c in self.hourly(first, last, g, "net")]
+                continue
+            row = [0.0] * HOURS
+            for d in self.dates(first, last):
+                for h, c in enumerate(self._series(d, g, "net")):
+                    if c:
+                        row[h] += vat(c, rates.pct_at(g, d * 1000000 + h * 10000 + 5959))
+            out[str(g)] = row
+        return out
+
+    def rows(self):
+        """Непорожні клітинки рядками HOUR_FIELDS (date — datetime.date).
+
+        tax_group — код групи 1..8 або None для суми чека; operation — 0/1.
+        """
+        for d in self.dates():
+            date = _date(d)
+            cents, checks = self._days[d]
+            for h in range(HOURS):
+                for g in range(GROUPS):
+                    for op in (OP_SALE, OP_RETURN):
+                        k = cell(h, g, op)
+                        if checks[k]:
+                            yield date, h, g or None, op, cents[k], checks[k]
+
+
+def iter_heatmap_rows(cube, value="net"):
+    """Рядки аркуша «Години»: дні × години в гривнях, далі — порожній
+    рядок і середній день тижня (лише дні, що є в даних)."""
+    for date, row in cube.heatmap(value=value):
+        yield [date] + [c / 100 for c in row] + [sum(row) / 100]
+    sums, days = cube.weekday_profile(value=value)
+    yield []
+    for wd, row, n in zip(WEEKDAYS, sums, days):
+        if n:
+            yield [f"{wd}, сер."] + [c / 100 / n for c in row] + [sum(row) / 100 / n]
@@ -0,0 +1,63 @@
+"""Індекс уже завантажених чеків для злиття кількох архівів.
+
+Чек ідентифікується трійкою (номер РРО, час, номер чека). Номер — рядок
+E@NO як є ("00123" і "123" — різні чеки), тож індекс кодує номери у
+власному словнику. Для кожного РРО — окрема множина цілих
+ts * 10⁹ + код номера: компактніше за кортежі, а перевірка й додавання —
+один прохід по хешу.
+"""
+from .store import NO_TS
+
+_NO_SPAN = 1000000000       # кодів номерів менше, ніж 10⁹
+
+
+class CheckIndex:
+    __slots__ = ("_by_reg", "_nos", "_n")
+
+    def __init__(self):
+        self._by_reg = {}   # {РРО: {ts * 10⁹ + код номера}}
+        self._nos    = {}   # номер чека → код
+        self._n      = 0
+
+    def __len__(self):
+        return self._n
+
+    def clear(self):
+        self._by_reg.clear()
+        self._nos.clear()
+        self._n = 0
+
+    def seen(self, reg, ts, no):
+        """True, якщо чек уже є в індексі (індекс не змінюється)."""
+        if ts == NO_TS or not no:
+            return False
+        code = self._nos.get(no)
+        keys = self._by_reg.get(reg)
+        return code is not None and keys is not None and ts * _NO_SPAN + code in keys
+
+    def seen_or_add(self, reg, ts, no):
+        """True, якщо чек уже є; інакше запам'ятовує його і повертає False.
+
+        Чеки без коректного часу чи номера не дедуплікуються — їх не
+        відрізнити від інших таких самих.
+        """
+        if ts == NO_TS or not no:
+            return False
+        keys = self._by_reg.get(reg)
+        if keys is None:
+            keys = self._by_reg[reg] = set()
+        code = self._nos.get(no)
+        if code is None:
+            code = self._nos[no] = len(self._nos)
+        key = ts * _NO_SPAN + code
+        if key in keys:
+            return True
+        keys.add(key)
+        self._n += 1
+        return False
+
+    def add_partial(self, part):
+        """Заносить у індекс усі чеки part (наприклад, щойно відкритого архіву)."""
+        oc = part.checks
+        for k in range(len(oc)):
+            self.seen_or_add(oc.regs[oc.reg[k]], oc.ts[k], oc.nos[oc.no[k]])
@@ -0,0 +1,170 @@
+"""Потоковий парсер XML-експорту Марія-304Т3.
+
+Файл читається шматками, блоки <DAT>…</DAT> вирізаються на льоту і
+подаються в інкрементальний expat-парсер. Дерево елементів не будується:
+чеки блоку віддаються одразу після його </DAT>, а P/D/E кожного <C>
+обходяться рівно один раз. Пам'ять обмежена розміром блоку, а не файлу.
+"""
+from typing import NamedTuple
+from xml.parsers import expat
+
+CHUNK_SIZE = 1 << 16
+
+# Змінювати при будь-якій зміні Check/Partial — інвалідовує дисковий кеш
+PARSER_VERSION = 11
+
+_DAT_OPEN  = b"<DAT"
+_DAT_CLOSE = b"</DAT>"
+
+
+class Check(NamedTuple):
+    is_return: bool
+    ts:        str
+    no:        str
+    total:     int     # |E@SM|, копійки
+    tx_code:   str     # E@TX
+    tx_pct:    float   # E@TXPR
+    turnover:  dict    # {TX: Σ P@SM − Σ D@SM}, копійки
+    items:     list    # [[NM, |P@SM|, TX, Σ D@SM на цю позицію]]
+    register:  str     # DAT@FN (або DAT@ZN) — фіскальний номер РРО
+
+
+def _new_parser(out):
+    """Створює expat-парсер одного блоку <DAT>, що складає чеки в out.
+
+    Стан поточного <C> тримається в замиканні: обробники викликаються
+    на кожен елемент, і локальні змінні тут помітно швидші за атрибути.
+    """
+    depth = 0            # глибина всередині поточного <C>, 0 — поза чеком
+    reg   = ""           # номер РРО з атрибутів <DAT>
+    ret   = False
+    e     = None
+    trn   = None
+    items = None
+
+    def start(tag, a):
+        nonlocal depth, reg, ret, e, trn, items
+        if depth:
+            depth += 1
+            if tag == "P":
+                tx = a.get("TX", "")
+                sm = int(a.get("SM", 0))
+                trn[tx] = trn.get(tx, 0) + sm
+                items.append([a.get("NM", "Без назви"), abs(sm), tx, 0])
+            elif tag == "D":
+                tx = a.get("TX", "")
+                sm = int(a.get("SM", 0))
+                trn[tx] = trn.get(tx, 0) - sm
+                # знижка йде слідом за своєю позицією; знижка на чек — лише в обігу групи
+                if items and items[-1][2] == tx:
+                    items[-1][3] += sm
+            elif tag == "E" and e is None:
+                e = a
+        elif tag == "C":
+            depth = 1
+            ret   = a.get("T", "0") == "1"
+            e     = None
+            trn   = {}
+            items = []
+        elif tag == "DAT":
+            reg = a.get("FN") or a.get("ZN", "")
+
+    def end(tag):
+        nonlocal depth
+        if not depth:
+            return
+        depth -= 1
+        if depth or e is None:
+            return
+        out.append(Check(
+            ret,
+            e.get("TS", ""),
+            e.get("NO", ""),
+            abs(int(e.get("SM", 0))),
+            e.get("TX", ""),
+            float(e.get("TXPR", 0)),
+            trn,
+            items,
+            reg,
+        ))
+
+    p = expat.ParserCreate()
+    p.StartElementHandler = start
+    p.EndElementHandler   = end
+    p.Parse(b"<root>", False)
+    return p
+
+
+def iter_checks(stream, on_error=None, chunk_size=CHUNK_SIZE):
+    """Генерує Check з бінарного потоку по мірі надходження даних.
+
+    Помилка розбору блоку <DAT> передається в on_error(err), і блок
+    відкидається цілком — разом із чеками, розібраними до помилки, як
+    це робив колишній розбір regex + fromstring. Тому чеки блоку
+    накопичуються в block і переходять в out лише після його </DAT>;
+    парсинг продовжується з наступного <DAT>.
+    """
+    out    = []
+    block  = []            # чеки поточного <DAT>, ще не підтверджені його кінцем
+    parser = None          # парсер поточного <DAT>; None — поза блоком
+    broken = False         # блок зламаний — чекаємо його кінця
+    buf    = b""
+    keep   = len(_DAT_CLOSE) - 1
+
+    while True:
+        chunk = stream.read(chunk_size)
+        buf = buf + chunk if buf else chunk
+        pos = 0                # початок необробленої частини buf; хвіст зсувається раз на шматок
+
+        while True:
+            if parser is None and not broken:
+                i = buf.find(_DAT_OPEN, pos)
+                if i < 0:
+                    pos = max(pos, len(buf) - (len(_DAT_OPEN) - 1)) if chunk else len(buf)
+                    break
+                pos    = i
+                parser = _new_parser(block)
+
+            j = buf.find(_DAT_CLOSE, pos)
+            if j < 0:
+                if not chunk:
+                    if parser is not None and not broken and on_error:
+                        on_error(expat.ExpatError("незавершений блок <DAT>"))
+                    parser, broken, pos = None, False, len(buf)
+                    block.clear()
+                elif len(buf) - pos > keep:
+                    cut = len(buf) - keep
+                    if not broken:
+                        broken = _feed(parser, buf[pos:cut], False, on_error)
+                    pos = cut
+                break
+
+            end = j + len(_DAT_CLOSE)
+            if not broken:
+                broken = (_feed(parser, buf[pos:end], False, on_error)
+                          or _feed(parser, b"</root>", True, on_error))
+            if not broken:
+                out.extend(block)
+            block.clear()
+            parser, broken, pos = None, False, end
+
+            yield from out
+            out.clear()
+
+        if pos:
+            buf = buf[pos:]
+        yield from out
+        out.clear()
+        if not chunk:
+            return
+
+
+def _feed(parser, data, final, on_error):
+    """Подає дані в parser; повертає True, якщо блок зламаний."""
+    try:
+        parser.Parse(data, final)
+    except expat.ExpatError as err:
+        if on_error:
+            on_error(err)
+        return True
+    return False
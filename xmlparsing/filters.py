@@ -0,0 +1,306 @@
+"""Фільтр позицій за датами, типом операції (C@T) і групою ПДВ (P@TX).
+
+FilterIndex будується ліниво — при першому фільтрі після сортування — і
+тримає бітові маски над порядком order: біт p відповідає позиції order[p]. Маска — звичайне ціле Python,
+тож І/АБО над мільйонами позицій — одна операція над цілими. Діапазон
+дат — це суцільний відрізок відсортованого order (межі — bisect за часом),
+маски операцій і груп будуються через bytes.translate без циклу по
+позиціях.
+
+Підсумки вибірки (FilterIndex.view) без фільтра груп беруться з чеків
+CheckTable — E@SM і обіги груп зі знижками, так само як у
+Partial.day_totals, — лише для днів і операцій фільтра. З фільтром груп
+сумуються чисті суми позицій (P@SM − D@SM) по масках: для кожної пари
+(операція, група) сума кожного дня — sum(compress(...)) на рівні C, без
+Python-циклу по рядках. Епоха ставки ПДВ — теж суцільний відрізок order,
+тож обіг групи, чия ставка змінювалась, ділиться на епохи ще однією маскою.
+"""
+import bisect
+from array import array
+from itertools import compress, islice
+from typing import NamedTuple
+
+from . import aggregate
+from .aggregate import TAX_MAP, RunningStats, totals_by_date
+from .store import NO_TS, OP_RETURN, OP_SALE, fmt_date
+from .vat import EPOCH_SHIFT
+
+_SEL    = bytes.maketrans(b"01", b"\x00\x01")     # '0'/'1' → селектор для compress
+_GROUPS = {int(code) for code in TAX_MAP}
+
+
+def _ts_key(date):
+    """'YYYY-MM-DD' → YYYYMMDD000000."""
+    return int(date.replace("-", "")) * 1000000
+
+
+def _day_key(date):
+    """'YYYY-MM-DD' → YYYYMMDD."""
+    return int(date.replace("-", ""))
+
+
+def _mask(col, value):
+    """Біти позицій, де col (bytes) дорівнює value."""
+    table = bytes(49 if b == value else 48 for b in range(256))
+    return int(col.translate(table)[::-1], 2)
+
+
+def _selector(mask):
+    """Маска → bytes з 0/1 на кожну позицію (для compress і bytes.count)."""
+    return format(mask, "b")[::-1].encode("ascii").translate(_SEL) if mask else b""
+
+
+class RowFilter(NamedTuple):
+    first:  str   = None    # 'YYYY-MM-DD' включно, None — без межі
+    last:   str   = None
+    ops:    tuple = ()      # OP_SALE / OP_RETURN; порожньо — будь-яка операція
+    groups: tuple = ()      # коди P@TX (0 — без групи); порожньо — будь-яка група
+    any_of: bool  = False   # True — ops АБО groups, інакше ops І groups
+
+    @property
+    def active(self):
+        return bool(self.first or self.last or self.ops or self.groups)
+
+
+class FilteredView(NamedTuple):
+    rows:   array   # індекси позицій store за часом
+    spans:  list    # [(дата, початок, кінець)] у rows
+    totals: dict    # як Partial.day_totals
+    stats:  RunningStats
+
+
+class FilterIndex:
+    __slots__ = ("n", "_store", "_checks", "_n_checks", "_order", "_spans", "_op", "_tx",
+                 "_amount", "_check", "_days", "_days_bounds")
+
+    def __init__(self, store, checks, order, spans=None):
+        self.n      = len(order)
+        self._store = store
+        self._checks   = checks
+        self._n_checks = len(checks)    # чеки, що вже є в order; нові не читаються
+        self._order = order
+        self._spans = store.day_spans(order) if spans is None else spans
+        self._op    = {}
+        self._tx    = {}
+        self._days        = None    # кеш _check_days
+        self._days_bounds = None    # межі епох, з якими він зібраний
+        # чисті суми (після знижок) і номери чеків у порядку order — compress
+        # бере їх без індексації; у режимі spill ці копії теж лежать на диску
+        amount, disc = store.amount, store.disc
+        self._amount = store.new_column("q")
+        self._amount.extend(amount[i] - disc[i] for i in order)
+        self._check  = store.new_column("i")
+        self._check.extend(map(store.check.__getitem__, order))
+        if not self.n:
+            return
+        for masks, col in ((self._op, store.op), (self._tx, store.tx)):
+            values = bytes(map(col.__getitem__, order))
+            for v in set(values):
+                masks[v] = _mask(values, v)
+
+    # ─── Маски ────────────────────────────────────────────────────────────────
+    def all(self):
+        return (1 << self.n) - 1
+
+    @staticmethod
+    def _between(a, b):
+        """Позиції a..b-1 відсортованого order."""
+        return ((1 << b) - 1) ^ ((1 << a) - 1) if b > a else 0
+
+    def _at(self, ts):
+        """Перша позиція order з часом не раніше ts."""
+        return bisect.bisect_left(self._order, ts, key=self._store.ts.__getitem__)
+
+    def dates(self, first=None, last=None):
+        """Позиції з датою в [first, last]; з будь-якою межею «Невідомо» не входить."""
+        a = self._at(_ts_key(first)) if first else 0
+        if last:
+            b = self._at(_ts_key(last) + 1000000)
+        elif first:
+            b = self._at(NO_TS)
+        else:
+            b = self.n
+        return self._between(a, b)
+
+    def epochs(self, starts):
+        """[маска епохи] для початків епох 1.. (RateTimeline.bounds)."""
+        cuts = [0] + [self._at(ts) for ts in starts] + [self.n]
+        return [self._between(a, b) for a, b in zip(cuts, cuts[1:])]
+
+    def ops(self, *ops):
+        out = 0
+        for v in ops:
+            out |= self._op.get(v, 0)
+        return out
+
+    def groups(self, *codes):
+        out = 0
+        for v in codes:
+            out |= self._tx.get(v, 0)
+        return out
+
+    def mask(self, flt):
+        """Маска для RowFilter: дати І (операції І/АБО групи)."""
+        conds = []
+        if flt.ops:
+            conds.append(self.ops(*flt.ops))
+        if flt.groups:
+            conds.append(self.groups(*flt.groups))
+        m = self.all()
+        if conds:
+            m = conds[0] | conds[-1] if flt.any_of else conds[0] & conds[-1]
+        if flt.first or flt.last:
+            m &= self.dates(flt.first, flt.last)
+        return m
+
+    # ─── Результат ────────────────────────────────────────────────────────────
+    @staticmethod
+    def count(mask):
+        return mask.bit_count()
+
+    def rows(self, mask):
+        """Індекси позицій store під маскою — у порядку order (за часом)."""
+        return array("q", compress(self._order, _selector(mask)))
+
+    def view(self, flt, rates):
+        """FilteredView для RowFilter flt: позиції, межі їхніх днів і підсумки.
+
+        rates — RateTimeline, за епохами якого ділиться обіг груп.
+        """
+        mask = self.mask(flt)
+        sel  = _selector(mask)
+        rows = array("q", compress(self._order, sel))
+        if flt.groups:
+            return self._item_view(mask, sel, rows, rates)
+
+        first = _day_key(flt.first) if flt.first else 0
+        last  = _day_key(flt.last) if flt.last else NO_TS
+        bound = bool(flt.first or flt.last)
+        ops   = flt.ops or (OP_SALE, OP_RETURN)
+        st    = RunningStats()
+        acc   = {}
+        for d, day in self._check_days(rates).items():
+            if not first <= d <= last or (bound and d == NO_TS // 1000000):
+                continue
+            date, taxes, k = day[2], {}, 0
+            tot = [0, 0, taxes]
+            for op in ops:
+                total, tx, keys, n = day[op]
+                k += n
+                tot[op] = total
+                st._checks.update(keys)
+                for e, v in tx.items():
+                    taxes[e]    = taxes.get(e, 0) + v
+                    st.taxes[e] = st.taxes.get(e, 0) + v
+            if not k:
+                continue
+            acc[date] = tot
+            st._days.add(d)
+            st.sales   += tot[OP_SALE]
+            st.returns += tot[OP_RETURN]
+        return FilteredView(rows, self._row_spans(sel), totals_by_date(acc, rates), st)
+
+    def _row_spans(self, sel):
+        spans, pos = [], 0
+        for date, a, b in self._spans:
+            k = sel.count(1, a, b)
+            if k:
+                spans.append((date, pos, pos + k))
+                pos += k
+        return spans
+
+    def _check_days(self, rates):
+        """{день: [підсумки продажу, повернення, дата]} з чеків CheckTable.
+
+        Підсумки операції — [Σ E@SM, {vat.key: обіг}, ключі чеків з
+        позиціями, кількість чеків] — ті самі, що збирає Partial._aggregate;
+        перебудовуються, лише коли зсунулись межі епох ставок.
+        """
+        bounds = rates.bounds()
+        if self._days is not None and bounds == self._days_bounds:
+            return self._days
+        c     = self._checks
+        end   = self._n_checks
+        days  = {}
+        last  = None
+        j0    = 0
+        for a in range(0, end, aggregate.AGG_BLOCK):
+            b     = min(a + aggregate.AGG_BLOCK, end)
+            j1    = c.tx_off[b - 1] + c.tx_n[b - 1]
+            codes = c.tx_code[j0:j1]
+            cents = c.tx_cents[j0:j1]
+            j     = 0
+            j0    = j1
+            for t, no, op, total, cnt, n in zip(c.ts[a:b], c.no[a:b], c.op[a:b],
+                                                c.total[a:b], c.count[a:b], c.tx_n[a:b]):
+                d = t // 1000000
+                if d != last:
+                    day = days.get(d)
+                    if day is None:
+                        day = days[d] = [[0, {}, set(), 0], [0, {}, set(), 0], fmt_date(t)]
+                    last = d
+                cur = day[op]
+                cur[0] += total
+                cur[3] += 1
+                if cnt:
+                    cur[2].add(d * 1000000001 + no + 1)
+                taxes = cur[1]
+                for x in range(j, j + n):
+                    code = codes[x]
+                    e    = code
+                    if bounds and code in bounds:
+                        e |= bisect.bisect_right(bounds[code], t) << EPOCH_SHIFT
+                    taxes[e] = taxes.get(e, 0) + cents[x]
+                j += n
+        self._days        = days
+        self._days_bounds = bounds
+        return days
+
+    def _item_view(self, mask, sel, rows, rates):
+        """Підсумки з чистих сум позицій під маскою — для фільтра груп."""
+        store = self._store
+        order = self._order
+        ts    = store.ts
+        st    = RunningStats()
+        spans = []
+        acc   = {}
+        nos   = compress(self._check, sel)
+        pos   = 0
+        for date, a, b in self._spans:
+            k = sel.count(1, a, b)
+            if not k:
+                continue
+            d = ts[order[a]] // 1000000
+            spans.append((date, pos, pos + k))
+            st._checks.update(map((d * 1000000001 + 1).__add__, set(islice(nos, k))))
+            st._days.add(d)
+            acc[date] = [0, 0, {}]
+            pos += k
+
+        # суми по днях — окремо для кожної пари (операція, група) і епохи ставки
+        epochs = {g: self.epochs(starts) for g, starts in rates.bounds().items()}
+        for op, om in self._op.items():
+            for g, gm in self._tx.items():
+                for e, em in enumerate(epochs.get(g, (-1,))):
+                    m = mask & om & gm & em
+                    if not m:
+                        continue
+                    key = g | e << EPOCH_SHIFT
+                    sel = _selector(m)
+                    amt = compress(self._amount, sel)
+                    for date, a, b in self._spans:
+                        k = sel.count(1, a, b)
+                        if not k:
+                            continue
+                        cents = sum(islice(amt, k))
+                        day   = acc[date]
+                        day[op] += cents
+                        if g in _GROUPS:
+                            v = -cents if op else cents
+                            day[2][key]   = day[2].get(key, 0) + v
+                            st.taxes[key] = st.taxes.get(key, 0) + v
+                        if op:
+                            st.returns += cents
+                        else:
+                            st.sales   += cents
+        return FilteredView(rows, spans, totals_by_date(acc, rates), st)
@@ -0,0 +1,153 @@
+"""Інструментація запуску: таймери етапів, лічильники, пікова пам'ять.
+
+RunMetrics збирає дані одного запуску (відкриття архіву, експорт тощо)
+і віддає їх рядками для журналу, JSON-звітом або текстовим файлом у
+форматі Prometheus (для node_exporter textfile collector).
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+COUNTERS = ("files", "bytes", "checks", "items", "cached")
+
+
+def peak_rss_bytes():
+    """Пікова резидентна пам'ять процесу (і дочірніх процесів пулу) або None."""
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class PMC(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                            ("PeakWorkingSetSize", ctypes.c_size_t),
+                            ("WorkingSetSize", ctypes.c_size_t),
+                            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                            ("PagefileUsage", ctypes.c_size_t),
+                            ("PeakPagefileUsage", ctypes.c_size_t)]
+
+            pmc = PMC()
+            pmc.cb = ctypes.sizeof(pmc)
+            proc = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(proc, ctypes.byref(pmc), pmc.cb):
+                return pmc.PeakWorkingSetSize
+        except Exception:
+            pass
+        return None
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss: Linux — КБ, macOS — байти
+    unit = 1 if sys.platform == "darwin" else 1024
+    own  = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    kids = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, kids) * unit
+
+
+class RunMetrics:
+    def __init__(self):
+        self.started  = time.time()
+        self.stages   = {}                          # {етап: секунди}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.errors   = {}                          # {вид помилки: кількість}
+
+    def add_time(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - t)
+
+    def count(self, **counters):
+        for k, v in counters.items():
+            self.counters[k] = self.counters.get(k, 0) + v
+
+    def add_errors(self, errors):
+        for msg in errors:
+            kind = "xml" if msg.startswith("XML error") else "read"
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def add_partial(self, part):
+        """Лічильники з результату парсингу (чеки, позиції, помилки, кеш)."""
+        self.count(checks=len(part.checks), items=len(part.store), cached=part.cached)
+        self.add_errors(part.errors)
+
+    def rates(self):
+        """Пропускна здатність розпакування + парсингу, одиниць за секунду."""
+        sec = self.stages.get("unzip", 0.0) + self.stages.get("parse", 0.0)
+        if sec <= 0:
+            return {}
+        c = self.counters
+        return {"bytes_per_s": c["bytes"] / sec, "checks_per_s": c["checks"] / sec,
+                "items_per_s": c["items"] / sec}
+
+    def as_dict(self):
+        return {
+            "started":    time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "stages_s":   {k: round(v, 4) for k, v in self.stages.items()},
+            "counters":   dict(self.counters),
+            "rates":      {k: round(v, 1) for k, v in self.rates().items()},
+            "errors":     dict(self.errors),
+            "peak_rss_bytes": peak_rss_bytes(),
+        }
+
+    def summary_lines(self):
+        """Рядки для панелі журналу."""
+        c     = self.counters
+        lines = ["⏱ " + "  •  ".join(f"{k} {v:.2f}с" for k, v in self.stages.items())]
+        r = self.rates()
+        if r:
+            lines.append(f"🚀 {r['bytes_per_s'] / 1e6:,.1f} МБ/с  •  {r['checks_per_s']:,.0f} чеків/с"
+                         f"  •  {r['items_per_s']:,.0f} поз./с  ({c['bytes'] / 1e6:,.1f} МБ XML)")
+        n_err = sum(self.errors.values())
+        if n_err:
+            lines.append("❌ Помилок: " + ", ".join(f"{k} {v}" for k, v in self.errors.items()))
+        rss = peak_rss_bytes()
+        if rss:
+            lines.append(f"🧠 Пікова пам'ять: {rss / 2**20:,.0f} МБ")
+        return lines
+
+    # ─── Запис ────────────────────────────────────────────────────────────────
+    def write_json(self, path):
+        _write_atomic(path, json.dumps(self.as_dict(), ensure_ascii=False, indent=2))
+
+    def write_prometheus(self, path):
+        d   = self.as_dict()
+        out = ["# HELP xmlparsing_stage_seconds Тривалість етапу обробки",
+               "# TYPE xmlparsing_stage_seconds gauge"]
+        out += [f'xmlparsing_stage_seconds{{stage="{k}"}} {v}' for k, v in d["stages_s"].items()]
+        for k, v in d["counters"].items():
+            out += [f"# TYPE xmlparsing_{k}_total counter", f"xmlparsing_{k}_total {v}"]
+        out += ["# HELP xmlparsing_parse_errors_total Помилки парсингу за видом",
+                "# TYPE xmlparsing_parse_errors_total counter"]
+        out += [f'xmlparsing_parse_errors_total{{kind="{k}"}} {v}' for k, v in d["errors"].items()]
+        if d["peak_rss_bytes"]:
+            out += ["# TYPE xmlparsing_peak_rss_bytes gauge",
+                    f"xmlparsing_peak_rss_bytes {d['peak_rss_bytes']}"]
+        out += ["# TYPE xmlparsing_last_run_timestamp_seconds gauge",
+                f"xmlparsing_last_run_timestamp_seconds {self.started:.0f}"]
+        _write_atomic(path, "\n".join(out) + "\n")
+
+
+def _write_atomic(path, text):
+    """Через тимчасовий файл — збирач ніколи не побачить недописаний файл."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except OSError:
+        try: os.remove(tmp)
+        except OSError: pass
+        raise
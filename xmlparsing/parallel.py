@@ -0,0 +1,87 @@
+"""Паралельний парсинг архіву в пулі процесів.
+
+Кожен процес отримує шлях до архіву і пакет імен, сам розпаковує свої
+файли і повертає Partial. Батьківський процес зливає частини в порядку
+пакетів, тож результат збігається з послідовним режимом до копійки.
+"""
+import os
+import time
+
+from .aggregate import Partial, parse_cached, parse_stream
+from .archive import iter_xml_members
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+BATCHES_PER_WORKER = 4      # дрібніші пакети — рівніше навантаження
+
+
+def parse_members(zip_path, names, cache=None):
+    """Робоча функція процесу: пакет членів архіву → Partial."""
+    part = Partial()
+    for name, stream in iter_xml_members(zip_path, names, workers=1):
+        if cache is None:
+            parse_stream(stream, os.path.basename(name), part)
+        else:
+            part.merge(parse_cached(stream, os.path.basename(name), cache))
+    return part
+
+
+def parse_archive(zip_path, names, workers=1, on_progress=None, cache=None, metrics=None,
+                  spill=None, on_partial=None):
+    """Парсить .xml-члени names архіву і повертає злитий Partial.
+
+    workers <= 1 — послідовний режим у поточному потоці. on_progress
+    викликається як on_progress(оброблено файлів, нові помилки).
+    cache — ResultCache для пропуску незмінених файлів (або None).
+    metrics — RunMetrics: у послідовному режимі очікування розпакування
+    ("unzip") і парсинг ("parse") міряються окремо, у пулі — лише "parse".
+    spill — Spill: колонки результату скидаються на диск (режим з
+    обмеженою пам'яттю); частини з пулу й кешу доливаються туди ж.
+    on_partial(total) викликається в тому ж потоці після кожного файлу
+    (у пулі — після кожного пакета) з результатом, накопиченим досі.
+    """
+    total = Partial(spill)
+    clock = time.perf_counter
+
+    if workers <= 1 or len(names) < 2:
+        t = clock()
+        for idx, (name, stream) in enumerate(iter_xml_members(zip_path, names), 1):
+            t1 = clock()
+            n_err = len(total.errors)
+            if cache is None:
+                parse_stream(stream, os.path.basename(name), total)
+            else:
+                total.merge(parse_cached(stream, os.path.basename(name), cache))
+            if metrics is not None:
+                metrics.add_time("unzip", t1 - t)
+                metrics.add_time("parse", clock() - t1)
+            if on_progress:
+                on_progress(idx, total.errors[n_err:])
+            if on_partial:
+                on_partial(total)
+            t = clock()
+        if cache is not None:
+            cache.trim()
+        return total
+
+    # пул процесів імпортується лише тут — не сповільнює старт GUI і CLI
+    from concurrent.futures import ProcessPoolExecutor
+
+    size    = max(1, -(-len(names) // (workers * BATCHES_PER_WORKER)))
+    batches = [names[i:i + size] for i in range(0, len(names), size)]
+    done    = 0
+    t       = clock()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(parse_members, zip_path, b, cache) for b in batches]
+        for batch, fut in zip(batches, futures):
+            piece = fut.result()
+            total.merge(piece)
+            done += len(batch)
+            if on_progress:
+                on_progress(done, piece.errors)
+            if on_partial:
+                on_partial(total)
+    if metrics is not None:
+        metrics.add_time("parse", clock() - t)
+    if cache is not None:
+        cache.trim()
+    return total
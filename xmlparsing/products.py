@@ -0,0 +1,112 @@
+"""Аналітика по товарах: виручка, кількість, повернення, частка обігу.
+
+ProductStats наповнює Partial._aggregate у тому самому проході по чеках,
+що й підсумки днів: позиції кожного чека лягають у словники
+{день: {код назви: [продаж, позицій, повернення, позицій повернень]}} і
+такий самий словник за весь період. Суми — чисті (P@SM − D@SM), як обіг
+груп, а частка рахується від обігу продажу днів (Σ E@SM), тож рейтинг
+сходиться з підсумками таблиці. Запити top-N / bottom-N обходять ці
+словники через heapq і не торкаються позицій.
+"""
+import heapq
+from typing import NamedTuple
+
+from .store import NO_TS
+
+_NO_DAY = NO_TS // 1000000
+
+PRODUCT_COLUMNS = ["№", "Найменування", "Виручка (грн)", "Позицій",
+                   "Повернення (грн)", "Повернення, %", "Частка обігу, %"]
+
+
+class ProductRow(NamedTuple):
+    name:        str
+    revenue:     int      # продаж після знижок, копійки
+    count:       int      # позицій продажу
+    returns:     int      # повернення після знижок, копійки
+    return_rate: float    # повернення / продаж, %
+    share:       float    # частка в обігу продажу вибраного періоду, %
+
+
+def _rate(e):
+    if e[0]:
+        return e[2] * 100 / e[0]
+    return float("inf") if e[2] else 0.0
+
+
+# ключі для heapq за полем ProductRow
+_KEYS = {
+    "revenue":     lambda item: item[1][0],
+    "count":       lambda item: item[1][1],
+    "returns":     lambda item: item[1][2],
+    "return_rate": lambda item: _rate(item[1]),
+}
+
+
+def _day_key(date):
+    """'YYYY-MM-DD' (або 'Невідомо') → ключ дня в ProductStats."""
+    return int(date.replace("-", "")) if date[:1].isdigit() else _NO_DAY
+
+
+class ProductStats:
+    """Підсумки товарів; наповнюються з Partial._aggregate, читаються через top."""
+
+    __slots__ = ("_store", "_days", "_by_day", "_total")
+
+    def __init__(self, store, days):
+        self._store  = store
+        self._days   = days     # Partial._acc — звідси обіг продажу для частки
+        self._by_day = {}
+        self._total  = {}
+
+    def _sales(self, first, last):
+        if first is None and last is None:
+            return sum(day[0] for day in self._days.values())
+        lo = _day_key(first) if first else 0
+        hi = _day_key(last) if last else _NO_DAY - 1
+        return sum(day[0] for d, day in self._days.items() if lo <= d <= hi)
+
+    def _range(self, first, last):
+        if first is None and last is None:
+            return self._total
+        lo = _day_key(first) if first else 0
+        hi = _day_key(last) if last else _NO_DAY - 1
+        acc = {}
+        for d, day in self._by_day.items():
+            if lo <= d <= hi:
+                for code, e in day.items():
+                    a = acc.get(code)
+                    if a is None:
+                        acc[code] = e[:]
+                    else:
+                        a[0] += e[0]; a[1] += e[1]; a[2] += e[2]; a[3] += e[3]
+        return acc
+
+    def top(self, n=10, key="revenue", first=None, last=None, bottom=False):
+        """n товарів з найбільшим (bottom=True — найменшим) key.
+
+        key — поле ProductRow; first/last — дати 'YYYY-MM-DD' включно
+        (один день — first == last), без них — весь період. n=None —
+        усі товари в порядку рейтингу.
+        """
+        acc   = self._range(first, last)
+        sales = self._sales(first, last)
+        kf    = _KEYS[key]
+        if n is None:
+            picked = sorted(acc.items(), key=kf, reverse=not bottom)
+        elif bottom:
+            picked = heapq.nsmallest(n, acc.items(), key=kf)
+        else:
+            picked = heapq.nlargest(n, acc.items(), key=kf)
+        names = self._store.names
+        return [ProductRow(names[code], e[0], e[1], e[2], _rate(e),
+                           e[0] * 100 / sales if sales else 0.0)
+                for code, e in picked]
+
+
+def iter_product_rows(ranked):
+    """Рядки аркуша «Товари» з результату ProductStats.top: гривні й відсотки."""
+    for place, r in enumerate(ranked, 1):
+        yield [place, r.name, r.revenue / 100, r.count, r.returns / 100,
+               None if r.return_rate == float("inf") else round(r.return_rate, 2),
+               round(r.share, 2)]
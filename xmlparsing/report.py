@@ -0,0 +1,253 @@
+"""Формування звіту (позиції + підсумки днів + зведена таблиця) та запис у файл.
+
+Модуль не залежить від Tk; openpyxl імпортується лише всередині write_xlsx.
+"""
+import csv
+import math
+import sys
+from itertools import islice
+
+from .aggregate import RETURN, SALE, TAX_MAP
+from .cube import HOUR_COLUMNS, iter_heatmap_rows
+from .products import PRODUCT_COLUMNS, iter_product_rows
+from .store import OP_NAMES, OP_RETURN, fmt_date, fmt_time
+
+COLUMNS = ["Дата", "Час", "Номер чека", "Найменування", "Сума (грн)", "Тип операції"]
+
+# ─── Типи рядків звіту ────────────────────────────────────────────────────────
+ROW_ITEM    = "item"
+ROW_RETURN  = "return"
+ROW_SUMMARY = "summary"
+ROW_BALANCE = "balance"     # підсумок дня, виділений жирним
+ROW_BLANK   = "blank"
+ROW_GRAND   = "grand"
+
+
+def _cents(uah):
+    """Сума дня в гривнях (копійки / 100) → знову цілі копійки."""
+    return round(uah * 100)
+
+
+def grand_cents(totals):
+    """(продаж, повернення) за всі дні totals у цілих копійках.
+
+    Суми днів складаються цілими, тож підсумок точний до копійки і не
+    залежить від порядку днів у totals (після merge_new він інший).
+    """
+    sales = returns = 0
+    for dd in totals.values():
+        sales   += _cents(dd.get(SALE, 0))
+        returns += _cents(dd.get(RETURN, 0))
+    return sales, returns
+
+
+def grand_taxes(totals, rates):
+    """Підсумовує обороти і вже пораховані ПДВ днів; pr — усі ставки групи
+    за період з RateTimeline rates.
+
+    Обороти сумуються в цілих копійках, ПДВ (з дробовими копійками) —
+    через math.fsum, тож результат не залежить від порядку днів.
+    """
+    tn2c = {v: int(k) for k, v in TAX_MAP.items()}
+    acc = {}
+    for dd in totals.values():
+        for tn, td in dd.get("taxes", {}).items():
+            a = acc.get(tn)
+            if a is None:
+                a = acc[tn] = [0, []]
+            a[0] += _cents(td.get("turnover", 0.0))
+            a[1].append(td.get("vat", 0.0))
+    return {tn: {"turnover": tv / 100, "vat": math.fsum(vats), "pr": rates.label(tn2c[tn])}
+            for tn, (tv, vats) in acc.items()}
+
+
+def iter_report_rows(store, totals, rates, order=None):
+    """Генерує (тип рядка, [6 значень]) у порядку дата → час.
+
+    Тип відомий уже тут (ROW_*), тож запис не вгадує його з тексту.
+    Суми — числа в гривнях (None для порожньої клітинки). order —
+    готовий відсортований порядок позицій (або вибірка фільтра);
+    без нього store сортується тут.
+    """
+    ts_a, amt, chk, op_a, name, names, nos = (store.ts, store.amount, store.check,
+                                              store.op, store.name, store.names, store.nos)
+
+    for date, idx in store.iter_days(order):
+        for i in idx:
+            ts = ts_a[i]
+            op = op_a[i]
+            yield (ROW_RETURN if op == OP_RETURN else ROW_ITEM,
+                   [fmt_date(ts), fmt_time(ts), nos[chk[i]], names[name[i]],
+                    amt[i] / 100, OP_NAMES[op]])
+        tot   = totals.get(date, {})
+        ts    = tot.get(SALE, 0)
+        tr    = tot.get(RETURN, 0)
+        taxes = tot.get("taxes", {})
+
+        yield ROW_SUMMARY, ["", "", "", f"--- ПІДСУМКИ ДНЯ {date} ---", None, ""]
+        yield ROW_SUMMARY, ["", "", "", "Загальний обіг (Продаж)", ts, ""]
+        for tn, td in sorted(taxes.items()):
+            tv  = td.get("turnover", 0.0)
+            vat = td.get("vat", 0.0)
+            pr  = td.get("pr", "")
+            if tv  != 0: yield ROW_SUMMARY, ["", "", "", f"Обіг Група {tn} ({pr})", tv, ""]
+            if vat != 0: yield ROW_SUMMARY, ["", "", "", f"Податок Група {tn} ({pr})", vat, ""]
+        yield ROW_SUMMARY, ["", "", "", "Повернення", tr, ""]
+        yield ROW_BALANCE, ["", "", "", "ЧИСТИЙ БАЛАНС", ts - tr, ""]
+        yield ROW_BLANK,   ["", "", "", "", None, ""]
+
+    gt = grand_taxes(totals, rates)
+    g_sales, g_ret = grand_cents(totals)
+    yield ROW_GRAND, ["", "", "", "ЗВЕДЕНА ТАБЛИЦЯ ЗА ВЕСЬ ПЕРІОД", None, ""]
+    yield ROW_GRAND, ["", "", "", "ЗАГАЛЬНИЙ ПРОДАЖ", g_sales / 100, ""]
+    for tn, td in sorted(gt.items()):
+        tv  = td.get("turnover", 0.0)
+        vat = td.get("vat", 0.0)
+        pr  = td.get("pr", "")
+        if tv  != 0: yield ROW_GRAND, ["", "", "", f"ЗАГАЛЬНИЙ ОБІГ ГРУПА {tn} ({pr})", tv, ""]
+        if vat != 0: yield ROW_GRAND, ["", "", "", f"ЗАГАЛЬНИЙ ПОДАТОК ГРУПА {tn} ({pr})", vat, ""]
+    yield ROW_GRAND, ["", "", "", "ЗАГАЛЬНІ ПОВЕРНЕННЯ", g_ret / 100, ""]
+    yield ROW_GRAND, ["", "", "", "ФІНАЛЬНИЙ БАЛАНС", (g_sales - g_ret) / 100, ""]
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+#  ЗАПИС
+# ══════════════════════════════════════════════════════════════════════════════
+XLSX_MAX_ROWS = 1048576
+
+
+def write_xlsx(rows, save_path, products=None, hours=None):
+    """Один прохід у write-only книгу: стилі ставляться при записі рядка.
+
+    Якщо рядків більше, ніж вміщує аркуш Excel, звіт продовжується
+    на наступному аркуші. products — рейтинг ProductStats.top для
+    окремого аркуша «Товари», hours — HourCube для аркуша «Години»
+    з тепловою картою виручки (або None).
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.formatting.rule import ColorScaleRule
+    from openpyxl.styles import PatternFill, Font, Alignment
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    fills = {
+        ROW_RETURN:  PatternFill("solid", fgColor="FFCCCC"),
+        ROW_SUMMARY: PatternFill("solid", fgColor="FFFACD"),
+        ROW_BALANCE: PatternFill("solid", fgColor="FFFACD"),
+        ROW_GRAND:   PatternFill("solid", fgColor="C6EFCE"),
+    }
+    fonts = {
+        ROW_SUMMARY: Font(bold=False, name="Consolas", size=10),
+        ROW_BALANCE: Font(bold=True,  name="Consolas", size=10),
+        ROW_GRAND:   Font(bold=True,  name="Consolas", size=10),
+    }
+    hdr_fill  = PatternFill("solid", fgColor="1F3864")
+    hdr_font  = Font(bold=True, color="FFFFFF", name="Consolas")
+    hdr_align = Alignment(horizontal="center")
+
+    def new_sheet():
+        ws = wb.create_sheet(f"Sheet{len(wb.worksheets) + 1}")
+        for i, w in enumerate([12, 10, 12, 50, 14, 14], 1):
+            ws.column_dimensions[get_column_letter(i)].width = w
+        hdr = []
+        for text in COLUMNS:
+            c = WriteOnlyCell(ws, value=text)
+            c.fill, c.font, c.alignment = hdr_fill, hdr_font, hdr_align
+            hdr.append(c)
+        ws.append(hdr)
+        return ws
+
+    def styled(ws, values, fill, font):
+        out = []
+        for v in values:
+            c = WriteOnlyCell(ws, value=v)
+            c.fill = fill
+            if font is not None:
+                c.font = font
+            out.append(c)
+        out[4].number_format = "0.00"
+        return out
+
+    ws = new_sheet()
+    n  = 1
+    for kind, values in rows:
+        if n == XLSX_MAX_ROWS:
+            ws = new_sheet()
+            n  = 1
+        fill = fills.get(kind)
+        if fill is None:
+            # звичайна позиція: стиль потрібен лише клітинці суми
+            amount = WriteOnlyCell(ws, value=values[4])
+            amount.number_format = "0.00"
+            ws.append(values[:4] + [amount, values[5]])
+        else:
+            ws.append(styled(ws, values, fill, fonts.get(kind)))
+        n += 1
+
+    if products is not None:
+        ws = wb.create_sheet("Товари")
+        for i, w in enumerate([6, 50, 16, 10, 16, 14, 14], 1):
+            ws.column_dimensions[get_column_letter(i)].width = w
+        hdr = []
+        for text in PRODUCT_COLUMNS:
+            c = WriteOnlyCell(ws, value=text)
+            c.fill, c.font, c.alignment = hdr_fill, hdr_font, hdr_align
+            hdr.append(c)
+        ws.append(hdr)
+        for values in islice(iter_product_rows(products), XLSX_MAX_ROWS - 1):
+            out = []
+            for j, v in enumerate(values):
+                c = WriteOnlyCell(ws, value=v)
+                if j in (2, 4, 5, 6):
+                    c.number_format = "0.00"
+                out.append(c)
+            ws.append(out)
+
+    if hours is not None:
+        ws = wb.create_sheet("Години")
+        ws.column_dimensions["A"].width = 12
+        for i in range(2, len(HOUR_COLUMNS) + 1):
+            ws.column_dimensions[get_column_letter(i)].width = 10
+        hdr = []
+        for text in HOUR_COLUMNS:
+            c = WriteOnlyCell(ws, value=text)
+            c.fill, c.font, c.alignment = hdr_fill, hdr_font, hdr_align
+            hdr.append(c)
+        ws.append(hdr)
+        for values in islice(iter_heatmap_rows(hours), XLSX_MAX_ROWS - 1):
+            out = []
+            for j, v in enumerate(values):
+                c = WriteOnlyCell(ws, value=v)
+                if j:
+                    c.number_format = "0.00"
+                out.append(c)
+            ws.append(out)
+        if len(hours):
+            last = get_column_letter(len(HOUR_COLUMNS) - 1)
+            ws.conditional_formatting.add(f"B2:{last}{len(hours) + 1}", ColorScaleRule(
+                start_type="min", start_color="FFFFFF", end_type="max", end_color="63BE7B"))
+    wb.save(save_path)
+
+
+def write_csv(rows, save_path):
+    """CSV у UTF-8; save_path == "-" — у stdout."""
+    if save_path == "-":
+        _write_csv(rows, sys.stdout)
+        return
+    with open(save_path, "w", encoding="utf-8", newline="") as f:
+        _write_csv(rows, f)
+
+
+def _write_csv(rows, f):
+    w = csv.writer(f)
+    w.writerow(COLUMNS)
+    for _kind, values in rows:
+        amount = values[4]
+        w.writerow(values[:4] + ["" if amount is None else f"{amount:.2f}", values[5]])
+
+
+WRITERS = {
+    "xlsx": write_xlsx,
+    "csv":  write_csv,
+}
@@ -0,0 +1,87 @@
+"""Пошук позицій за підрядком у назві товару.
+
+Назви в RecordStore інтерновані, тож індекс будується не по рядках, а по
+словнику назв: триграма → коди назв, що її містять. Запит перевіряє лише
+назви з найкоротшого списку своїх триграм, а позиції кожної назви вже
+лежать окремим відсортованим масивом — відповідь не залежить від
+кількості рядків, лише від кількості збігів.
+
+Масиви позицій — 8 байт на рядок, тож у режимі spill (store.spill) їх
+немає: збіги назв шукаються так само, а позиції — одним проходом по
+колонці назв на диску.
+"""
+import heapq
+from array import array
+from itertools import islice
+
+SEARCH_LIMIT = 2000     # позицій у відповіді за замовчуванням
+
+
+def _grams(s):
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+class NameIndex:
+    """Триграмний індекс назв і позиції кожної назви в порядку order."""
+
+    __slots__ = ("_lower", "_grams", "_rows", "_name", "_order")
+
+    def __init__(self, store, order):
+        names       = store.names
+        self._lower = [nm.casefold() for nm in names]
+        grams = {}
+        for code, nm in enumerate(self._lower):
+            for g in _grams(nm):
+                post = grams.get(g)
+                if post is None:
+                    post = grams[g] = array("i")
+                post.append(code)
+        self._grams = grams
+        self._name  = store.name
+        self._order = order
+        self._rows  = None
+        if store.spill is not None:
+            return
+
+        # позиції в order (а не індекси store) — результати одразу за часом
+        rows    = [array("q") for _ in names]
+        appends = [r.append for r in rows]
+        for pos, code in enumerate(map(store.name.__getitem__, order)):
+            appends[code](pos)
+        self._rows = rows
+
+    def match_names(self, query):
+        """Коди назв, що містять query (без урахування регістру)."""
+        q     = query.casefold()
+        lower = self._lower
+        if len(q) < 3:
+            return [code for code, nm in enumerate(lower) if q in nm]
+        posts = [self._grams.get(g) for g in _grams(q)]
+        if not all(posts):
+            return []
+        # кандидати — з найкоротшого списку; решту відсіює перевірка підрядка
+        return [code for code in min(posts, key=len) if q in lower[code]]
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """(кількість збігів, [перші limit позицій у order за часом])."""
+        query = query.strip()
+        if not query:
+            return 0, []
+        codes = self.match_names(query)
+        if self._rows is None:
+            return self._scan(set(codes), limit)
+        lists = [self._rows[code] for code in codes]
+        total = sum(map(len, lists))
+        return total, list(islice(heapq.merge(*lists), limit))
+
+    def _scan(self, codes, limit):
+        """search без масивів позицій: прохід по колонці назв у порядку order."""
+        total, hits = 0, []
+        if not codes:
+            return total, hits
+        for pos, code in enumerate(map(self._name.__getitem__, self._order)):
+            if code in codes:
+                total += 1
+                if len(hits) < limit:
+                    hits.append(pos)
+        return total, hits
@@ -0,0 +1,158 @@
+"""Режим з обмеженою пам'яттю: колонки скидаються на диск і читаються через mmap.
+
+SpillColumn поводиться як array.array для всього, що робить ядро:
+append/extend, len, індекс, зріз (повертає array), ітерація. Нові
+значення накопичуються в хвості в пам'яті; щойно їх стає rows, хвіст
+дописується у файл колонки, а прочитана частина відображається через
+mmap — ОС сама тримає в RAM лише потрібні сторінки.
+"""
+import mmap
+import os
+import shutil
+import tempfile
+import weakref
+from array import array
+from itertools import islice
+
+DEFAULT_SPILL_ROWS = 4 << 20     # елементів у хвості колонки до скидання
+
+
+class SpillColumn:
+    __slots__ = ("typecode", "limit", "_file", "_view", "_n_disk", "tail", "__weakref__")
+
+    def __init__(self, typecode, path, limit=DEFAULT_SPILL_ROWS):
+        self.typecode = typecode
+        self.limit    = limit
+        self._file    = open(path, "w+b")
+        self._view    = memoryview(array(typecode))
+        self._n_disk  = 0
+        self.tail     = array(typecode)
+
+    def __reduce__(self):
+        # у pickle (кеш, пул процесів) колонка їде звичайним масивом
+        return array, (self.typecode, self[0:len(self)].tobytes())
+
+    def __len__(self):
+        return self._n_disk + len(self.tail)
+
+    # ─── Запис ────────────────────────────────────────────────────────────────
+    def append(self, v):
+        self.tail.append(v)
+        if len(self.tail) >= self.limit:
+            self.flush()
+
+    def extend(self, values):
+        if isinstance(values, SpillColumn):
+            for chunk in values.chunks():
+                self.extend(chunk)
+            return
+        tail = self.tail
+        if isinstance(values, (array, list, tuple)):
+            tail.extend(values)
+        elif isinstance(values, memoryview):
+            tail.frombytes(values.tobytes())
+        else:
+            it = iter(values)
+            while True:
+                n = len(tail)
+                tail.extend(islice(it, self.limit))
+                if len(tail) == n:
+                    break
+                if len(tail) >= self.limit:
+                    self.flush()
+                    tail = self.tail
+            return
+        if len(tail) >= self.limit:
+            self.flush()
+
+    def flush(self):
+        """Дописує хвіст у файл і перевідображає колонку."""
+        if not self.tail:
+            return
+        f = self._file
+        f.seek(0, os.SEEK_END)
+        f.write(self.tail.tobytes())
+        f.flush()
+        self._n_disk += len(self.tail)
+        self.tail     = array(self.typecode)
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(mm).cast(self.typecode)
+
+    @property
+    def view(self):
+        """Уся колонка одним memoryview (хвіст спершу скидається на диск)."""
+        self.flush()
+        return self._view
+
+    # ─── Читання ──────────────────────────────────────────────────────────────
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            a, b, step = i.indices(len(self))
+            if step != 1:
+                return array(self.typecode, self)[i]
+            n   = self._n_disk
+            out = array(self.typecode)
+            if a < n:
+                out.frombytes(self._view[a:min(b, n)].tobytes())
+            if b > n:
+                out.extend(self.tail[max(a - n, 0):b - n])
+            return out
+        if i < 0:
+            i += len(self)
+        n = self._n_disk
+        return self._view[i] if i < n else self.tail[i - n]
+
+    def __iter__(self):
+        yield from self._view
+        yield from self.tail
+
+    def chunks(self, size=None):
+        """Послідовні шматки колонки (memoryview / array) не більші за size."""
+        size = size or self.limit
+        n    = self._n_disk
+        for a in range(0, n, size):
+            yield self._view[a:min(a + size, n)]
+        if self.tail:
+            yield self.tail
+
+    def close(self):
+        self._view = memoryview(array(self.typecode))
+        try:
+            self._file.close()
+        except OSError:
+            pass
+
+
+class Spill:
+    """Тимчасова тека для колонок одного набору даних; видаляється разом з ним."""
+
+    def __init__(self, rows=DEFAULT_SPILL_ROWS, base_dir=None):
+        self.rows  = rows
+        self.path  = tempfile.mkdtemp(prefix="xmlparsing-", dir=base_dir)
+        self._seq  = 0
+        self._cols = weakref.WeakSet()
+        self._fin  = weakref.finalize(self, _cleanup, self._cols, self.path)
+
+    def column(self, typecode):
+        self._seq += 1
+        path = os.path.join(self.path, f"c{self._seq}.{typecode}")
+        col  = SpillColumn(typecode, path, self.rows)
+        self._cols.add(col)
+        weakref.finalize(col, _unlink, path)    # проміжні Partial не лишають файлів
+        return col
+
+    def close(self):
+        self._fin()
+
+
+def _unlink(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass     # Windows: файл ще відображений — зникне разом з текою
+
+
+def _cleanup(cols, path):
+    for col in list(cols):
+        col.close()
+    shutil.rmtree(path, ignore_errors=True)
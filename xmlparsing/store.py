@@ -0,0 +1,381 @@
+"""Колонкове сховище позицій чеків.
+
+Замість кортежу рядків на кожну позицію — паралельні масиви array:
+час int64 (YYYYMMDDhhmmss), сума і знижка int64 у копійках, тип операції
+uint8, а номер чека і назва — коди int32 у словниках сирих рядків (NO
+показується як є, з ведучими нулями й літерами).
+Рядки для показу формуються лише при рендері та експорті.
+
+Сховище пам'ятає, де час позицій спадає (_runs): між цими межами
+позиції вже відсортовані. Файли йдуть за іменем, чеки у файлі — за
+часом, тож зазвичай серія одна, і порядок за часом — просто range.
+"""
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import chain, groupby
+
+NO_TS    = (1 << 63) - 1     # невідомий час — сортується в кінець, як "Невідомо"
+
+MIN_RUN = 64    # середня довжина серії, нижче якої sorted_order просто сортує
+
+OP_SALE   = 0
+OP_RETURN = 1
+OP_NAMES  = ("Продаж", "Повернення")
+
+
+def parse_ts(ts):
+    """'YYYYMMDDhhmmss' → int; некоректний час → NO_TS."""
+    return int(ts) if len(ts) == 14 and ts.isdigit() else NO_TS
+
+
+def fmt_date(ts):
+    if ts == NO_TS:
+        return "Невідомо"
+    d = ts // 1000000
+    return f"{d // 10000:04d}-{d // 100 % 100:02d}-{d % 100:02d}"
+
+
+def fmt_time(ts):
+    if ts == NO_TS:
+        return ""
+    t = ts % 1000000
+    return f"{t // 10000:02d}:{t // 100 % 100:02d}:{t % 100:02d}"
+
+
+def fmt_cents(c):
+    return f"{c / 100:.2f}"
+
+
+def _column(spill, typecode):
+    """Порожня колонка: array у пам'яті або SpillColumn у теці spill."""
+    return array(typecode) if spill is None else spill.column(typecode)
+
+
+class RecordStore:
+    __slots__ = ("ts", "amount", "disc", "check", "op", "name", "tx", "names", "_codes",
+                 "nos", "_no_codes", "_spill", "_runs")
+
+    def __init__(self, spill=None):
+        self.ts     = _column(spill, "q")
+        self.amount = _column(spill, "q")    # |P@SM|
+        self.disc   = _column(spill, "q")    # знижки <D> на позицію; чиста сума — amount − disc
+        self.check  = _column(spill, "i")    # код номера чека в nos
+        self.op     = _column(spill, "B")
+        self.name   = _column(spill, "i")
+        self.tx     = _column(spill, "B")    # P@TX, 0 — без групи
+        self.names  = []                     # код → назва
+        self._codes = {}                     # назва → код
+        self.nos    = []                     # код → номер чека (E@NO як є)
+        self._no_codes = {}
+        self._spill = spill                  # Spill або None — усе в пам'яті
+        self._runs  = array("q")             # початки серій, де час менший за попередній
+
+    def __len__(self):
+        return len(self.ts)
+
+    def __getstate__(self):
+        return (self.ts, self.amount, self.disc, self.check, self.op, self.name, self.tx,
+                self.names, self.nos, self._runs)
+
+    def __setstate__(self, state):
+        (self.ts, self.amount, self.disc, self.check, self.op, self.name, self.tx,
+         self.names, self.nos, self._runs) = state
+        self._codes    = {nm: i for i, nm in enumerate(self.names)}
+        self._no_codes = {no: i for i, no in enumerate(self.nos)}
+        self._spill = None
+
+    def clear(self):
+        self.__init__(self._spill)
+
+    @property
+    def spill(self):
+        """Spill сховища або None — усе в пам'яті."""
+        return self._spill
+
+    def new_column(self, typecode):
+        """Порожня колонка для похідних даних — у пам'яті чи на диску, як у сховища."""
+        return _column(self._spill, typecode)
+
+    def intern(self, nm):
+        code = self._codes.get(nm)
+        if code is None:
+            code = self._codes[nm] = len(self.names)
+            self.names.append(nm)
+        return code
+
+    def intern_no(self, no):
+        code = self._no_codes.get(no)
+        if code is None:
+            code = self._no_codes[no] = len(self.nos)
+            self.nos.append(no)
+        return code
+
+    def add_check(self, ts, no, op, items):
+        """Додає позиції одного чека з номером no (рядок E@NO);
+        items — [(NM, копійки, TX, знижка)]."""
+        n = len(items)
+        if not n:
+            return
+        self._mark(ts)
+        self.ts.extend([ts] * n)
+        self.check.extend([self.intern_no(no)] * n)
+        self.op.extend([op] * n)
+        intern = self.intern
+        for nm, cents, tx, disc in items:
+            self.amount.append(cents)
+            self.disc.append(disc)
+            self.name.append(intern(nm))
+            self.tx.append(int(tx) if tx.isdigit() and len(tx) < 3 else 0)
+
+    def _mark(self, ts):
+        """Перед дописуванням позицій з часом ts: чи почнеться нова серія."""
+        n = len(self.ts)
+        if n and ts < self.ts[n - 1]:
+            self._runs.append(n)
+
+    def extend(self, other):
+        """Дописує other у кінець, перекодовуючи назви й номери чеків."""
+        n0 = len(self)
+        if len(other):
+            self._mark(other.ts[0])
+            self._runs.extend(n0 + r for r in other._runs)
+        if not n0:
+            remap = no_remap = None
+            self.names[:] = other.names
+            self._codes = {nm: i for i, nm in enumerate(self.names)}
+            self.nos[:] = other.nos
+            self._no_codes = {no: i for i, no in enumerate(self.nos)}
+        else:
+            remap    = [self.intern(nm) for nm in other.names]
+            no_remap = [self.intern_no(no) for no in other.nos]
+        self.ts.extend(other.ts)
+        self.amount.extend(other.amount)
+        self.disc.extend(other.disc)
+        self.op.extend(other.op)
+        self.tx.extend(other.tx)
+        if remap is None:
+            self.name.extend(other.name)
+            self.check.extend(other.check)
+        else:
+            self.name.extend(remap[c] for c in other.name)
+            self.check.extend(no_remap[c] for c in other.check)
+
+    def extend_spans(self, other, spans):
+        """Дописує позиції other з діапазонів [(початок, кінець)].
+
+        Назви й номери чеків перекодовуються ліниво — у словники
+        потрапляють лише ті, що справді трапились у скопійованих позиціях.
+        """
+        remap    = [-1] * len(other.names)
+        no_remap = [-1] * len(other.nos)
+        intern   = self.intern
+        runs     = other._runs
+        for a, b in spans:
+            n0 = len(self)
+            self._mark(other.ts[a])
+            self._runs.extend(n0 - a + r
+                              for r in runs[bisect_right(runs, a):bisect_left(runs, b)])
+            self.ts.extend(other.ts[a:b])
+            self.amount.extend(other.amount[a:b])
+            self.disc.extend(other.disc[a:b])
+            self.op.extend(other.op[a:b])
+            self.tx.extend(other.tx[a:b])
+            codes = array("i", other.name[a:b])
+            for j, c in enumerate(codes):
+                r = remap[c]
+                if r < 0:
+                    r = remap[c] = intern(other.names[c])
+                codes[j] = r
+            self.name.extend(codes)
+            codes = array("i", other.check[a:b])
+            for j, c in enumerate(codes):
+                r = no_remap[c]
+                if r < 0:
+                    r = no_remap[c] = self.intern_no(other.nos[c])
+                codes[j] = r
+            self.check.extend(codes)
+
+    # ─── Читання ──────────────────────────────────────────────────────────────
+    def buffer(self, col):
+        """Колонка col суцільним буфером: array або memoryview над mmap."""
+        c = getattr(self, col)
+        return c if isinstance(c, array) else c.view
+
+    def row(self, i):
+        """Рядок для показу: (дата, час, чек, назва, сума, тип)."""
+        ts = self.ts[i]
+        return (fmt_date(ts), fmt_time(ts), self.nos[self.check[i]],
+                self.names[self.name[i]], fmt_cents(self.amount[i]), OP_NAMES[self.op[i]])
+
+    def sorted_order(self):
+        """Індекси позицій за часом (стабільно — рівні часи в порядку файлів).
+
+        Одна серія — range без сортування. Інакше серії впорядковуються за
+        першим часом; ті, що не перекриваються, лише зчіплюються, а групи
+        перекритих зливаються: у пам'яті — sorted (злиття серій у C), у
+        режимі spill — потоково через heapq.merge у колонку на диску.
+        """
+        ts = self.ts
+        n  = len(ts)
+        if not self._runs:
+            return range(n)
+        spill = self._spill
+        disk  = spill is not None and n > spill.rows
+        key   = ts.__getitem__
+        if not disk and len(self._runs) * MIN_RUN > n:
+            # час майже не впорядкований — групування серій не окупиться
+            return sorted(range(n), key=key)
+        bounds = [0, *self._runs, n]
+        groups = []
+        last   = tie = None     # найбільший час групи і найпізніша серія з ним
+        for a, b in sorted(zip(bounds, bounds[1:]), key=lambda r: (ts[r[0]], r[0])):
+            t0, t1 = ts[a], ts[b - 1]
+            if groups and (t0 < last or t0 == last and tie > a):
+                groups[-1].append((a, b))
+                if t1 > last or t1 == last and a > tie:
+                    last, tie = t1, a
+            else:
+                groups.append([(a, b)])
+                last, tie = t1, a
+
+        out = spill.column("q") if disk else []
+        for g in groups:
+            if len(g) == 1:
+                out.extend(range(*g[0]))
+                continue
+            g.sort()    # рівні часи — у порядку індексів
+            if not disk:
+                # сусідні серії — один range: sorted сам знайде в ньому серії
+                merged = [list(g[0])]
+                for a, b in g[1:]:
+                    if merged[-1][1] == a:
+                        merged[-1][1] = b
+                    else:
+                        merged.append([a, b])
+                out.extend(sorted(chain.from_iterable(range(a, b) for a, b in merged), key=key))
+            else:
+                out.extend(heapq.merge(*(range(a, b) for a, b in g), key=key))
+        if disk:
+            out.flush()
+        return out
+
+    def iter_days(self, order=None):
+        """Генерує (дата, [індекси]) по днях у порядку order."""
+        if order is None:
+            order = self.sorted_order()
+        ts = self.ts
+        for day, idx in groupby(order, key=lambda i: ts[i] // 1000000):
+            idx = list(idx)
+            yield fmt_date(ts[idx[0]]), idx
+
+    def day_spans(self, order):
+        """[(дата, початок, кінець)] — межі днів у відсортованому order."""
+        ts    = self.ts
+        spans = []
+        start = 0
+        for day, idx in groupby(order, key=lambda i: ts[i] // 1000000):
+            n = sum(1 for _ in idx)
+            spans.append((fmt_date(ts[order[start]]), start, start + n))
+            start += n
+        return spans
+
+    def count_checks(self):
+        """Кількість різних (дата, номер чека)."""
+        return len({(t // 1000000, c) for t, c in zip(self.ts, self.check)})
+
+
+class CheckTable:
+    """Чеки Partial: ключ (РРО, час, номер), внесок у підсумки дня
+    і діапазон позицій у RecordStore.
+
+    Потрібна для злиття з дедуплікацією: дубльований чек відкидається
+    разом з усіма своїми сумами, не зачіпаючи решти дня.
+    """
+    __slots__ = ("reg", "ts", "no", "op", "total", "first", "count",
+                 "tx_off", "tx_n", "tx_code", "tx_cents", "regs", "_reg_codes",
+                 "nos", "_no_codes")
+
+    def __init__(self, spill=None):
+        self.reg      = _column(spill, "i")     # код РРО у regs
+        self.ts       = _column(spill, "q")
+        self.no       = _column(spill, "i")     # код номера чека в nos
+        self.op       = _column(spill, "B")
+        self.total    = _column(spill, "q")     # |E@SM|, копійки
+        self.first    = _column(spill, "q")     # перша позиція чека в RecordStore
+        self.count    = _column(spill, "i")     # кількість позицій
+        self.tx_off   = _column(spill, "q")     # початок обігів чека в tx_code/tx_cents
+        self.tx_n     = _column(spill, "B")
+        self.tx_code  = _column(spill, "B")
+        self.tx_cents = _column(spill, "q")     # обіг зі знаком операції, копійки
+        self.regs       = []           # код → номер РРО
+        self._reg_codes = {}
+        self.nos        = []           # код → номер чека (E@NO як є)
+        self._no_codes  = {}
+
+    def __len__(self):
+        return len(self.ts)
+
+    def __getstate__(self):
+        return (self.reg, self.ts, self.no, self.op, self.total, self.first, self.count,
+                self.tx_off, self.tx_n, self.tx_code, self.tx_cents, self.regs, self.nos)
+
+    def __setstate__(self, state):
+        (self.reg, self.ts, self.no, self.op, self.total, self.first, self.count,
+         self.tx_off, self.tx_n, self.tx_code, self.tx_cents, self.regs, self.nos) = state
+        self._reg_codes = {r: i for i, r in enumerate(self.regs)}
+        self._no_codes  = {no: i for i, no in enumerate(self.nos)}
+
+    def _reg(self, reg):
+        code = self._reg_codes.get(reg)
+        if code is None:
+            code = self._reg_codes[reg] = len(self.regs)
+            self.regs.append(reg)
+        return code
+
+    def _no(self, no):
+        code = self._no_codes.get(no)
+        if code is None:
+            code = self._no_codes[no] = len(self.nos)
+            self.nos.append(no)
+        return code
+
+    def add(self, reg, ts, no, op, total, first, count, taxes):
+        """no — рядок E@NO; taxes — [(код групи, обіг зі знаком)]."""
+        self.reg.append(self._reg(reg))
+        self.ts.append(ts)
+        self.no.append(self._no(no))
+        self.op.append(op)
+        self.total.append(total)
+        self.first.append(first)
+        self.count.append(count)
+        self.tx_off.append(len(self.tx_code))
+        self.tx_n.append(len(taxes))
+        for code, cents in taxes:
+            self.tx_code.append(code)
+            self.tx_cents.append(cents)
+
+    def copy_row(self, other, k, first):
+        """Дописує чек k з other; його позиції тепер починаються з first."""
+        off = other.tx_off[k]
+        n   = other.tx_n[k]
+        self.add(other.regs[other.reg[k]], other.ts[k], other.nos[other.no[k]], other.op[k],
+                 other.total[k], first, other.count[k],
+                 list(zip(other.tx_code[off:off + n], other.tx_cents[off:off + n])))
+
+    def extend(self, other, item_shift):
+        """Дописує other у кінець; позиції other зсунуті на item_shift."""
+        remap = [self._reg(r) for r in other.regs]
+        self.reg.extend(remap[c] for c in other.reg)
+        self.ts.extend(other.ts)
+        remap = [self._no(no) for no in other.nos]
+        self.no.extend(remap[c] for c in other.no)
+        self.op.extend(other.op)
+        self.total.extend(other.total)
+        self.first.extend(f + item_shift for f in other.first)
+        self.count.extend(other.count)
+        tx_shift = len(self.tx_code)
+        self.tx_off.extend(o + tx_shift for o in other.tx_off)
+        self.tx_n.extend(other.tx_n)
+        self.tx_code.extend(other.tx_code)
+        self.tx_cents.extend(other.tx_cents)
@@ -0,0 +1,143 @@
+"""Ставки ПДВ у часі: епохи ставки кожної групи з атрибутів <E TX TXPR>.
+
+Чек несе ставку лише своєї групи E@TX, тож RateTimeline записує точки
+(час чека, ставка). Відсортовані за часом точки без повторів ставки й
+дають епохи: перша діє від початку періоду, кожна наступна — з часу
+першого чека з новою ставкою.
+
+Чеки надходять не за часом (кілька РРО в архіві, частини з пулу й кешу),
+тож точка відкидається лише тоді, коли вона продовжує попередню в тому
+ж дні: та сама ставка й не раніший час. Перший чек кожної епохи так
+завжди лишається в журналі, і епохи не залежать від того, як файли
+поділено між процесами, — якщо лише ставка не змінювалась двічі за день.
+
+Обіги в підсумках Partial ключуються парою (група, епоха) — key(code,
+epoch) — і ПДВ рахується за ставкою своєї епохи. Поки ставки не
+змінювались, епоха одна і ключ дорівнює коду групи.
+"""
+from bisect import bisect_right
+
+from .store import NO_TS
+
+EPOCH_SHIFT = 4     # коди груп 1..8 вміщаються в молодші 4 біти ключа
+LABEL_RATES = 3     # більше ставок у підписі — лише перша й остання
+
+
+def key(code, epoch):
+    """Ключ обігу групи code в епосі epoch."""
+    return code | epoch << EPOCH_SHIFT
+
+
+def split(k):
+    """Ключ обігу → (код групи, епоха)."""
+    return k & ((1 << EPOCH_SHIFT) - 1), k >> EPOCH_SHIFT
+
+
+def vat(cents, pct):
+    """ПДВ у гривнях, що входить в обіг cents за ставкою pct %."""
+    return cents / 100 * pct / (100 + pct) if pct > 0 else 0.0
+
+
+def label(pcts):
+    """Підпис ставок групи: '20.00%' або '20.00% → 7.00%' для кількох епох."""
+    out = []
+    for pct in pcts:
+        s = f"{pct:.2f}%"
+        if not out or out[-1] != s:
+            out.append(s)
+    if len(out) > LABEL_RATES:
+        out[1:-1] = ["…"]
+    return " → ".join(out) or "0.00%"
+
+
+def _continues(prev, ts, pct):
+    """Точка (ts, pct) нічого не додає до prev: та сама ставка, день і не раніше."""
+    return prev[1] == pct and prev[0] <= ts and prev[0] // 1000000 == ts // 1000000
+
+
+class RateTimeline:
+    """Точки зміни ставок по групах і епохи, що з них випливають."""
+
+    __slots__ = ("version", "_log", "_last", "_epochs")
+
+    def __init__(self):
+        self.version = 0      # росте з кожною новою точкою — для кешів підсумків
+        self._log    = {}     # {код групи: [(час, ставка)]} точки зміни
+        self._last   = {}     # {код групи: (час, ставка)} — остання за порядком надходження
+        self._epochs = None   # кеш {код групи: [(початок, ставка)]}
+
+    def __bool__(self):
+        return bool(self._log)
+
+    def note(self, code, ts, pct):
+        """Ставка pct групи code у чеку з часом ts (викликається на кожен чек)."""
+        if ts == NO_TS:
+            return
+        last = self._last.get(code)
+        self._last[code] = (ts, pct)
+        if last is not None and _continues(last, ts, pct):
+            return
+        self._log.setdefault(code, []).append((ts, pct))
+        self.version += 1
+        self._epochs  = None
+
+    def merge(self, other):
+        """Доливає точки other (їхній порядок у часі не важливий)."""
+        for code, pts in other._log.items():
+            self._log.setdefault(code, []).extend(pts)
+        self._last.update(other._last)
+        if other._log:
+            self.version += 1
+            self._epochs  = None
+
+    def copy(self):
+        out = RateTimeline()
+        out.version = self.version
+        out._log    = {code: list(pts) for code, pts in self._log.items()}
+        out._last   = dict(self._last)
+        return out
+
+    def _build(self):
+        epochs = {}
+        for code, pts in self._log.items():
+            pts.sort()
+            # журнал стискається до першої точки кожного дня в межах епохи
+            log = [pts[0]]
+            for p in pts:
+                if not _continues(log[-1], *p):
+                    log.append(p)
+            self._log[code] = log
+            ep = [(0, log[0][1])]
+            for ts, pct in log:
+                if ep[-1][1] != pct:
+                    ep.append((ts, pct))
+            epochs[code] = ep
+        self._epochs = epochs
+        return epochs
+
+    # ─── Запити ───────────────────────────────────────────────────────────────
+    def epochs(self, code):
+        """[(початок YYYYMMDDhhmmss, ставка)] групи code; перша — з 0."""
+        epochs = self._epochs if self._epochs is not None else self._build()
+        return epochs.get(code, [])
+
+    def bounds(self):
+        """{код: [початки епох 1..]} лише для груп, чия ставка змінювалась."""
+        epochs = self._epochs if self._epochs is not None else self._build()
+        return {code: [ts for ts, _ in ep[1:]] for code, ep in epochs.items() if len(ep) > 1}
+
+    def pct(self, code, epoch=0):
+        """Ставка групи code в епосі epoch (0.0 — ставка групи невідома)."""
+        ep = self.epochs(code)
+        return ep[epoch][1] if epoch < len(ep) else 0.0
+
+    def pct_at(self, code, ts):
+        """Ставка групи code, що діяла в момент ts."""
+        ep = self.epochs(code)
+        if not ep:
+            return 0.0
+        return ep[bisect_right(ep, ts, key=lambda e: e[0]) - 1][1]
+
+    def label(self, code):
+        """Підпис усіх ставок групи за період (див. label)."""
+        return label(pct for _, pct in self.epochs(code))
@@ -0,0 +1,42 @@
+"""Стеження за текою, куди каси складають ZIP-вивантаження.
+
+Тека опитується (без залежності від inotify/ReadDirectoryChanges): архів
+вважається готовим, коли його розмір і час зміни однакові у двох
+опитуваннях поспіль — тобто копіювання вже завершилось.
+"""
+import os
+
+POLL_INTERVAL = 2.0     # секунди між опитуваннями
+
+
+class FolderWatcher:
+    __slots__ = ("path", "_seen", "_pending")
+
+    def __init__(self, path):
+        self.path     = path
+        self._seen    = {}    # {шлях: (розмір, mtime)} уже відданих архівів
+        self._pending = {}    # {шлях: (розмір, mtime)} з попереднього опитування
+
+    def scan(self):
+        """Повертає відсортовані шляхи нових або змінених і вже стабільних архівів."""
+        ready   = []
+        present = set()
+        for e in os.scandir(self.path):
+            if not (e.is_file() and e.name.lower().endswith(".zip")):
+                continue
+            present.add(e.path)
+            st  = e.stat()
+            sig = (st.st_size, st.st_mtime_ns)
+            if self._seen.get(e.path) == sig:
+                continue
+            if self._pending.get(e.path) == sig:
+                del self._pending[e.path]
+                self._seen[e.path] = sig
+                ready.append(e.path)
+            else:
+                self._pending[e.path] = sig
+        # видалені архіви забуваємо — повернутий файл оброблять знову
+        for d in (self._seen, self._pending):
+            for p in [p for p in d if p not in present]:
+                del d[p]
+        return sorted(ready)